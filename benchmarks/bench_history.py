@@ -0,0 +1,83 @@
+"""Замеряет запросы аналитики к истории статусов на миллионах событий.
+
+Запуск: python -m benchmarks.bench_history [число работ]
+История генерируется во временной базе: у каждой работы событие reviewing
+и вердикт через случайное время. Если запрос дольше бюджета
+(HISTORY_BUDGET_MS, по умолчанию 500 мс), скрипт завершается с ошибкой.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from history import HistoryStore, STATUS_CODES
+
+BUDGET_MS = float(os.getenv('HISTORY_BUDGET_MS', 500))
+TENANTS = 1000
+START = 1640995200
+
+
+def generate(store: HistoryStore, homeworks: int) -> None:
+    """Заполняет базу напрямую, минуя record, чтобы не ждать минутами."""
+    rng = random.Random(1)
+    conn = store._conn
+    with conn:
+        conn.executemany('INSERT INTO history_tenants VALUES (?, ?)',
+                         ((i, f'tenant{i}') for i in range(TENANTS)))
+        events, reviews = [], []
+        for index in range(homeworks):
+            tenant = index % TENANTS
+            key = str(index)
+            started = START + rng.randrange(365 * 86400)
+            seconds = int(rng.lognormvariate(10, 1))
+            verdict = rng.choice((STATUS_CODES['approved'],
+                                  STATUS_CODES['rejected']))
+            events.append((tenant, key, started, STATUS_CODES['reviewing']))
+            events.append((tenant, key, started + seconds, verdict))
+            reviews.append((tenant, key, started + seconds, verdict, seconds))
+        conn.executemany('INSERT INTO history_events VALUES (?, ?, ?, ?)',
+                         events)
+        conn.executemany(
+            'INSERT INTO history_reviews VALUES (?, ?, ?, ?, ?)', reviews)
+    store._tenants = {f'tenant{i}': i for i in range(TENANTS)}
+
+
+def main() -> None:
+    """Печатает время запросов и проверяет бюджет."""
+    homeworks = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(os.path.join(directory, 'history.db'))
+        start = time.perf_counter()
+        generate(store, homeworks)
+        print(f'{homeworks * 2} событий записано за '
+              f'{time.perf_counter() - start:.1f} с')
+        cases = {
+            'count()': lambda: store.count(),
+            'count(approved)': lambda: store.count('approved'),
+            'count(since)': lambda: store.count(since=START + 300 * 86400),
+            'count(tenant, since)': lambda: store.count(
+                tenant='tenant7', since=START + 180 * 86400),
+            'turnaround()': lambda: store.turnaround(),
+            'turnaround(approved)': lambda: store.turnaround(
+                verdict='approved'),
+            'turnaround(since)': lambda: store.turnaround(
+                since=START + 300 * 86400),
+            'turnaround(tenant)': lambda: store.turnaround(tenant='tenant7'),
+            'turnaround(homework)': lambda: store.turnaround(homework='42'),
+        }
+        slow = []
+        for name, query in cases.items():
+            start = time.perf_counter()
+            result = query()
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f'{name:>22}: {elapsed:7.1f} мс  {result}')
+            if elapsed > BUDGET_MS:
+                slow.append(name)
+        store.close()
+    if slow:
+        sys.exit(f'Дольше {BUDGET_MS:g} мс: {", ".join(slow)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Замеряет стоимость логирования одного цикла опроса.
+
+Запуск: python -m benchmarks.bench_logging [число циклов]
+Сравнивает прежнюю схему (синхронные FileHandler и StreamHandler,
+f-строки) с очередью и фоновым потоком записи из logs.py. Сценарий
+«медленный диск» добавляет 1 мс к каждой записи в файл.
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import logs
+
+RESPONSE = {'homeworks': [], 'current_date': 1660000000}
+SLOW_DISK_DELAY = 0.001
+
+
+class SlowFileHandler(logging.FileHandler):
+    """Файловый обработчик, имитирующий медленный диск."""
+
+    def emit(self, record):
+        """Записывает запись с задержкой."""
+        time.sleep(SLOW_DISK_DELAY)
+        super().emit(record)
+
+
+def old_cycle(response: dict) -> None:
+    """Логирование цикла опроса в прежнем виде."""
+    logging.info('Начало запроса к API')
+    logging.debug('Начало проверки ответа от сервера')
+    logging.debug(f'Получен ответ {response}')
+    logging.debug('Нет новых статусов работы')
+
+
+def new_cycle(response: dict) -> None:
+    """Логирование цикла опроса с отложенным форматированием."""
+    logging.info('Начало запроса к API')
+    logging.debug('Начало проверки ответа от сервера')
+    logging.debug('Получен ответ %s', response)
+    logging.debug('Нет новых статусов работы')
+
+
+def reset() -> None:
+    """Снимает все обработчики с корневого логгера."""
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+
+def measure(cycle, count: int) -> float:
+    """Возвращает среднюю стоимость цикла в микросекундах."""
+    start = time.perf_counter()
+    for _ in range(count):
+        cycle(RESPONSE)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def run(tmp: str, level: str, slow: bool, count: int) -> tuple:
+    """Замеряет обе схемы и возвращает стоимость цикла до и после."""
+    file_class = SlowFileHandler if slow else logging.FileHandler
+    logging.basicConfig(
+        level=level,
+        handlers=[file_class(os.path.join(tmp, 'old.log'), encoding='utf-8'),
+                  logging.StreamHandler()],
+        format=logs.LOG_FORMAT)
+    old = measure(old_cycle, count)
+    reset()
+    listener = logs.setup_logging(os.path.join(tmp, 'new.log'), level)
+    if slow:
+        handler = listener.handlers[1]
+        handler.emit = SlowFileHandler.emit.__get__(handler)
+    new = measure(new_cycle, count)
+    listener.stop()
+    reset()
+    return old, new
+
+
+def main() -> None:
+    """Печатает стоимость цикла для старой и новой схемы."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    stdout, sys.stderr = sys.stdout, open(os.devnull, 'w')
+    scenarios = (('DEBUG', False), ('INFO', False), ('DEBUG', True))
+    with tempfile.TemporaryDirectory() as tmp:
+        for level, slow in scenarios:
+            old, new = run(tmp, level, slow, count)
+            disk = 'медленный диск' if slow else 'быстрый диск'
+            print(f'{level:>5}, {disk}: было {old:.1f} мкс/цикл, '
+                  f'стало {new:.1f} мкс/цикл', file=stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""Замеряет стоимость одного наблюдения метрики.
+
+Запуск: python -m benchmarks.bench_metrics
+"""
+import timeit
+
+import metrics
+
+CASES = {
+    'Counter.inc': 'counter.inc()',
+    'Histogram.observe': 'histogram.observe(0.03)',
+    'labels().inc': "labeled.labels(200).inc()",
+    '@timed вызов': 'stage()',
+}
+
+
+def main() -> None:
+    """Печатает стоимость наблюдения в наносекундах."""
+    scope = {
+        'counter': metrics.Counter('c', 'c'),
+        'histogram': metrics.STAGE_SECONDS.labels('bench'),
+        'labeled': metrics.Counter('l', 'l', ('code',)),
+        'stage': metrics.timed('bench')(lambda: None),
+        'noop': lambda: None,
+    }
+    number = 1000000
+    base = timeit.timeit('noop()', globals=scope, number=number)
+    for name, stmt in CASES.items():
+        seconds = timeit.timeit(stmt, globals=scope, number=number)
+        if name == '@timed вызов':
+            seconds -= base
+        print(f'{name:>18}: {seconds / number * 1e9:.0f} нс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Замеряет время запуска: импорт homework и вызов check_tokens.
+
+Запуск: python -m benchmarks.bench_startup [бюджет, мс]
+Каждый замер идёт в отдельном интерпретаторе с -X importtime. Печатаются
+медиана и самые дорогие модули. Если медиана больше бюджета
+(STARTUP_BUDGET_MS, по умолчанию 100 мс) или при импорте подгружаются
+telegram, requests или dotenv, скрипт завершается с ошибкой.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', 100))
+RUNS = 15
+FORBIDDEN = ('telegram', 'requests', 'dotenv')
+SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import homework
+homework.check_tokens()
+print((time.perf_counter() - start) * 1000)
+print(' '.join(sorted(sys.modules)))
+'''
+
+
+def measure() -> tuple:
+    """Запускает интерпретатор, возвращает время, модули и importtime."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SCRIPT],
+        capture_output=True, text=True, check=True,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1'))
+    elapsed, modules = result.stdout.splitlines()
+    return float(elapsed), modules.split(), result.stderr
+
+
+def slowest(importtime: str, count: int = 10) -> list:
+    """Возвращает самые дорогие по собственному времени модули."""
+    rows = []
+    for line in importtime.splitlines()[1:]:
+        own, _, name = line.split('|')
+        rows.append((int(own.split(':')[1]), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main() -> None:
+    """Печатает время запуска и проверяет бюджет."""
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+    timings = []
+    for _ in range(RUNS):
+        elapsed, modules, importtime = measure()
+        timings.append(elapsed)
+    median = statistics.median(timings)
+    print(f'import homework + check_tokens: {median:.1f} мс (медиана)')
+    for own, name in slowest(importtime):
+        print(f'{name:>30}: {own / 1000:.1f} мс')
+    loaded = [name for name in FORBIDDEN if name in modules]
+    if loaded:
+        sys.exit(f'При запуске импортированы тяжёлые модули: {loaded}')
+    if median > budget:
+        sys.exit(f'Запуск дольше бюджета: {median:.1f} > {budget:.0f} мс')
+
+
+if __name__ == '__main__':
+    main()
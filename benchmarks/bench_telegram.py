@@ -0,0 +1,143 @@
+"""Сравнивает telegram.Bot и легковесный botapi.Bot.
+
+Запуск: python -m benchmarks.bench_telegram [число сообщений] [число ботов]
+[задержка заглушки, с]
+Память на студента считается tracemalloc по созданию ботов с разными
+токенами после импорта модулей; стоимость самих импортов замеряется
+в отдельных процессах. Пропускная способность sendMessage — по заглушке
+Bot API в соседнем процессе, последовательно и из HTTP_POOL_SIZE потоков.
+"""
+import multiprocessing
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import telegram
+from telegram.utils.request import Request
+
+import botapi
+import transport
+from benchmarks.stubs import (StubConfig, TelegramStubHandler, configured,
+                              server_url, start_server)
+
+IMPORT_MEMORY = '''
+import time, tracemalloc
+tracemalloc.start()
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(tracemalloc.get_traced_memory()[0], elapsed)
+'''
+
+
+def serve(urls: multiprocessing.Queue, latency: float) -> None:
+    """Запускает заглушку Bot API и передаёт её адрес через очередь."""
+    server = start_server(configured(TelegramStubHandler,
+                                     StubConfig(latency=latency)))
+    urls.put(server_url(server, '/bot'))
+    threading.Event().wait()
+
+
+def start_stub(latency: float) -> tuple:
+    """Запускает заглушку в отдельном процессе, чтобы она не делила GIL."""
+    urls = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(urls, latency),
+                                      daemon=True)
+    process.start()
+    return process, urls.get(timeout=10)
+
+
+def import_cost(module: str) -> tuple:
+    """Возвращает память (КиБ) и время (мс) импорта в чистом процессе."""
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_MEMORY.format(module=module)],
+        capture_output=True, text=True, check=True).stdout.split()
+    return int(output[0]) / 1024, float(output[1]) * 1000
+
+
+def memory_per_bot(factory, count: int) -> float:
+    """Возвращает байты на одного бота, созданного factory(token)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    bots = [factory(f'{100000 + index}:token{index:030d}')
+            for index in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del bots
+    return used / count
+
+
+def throughput(send, count: int, workers: int = 1) -> float:
+    """Возвращает число отправленных сообщений в секунду."""
+    start = time.perf_counter()
+    if workers == 1:
+        for index in range(count):
+            send(index)
+    else:
+        with ThreadPoolExecutor(workers) as executor:
+            list(executor.map(send, range(count)))
+    return count / (time.perf_counter() - start)
+
+
+def light_pipelined(client: botapi.BotClient, count: int) -> float:
+    """Отправляет count сообщений через submit и ждёт все ответы."""
+    start = time.perf_counter()
+    futures = [client.submit('123456:token', index, f'сообщение {index}')
+               for index in range(count)]
+    for future in futures:
+        future.result()
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Печатает память на студента и пропускную способность отправки."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bots = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0
+    workers = transport.HTTP_POOL_SIZE
+    process, base_url = start_stub(latency)
+    request = Request(con_pool_size=workers)
+    client = botapi.BotClient(base_url, workers=workers)
+
+    print('Импорт:')
+    for module in ('telegram', 'botapi'):
+        memory, elapsed = import_cost(module)
+        print(f'{module:>20}: {memory:8.0f} КиБ {elapsed:7.1f} мс')
+
+    print(f'Память на студента ({bots} ботов):')
+    results = {
+        'telegram.Bot': memory_per_bot(lambda token: telegram.Bot(
+            token, base_url=base_url, request=request), bots),
+        'botapi.Bot': memory_per_bot(
+            lambda token: botapi.Bot(token, client), bots),
+    }
+    for name, used in results.items():
+        print(f'{name:>20}: {used:8.0f} байт')
+
+    ptb = telegram.Bot('123456:token', base_url=base_url, request=request)
+    light = botapi.Bot('123456:token', client)
+    print(f'sendMessage ({count} сообщений):')
+    results = {
+        'telegram.Bot': throughput(
+            lambda index: ptb.send_message(index, f'сообщение {index}'),
+            count),
+        'botapi.Bot': throughput(
+            lambda index: light.send_message(index, f'сообщение {index}'),
+            count),
+        f'telegram.Bot x{workers}': throughput(
+            lambda index: ptb.send_message(index, f'сообщение {index}'),
+            count, workers),
+        'botapi submit': light_pipelined(client, count),
+    }
+    for name, rate in results.items():
+        print(f'{name:>20}: {rate:8.0f} сообщений/с')
+    client.close()
+    request.stop()
+    process.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Сравнивает задержку запроса без пула соединений и через общую сессию.
+
+Запуск: python -m benchmarks.bench_transport [число запросов]
+Заглушка работает по HTTP, поэтому экономия здесь — только TCP-рукопожатие;
+для practicum.yandex.ru к ней добавляется ещё и TLS.
+"""
+import statistics
+import sys
+import time
+
+import requests
+
+import transport
+from benchmarks.stubs import server_url, start_server
+
+
+def measure(func, url: str, count: int) -> list:
+    """Возвращает задержки отдельных запросов в миллисекундах."""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func(url).json()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main() -> None:
+    """Печатает медиану и p99 задержки для обоих вариантов."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    server = start_server()
+    url = server_url(server, '/api/user_api/homework_statuses/')
+    results = {
+        'requests.get': measure(requests.get, url, count),
+        'transport.get': measure(transport.get, url, count),
+    }
+    for name, latencies in results.items():
+        latencies.sort()
+        print(f'{name:>14}: p50={statistics.median(latencies):.3f} ms '
+              f'p99={latencies[int(len(latencies) * 0.99) - 1]:.3f} ms')
+    saved = (statistics.median(results['requests.get'])
+             - statistics.median(results['transport.get']))
+    print(f'Экономия на запрос: {saved:.3f} ms')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Сравнивает разбор и проверку большого ответа API.
+
+Запуск: python -m benchmarks.bench_validator [число работ]
+Поштучный путь: json.loads, check_response и parse_status для каждой
+работы.
+Новый путь: validator.loads (orjson, если установлен) и однопроходная
+проверка ResponseValidator с построением сообщений по записям.
+"""
+import json
+import sys
+import timeit
+
+import homework
+import validator
+
+
+def make_body(count: int) -> bytes:
+    """Возвращает тело ответа с заданным числом работ."""
+    statuses = list(homework.HOMEWORK_STATUSES)
+    return json.dumps({
+        'homeworks': [{
+            'id': i,
+            'status': statuses[i % len(statuses)],
+            'homework_name': f'user__hw{i}.zip',
+            'reviewer_comment': 'Всё нравится',
+            'date_updated': '2022-02-13T14:40:57Z',
+            'lesson_name': 'Итоговый проект',
+        } for i in range(count)],
+        'current_date': 1660000000,
+    }).encode()
+
+
+def old_path(body: bytes) -> list:
+    """Поштучный разбор ответа."""
+    response = json.loads(body)
+    homeworks = homework.check_response(response)
+    return [homework.parse_status(item) for item in homeworks]
+
+
+def new_path(body: bytes) -> list:
+    """Разбор ответа однопроходным валидатором."""
+    _, records = homework.response_validator.validate(validator.loads(body))
+    return [homework.record_message(record) for record in records]
+
+
+def main() -> None:
+    """Печатает время обработки одного ответа."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    body = make_body(count)
+    assert old_path(body) == new_path(body)
+    decoder = validator.decoder().__module__
+    for name, func in (('поштучный путь', old_path),
+                       (f'валидатор ({decoder})', new_path)):
+        seconds = min(timeit.repeat(lambda: func(body), number=5, repeat=5))
+        print(f'{name:>20}: {seconds / 5 * 1000:.2f} мс на {count} работ')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Нагрузочный прогон бота против локальных заглушек Практикума и Телеграма.
+
+Запуск: python -m benchmarks.loadtest --tenants 2000 --duration 30
+Отчёт с пропускной способностью, p50/p99 задержки опроса и памятью
+печатается в консоль и, если задан --output, сохраняется в JSON для
+сравнения между версиями.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import statistics
+import threading
+import time
+
+import engine
+import homework
+import transport
+from benchmarks.stubs import (PracticumStubHandler, StubConfig,
+                              TelegramStubHandler, configured, server_url,
+                              start_server)
+from delivery import SendQueue
+
+
+def parse_args() -> argparse.Namespace:
+    """Разбирает параметры прогона."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=2000)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--interval', type=float, default=5,
+                        help='интервал опроса одного студента, с')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--api-latency', type=float, default=0.02)
+    parser.add_argument('--api-error-rate', type=float, default=0.01)
+    parser.add_argument('--api-throttle-rate', type=float, default=0.0)
+    parser.add_argument('--change-rate', type=float, default=0.05)
+    parser.add_argument('--tg-latency', type=float, default=0.01)
+    parser.add_argument('--tg-error-rate', type=float, default=0.0)
+    parser.add_argument('--tg-throttle-rate', type=float, default=0.01)
+    parser.add_argument('--output', help='файл для JSON-отчёта')
+    return parser.parse_args()
+
+
+def percentile(values: list, share: float) -> float:
+    """Возвращает перцентиль отсортированного списка."""
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def record_latency(latencies: list):
+    """Оборачивает request_api, запоминая длительность каждого запроса."""
+    request_api = homework.request_api
+    lock = threading.Lock()
+
+    def wrapper(headers: dict, current_timestamp: int, **kwargs) -> dict:
+        start = time.perf_counter()
+        try:
+            return request_api(headers, current_timestamp, **kwargs)
+        finally:
+            with lock:
+                latencies.append(time.perf_counter() - start)
+    return wrapper
+
+
+async def run_for(polling: engine.PollingEngine, duration: float) -> None:
+    """Запускает движок на заданное время."""
+    task = asyncio.ensure_future(polling.run())
+    await asyncio.sleep(duration)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def main() -> None:
+    """Проводит прогон и печатает отчёт."""
+    args = parse_args()
+    logging.disable(logging.CRITICAL)
+    practicum = configured(PracticumStubHandler, StubConfig(
+        args.api_latency, args.api_error_rate, args.api_throttle_rate,
+        change_rate=args.change_rate))
+    telegram_api = configured(TelegramStubHandler, StubConfig(
+        args.tg_latency, args.tg_error_rate, args.tg_throttle_rate))
+    practicum_server = start_server(practicum)
+    telegram_server = start_server(telegram_api)
+    homework.ENDPOINT = server_url(practicum_server,
+                                   '/api/user_api/homework_statuses/')
+    transport.TELEGRAM_BASE_URL = server_url(telegram_server, '/bot')
+    transport.HTTP_POOL_SIZE = args.concurrency
+
+    tenants = [
+        engine.Tenant(str(i), f'token-{i}', i + 1, '1234:loadtest')
+        for i in range(args.tenants)
+    ]
+    latencies = []
+    homework.request_api = record_latency(latencies)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    polling = engine.PollingEngine(
+        tenants, concurrency=args.concurrency,
+        per_host=args.concurrency, retry_time=args.interval,
+        outbound=SendQueue(chat_rate=1000, global_rate=1000, backoff=0.1),
+        scheduler_options={'growth': 1, 'error_backoff': 0.5})
+    start = time.perf_counter()
+    asyncio.run(run_for(polling, args.duration))
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    latencies.sort()
+    report = {
+        'tenants': args.tenants,
+        'duration_s': round(elapsed, 2),
+        'polls': len(latencies),
+        'polls_per_s': round(len(latencies) / elapsed, 1),
+        'poll_p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'poll_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'poll_mean_ms': round(statistics.fmean(latencies) * 1000, 2)
+        if latencies else 0.0,
+        'api_errors': practicum.stats.errors + practicum.stats.throttled,
+        'status_changes': practicum.stats.changes,
+        'telegram_requests': telegram_api.stats.requests,
+        'telegram_throttled': telegram_api.stats.throttled,
+        'pending_messages': len(polling.outbound),
+        'max_rss_mb': round(rss_after / 1024, 1),
+        'rss_per_tenant_kb': round((rss_after - rss_before) / args.tenants,
+                                   2),
+    }
+    for key, value in report.items():
+        print(f'{key:>20}: {value}')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    practicum_server.shutdown()
+    telegram_server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Воспроизводит записанный трафик как нагрузочный прогон.
+
+Запись: RECORD_FILE=traffic.ndjson python homework.py
+Запуск: python -m benchmarks.replay traffic.ndjson --speed 10
+Запросы к API повторяются с записанными интервалами и задержками,
+ускоренными в --speed раз (0 — без пауз), и проходят весь путь обработки
+ответа: кэш, проверку и поиск изменений. Записанные отправки в Телеграм
+идут через SendQueue с записанными задержками и ошибками.
+"""
+import argparse
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import homework
+import recording
+from benchmarks.loadtest import percentile
+from delivery import SendQueue
+
+
+def parse_args() -> argparse.Namespace:
+    """Разбирает параметры прогона."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('file', help='файл записи NDJSON')
+    parser.add_argument('--speed', type=float, default=1,
+                        help='ускорение, 0 — без пауз')
+    parser.add_argument('--concurrency', type=int, default=16)
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Проводит прогон и печатает отчёт."""
+    args = parse_args()
+    logging.disable(logging.CRITICAL)
+    events = sorted(recording.load(args.file), key=lambda event: event['t'])
+    player = recording.Player(events, speed=args.speed)
+    recording.player = lambda: player
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def poll(event: dict) -> None:
+        headers = player.headers(event['tenant'])
+        start = time.perf_counter()
+        try:
+            response = homework.request_api(
+                headers, (event['params'] or {}).get('from_date'))
+            _, records = homework.validate_response(response)
+            homework.detect_changes(records, {})
+        except Exception as error:
+            with lock:
+                errors.append(type(error).__name__)
+        finally:
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    outbound = SendQueue()
+    outbound.start()
+    bot = player.bot('replay')
+    executor = ThreadPoolExecutor(max_workers=args.concurrency)
+    start = time.perf_counter()
+    for event in events:
+        if args.speed > 0:
+            delay = event['t'] / args.speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        if event['kind'] == 'http':
+            executor.submit(poll, event)
+        else:
+            outbound.put(bot, event['chat_id'], event['text'])
+    executor.shutdown(wait=True)
+    outbound.join()
+    elapsed = time.perf_counter() - start
+    outbound.stop()
+
+    latencies.sort()
+    report = {
+        'events': len(events),
+        'duration_s': round(elapsed, 2),
+        'polls': len(latencies),
+        'poll_p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'poll_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'poll_mean_ms': round(statistics.fmean(latencies) * 1000, 2)
+        if latencies else 0.0,
+        'poll_errors': len(errors),
+        'messages': sum(event['kind'] == 'telegram' for event in events),
+    }
+    for key, value in report.items():
+        print(f'{key:>14}: {value}')
+
+
+if __name__ == '__main__':
+    main()
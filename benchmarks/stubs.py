@@ -0,0 +1,144 @@
+"""Локальные заглушки API Практикума и Телеграма для замеров."""
+import json
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATUSES = ('reviewing', 'rejected', 'reviewing', 'approved')
+
+
+@dataclass
+class StubConfig:
+    """Поведение заглушки: задержка, доля ошибок и ответов 429."""
+
+    latency: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+    change_rate: float = 0.0
+
+
+class StubStats:
+    """Счётчики запросов, обработанных заглушкой."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.changes = 0
+
+    def add(self, field: str) -> None:
+        """Увеличивает счётчик на единицу."""
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Общая логика заглушек: задержка, ошибки и ответ в JSON."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    config = StubConfig()
+    stats = StubStats()
+
+    def reply(self, status: int, payload) -> None:
+        """Отправляет JSON-ответ."""
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def misbehave(self) -> bool:
+        """Имитирует задержку и сбои. Возвращает True, если ответ отправлен."""
+        self.stats.add('requests')
+        if self.config.latency:
+            time.sleep(self.config.latency)
+        roll = random.random()
+        if roll < self.config.throttle_rate:
+            self.stats.add('throttled')
+            self.reply(429, {
+                'ok': False, 'error_code': 429,
+                'description': 'Too Many Requests',
+                'parameters': {'retry_after': self.config.retry_after},
+            })
+            return True
+        if roll < self.config.throttle_rate + self.config.error_rate:
+            self.stats.add('errors')
+            self.reply(500, {'ok': False, 'description': 'Internal error'})
+            return True
+        return False
+
+    def log_message(self, format, *args):
+        """Отключает вывод каждого запроса в stderr."""
+
+
+class PracticumStubHandler(StubHandler):
+    """Отвечает как эндпоинт homework_statuses.
+
+    С вероятностью change_rate у студента меняется статус работы.
+    """
+
+    state = {}
+
+    def do_GET(self):
+        """Возвращает статусы работ студента из заголовка Authorization."""
+        if self.misbehave():
+            return
+        homeworks = []
+        if random.random() < self.config.change_rate:
+            self.stats.add('changes')
+            token = self.headers.get('Authorization', '')
+            step = self.state[token] = self.state.get(token, -1) + 1
+            homeworks.append({
+                'id': zlib.crc32(token.encode()) * 1000 + step // 4,
+                'homework_name': f'hw{step // 4}',
+                'status': STATUSES[step % len(STATUSES)],
+                'date_updated': datetime.now(timezone.utc).strftime(
+                    '%Y-%m-%dT%H:%M:%SZ'),
+            })
+        self.reply(200, {'homeworks': homeworks,
+                         'current_date': int(time.time())})
+
+
+class TelegramStubHandler(StubHandler):
+    """Отвечает как метод sendMessage Bot API."""
+
+    def do_POST(self):
+        """Принимает сообщение и возвращает объект Message."""
+        length = int(self.headers.get('Content-Length', 0))
+        data = json.loads(self.rfile.read(length) or b'{}')
+        if self.misbehave():
+            return
+        self.reply(200, {'ok': True, 'result': {
+            'message_id': 1,
+            'date': int(time.time()),
+            'chat': {'id': int(data.get('chat_id', 0)), 'type': 'private'},
+            'text': data.get('text', ''),
+        }})
+
+
+def configured(handler: type, config: StubConfig) -> type:
+    """Возвращает класс заглушки с собственными настройками и счётчиками."""
+    attrs = {'config': config, 'stats': StubStats(), 'state': {}}
+    return type(handler.__name__, (handler,), attrs)
+
+
+def start_server(handler=PracticumStubHandler) -> ThreadingHTTPServer:
+    """Запускает заглушку на свободном локальном порту в отдельном потоке."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def server_url(server: ThreadingHTTPServer, path: str = '/') -> str:
+    """Возвращает адрес запущенной заглушки."""
+    host, port = server.server_address[:2]
+    return f'http://{host}:{port}{path}'
@@ -0,0 +1,265 @@
+import functools
+import os
+import sys
+import threading
+from typing import TYPE_CHECKING, Optional
+
+import transport
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+    import requests
+
+TELEGRAM_CLIENT = os.getenv('TELEGRAM_CLIENT', 'ptb')
+API_URL = 'https://api.telegram.org/bot'
+HEADERS = {'Content-Type': 'application/json'}
+
+
+class TelegramError(Exception):
+    """Ошибка Bot API с теми же полями, что у telegram.error."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__()
+        for prefix in ('Error: ', '[Error]: ', 'Bad Request: '):
+            if message.startswith(prefix):
+                message = message[len(prefix):]
+        self.message = message
+
+    def __str__(self) -> str:
+        """Возвращает текст ошибки."""
+        return self.message
+
+
+class Unauthorized(TelegramError):
+    """Бот не авторизован или заблокирован пользователем."""
+
+
+class InvalidToken(TelegramError):
+    """Неверный токен бота."""
+
+    def __init__(self) -> None:
+        super().__init__('Invalid token')
+
+
+class NetworkError(TelegramError):
+    """Сбой сети или сервера Телеграма."""
+
+
+class BadRequest(NetworkError):
+    """Телеграм отклонил запрос."""
+
+
+class TimedOut(NetworkError):
+    """Телеграм не ответил вовремя."""
+
+    def __init__(self) -> None:
+        super().__init__('Timed out')
+
+
+class ChatMigrated(TelegramError):
+    """Группа стала супергруппой с новым идентификатором."""
+
+    def __init__(self, new_chat_id: int) -> None:
+        super().__init__('Group migrated to supergroup. '
+                         f'New chat id: {new_chat_id}')
+        self.new_chat_id = new_chat_id
+
+
+class RetryAfter(TelegramError):
+    """Телеграм ограничил частоту запросов."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__('Flood control exceeded. '
+                         f'Retry in {float(retry_after)} seconds')
+        self.retry_after = float(retry_after)
+
+
+class Conflict(TelegramError):
+    """Запрос конфликтует с другим запросом того же бота."""
+
+
+def errors():
+    """Возвращает модуль с классами ошибок выбранного клиента Телеграма.
+
+    Ошибки легковесного клиента повторяют иерархию telegram.error, поэтому
+    код, ловящий их через этот модуль, одинаково работает с обоими.
+    """
+    if TELEGRAM_CLIENT == 'light':
+        return sys.modules[__name__]
+    from telegram import error
+    return error
+
+
+def raise_for_reply(status: int, reply: dict) -> dict:
+    """Возвращает result ответа Bot API или поднимает ошибку по его коду."""
+    if reply.get('ok'):
+        return reply.get('result')
+    description = reply.get('description') or 'Unknown error'
+    parameters = reply.get('parameters') or {}
+    if 'migrate_to_chat_id' in parameters:
+        raise ChatMigrated(parameters['migrate_to_chat_id'])
+    if 'retry_after' in parameters:
+        raise RetryAfter(parameters['retry_after'])
+    if status in (401, 403):
+        raise Unauthorized(description)
+    if status == 400:
+        raise BadRequest(description)
+    if status == 404:
+        raise InvalidToken()
+    if status == 409:
+        raise Conflict(description)
+    if status == 502:
+        raise NetworkError('Bad Gateway')
+    raise NetworkError(f'{description} ({status})')
+
+
+class BotClient:
+    """Клиент Bot API для многих токенов на одном пуле соединений.
+
+    Запросы идут через общую сессию transport, так что все боты делят
+    HTTP_POOL_SIZE постоянных соединений. submit и send_message_async
+    отправляют сообщения из пула потоков того же размера: параллельные
+    запросы занимают свободные соединения пула, не дожидаясь друг друга.
+    """
+
+    def __init__(self, base_url: Optional[str] = None,
+                 session: Optional['requests.Session'] = None,
+                 workers: int = transport.HTTP_POOL_SIZE) -> None:
+        self.base_url = base_url or transport.TELEGRAM_BASE_URL or API_URL
+        self.workers = workers
+        self._session = session
+        self.proxies = {}
+        self._prefix = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> 'requests.Session':
+        """Сессия с пулом соединений, по умолчанию общая из transport."""
+        if self._session is None:
+            self._session = transport.get_session()
+        return self._session
+
+    @property
+    def prefix(self) -> str:
+        """Начало адреса запроса к пулу: путь base_url или весь адрес.
+
+        Через HTTP-прокси запрос отправляется с полным адресом. Адрес Bot API
+        не меняется, поэтому прокси из настроек сессии и окружения
+        разбираются один раз, а не на каждый запрос, как в Session.send.
+        """
+        if self._prefix is None:
+            from requests.utils import select_proxy
+            from urllib3.util import parse_url
+
+            self.proxies = self.session.merge_environment_settings(
+                self.base_url, {}, None, None, None)['proxies']
+            parsed = parse_url(self.base_url)
+            proxied = select_proxy(self.base_url, self.proxies)
+            self._prefix = (self.base_url if proxied
+                            and parsed.scheme == 'http'
+                            else parsed.request_uri)
+        return self._prefix
+
+    @property
+    def executor(self) -> 'ThreadPoolExecutor':
+        """Пул потоков для фоновой отправки, создаётся при первом вызове."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    self._executor = ThreadPoolExecutor(
+                        self.workers, thread_name_prefix='botapi')
+        return self._executor
+
+    def request(self, token: str, method: str, params: dict,
+                timeout: Optional[float] = None):
+        """Вызывает метод Bot API и возвращает поле result ответа.
+
+        Запрос идёт прямо в пул urllib3 адаптера общей сессии: обработка
+        cookies, перенаправлений и разбор прокси из окружения на каждый
+        запрос, которые делает Session.send, Bot API не нужны.
+        """
+        import json
+
+        from urllib3 import Timeout
+        from urllib3.exceptions import HTTPError, TimeoutError
+
+        from validator import loads
+        url = f'{self.base_url}{token}/{method}'
+        adapter = self.session.get_adapter(url)
+        if timeout is None:
+            timeout = (transport.HTTP_CONNECT_TIMEOUT,
+                       transport.HTTP_READ_TIMEOUT)
+        connect, read = (timeout if isinstance(timeout, tuple)
+                         else (timeout, timeout))
+        target = f'{self.prefix}{token}/{method}'
+        try:
+            pool = adapter.get_connection(url, self.proxies)
+            response = pool.urlopen(
+                'POST', target, body=json.dumps(params).encode(),
+                headers=HEADERS, retries=False, redirect=False,
+                assert_same_host=False,
+                timeout=Timeout(connect=connect, read=read))
+        except TimeoutError as error:
+            raise TimedOut() from error
+        except HTTPError as error:
+            raise NetworkError(f'urllib3 HTTPError {error}') from error
+        try:
+            reply = loads(response.data)
+        except ValueError as error:
+            raise NetworkError(
+                f'Invalid server response ({response.status})') from error
+        return raise_for_reply(response.status, reply)
+
+    def send_message(self, token: str, chat_id, text: str,
+                     timeout: Optional[float] = None, **params) -> dict:
+        """Отправляет сообщение и возвращает объект Message в виде словаря."""
+        params.update(chat_id=chat_id, text=text)
+        return self.request(token, 'sendMessage', params, timeout)
+
+    def submit(self, token: str, chat_id, text: str, **params) -> 'Future':
+        """Отправляет сообщение в фоне и сразу возвращает Future."""
+        return self.executor.submit(self.send_message, token, chat_id, text,
+                                    **params)
+
+    async def send_message_async(self, token: str, chat_id, text: str,
+                                 **params) -> dict:
+        """Отправляет сообщение, не блокируя цикл событий asyncio."""
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(
+                self.send_message, token, chat_id, text, **params))
+
+    def close(self) -> None:
+        """Дожидается фоновых отправок и останавливает пул потоков."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+class Bot:
+    """Бот с интерфейсом send_message как у telegram.Bot.
+
+    Хранит только токен и ссылку на общий BotClient, поэтому тысячи
+    студентов со своими ботами почти не занимают памяти.
+    """
+
+    __slots__ = ('token', 'client')
+
+    def __init__(self, token: str, client: BotClient) -> None:
+        self.token = token
+        self.client = client
+
+    def send_message(self, chat_id, text: str,
+                     timeout: Optional[float] = None, **params) -> dict:
+        """Отправляет сообщение в чат."""
+        return self.client.send_message(self.token, chat_id, text,
+                                        timeout, **params)
+
+    async def send_message_async(self, chat_id, text: str, **params) -> dict:
+        """Отправляет сообщение из корутины."""
+        return await self.client.send_message_async(self.token, chat_id,
+                                                    text, **params)
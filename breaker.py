@@ -0,0 +1,152 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Optional
+
+from exceptions import CircuitOpenError
+
+BREAKER_FAILURES = int(os.getenv('BREAKER_FAILURES', 3))
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', 60))
+ERROR_NOTIFY_WINDOW = float(os.getenv('ERROR_NOTIFY_WINDOW', 3600))
+
+RECOVERED_MESSAGE = 'Работа программы восстановлена: API снова отвечает'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+VOLATILE = re.compile(r'\d+')
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Размыкает цепь после серии сбоев и перестаёт ходить в сеть.
+
+    После failure_threshold сбоев подряд цепь размыкается, и вызовы сразу
+    завершаются CircuitOpenError. Через reset_timeout секунд пропускается
+    один пробный вызов: при успехе цепь замыкается и вызывается on_close,
+    при сбое снова размыкается. Ошибки из ignore, например отозванный токен
+    одного студента, говорят не о сбое API и сбоями не считаются.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT,
+                 on_close: Optional[Callable[[], None]] = None,
+                 ignore: tuple = (), clock=time.monotonic) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_close = on_close
+        self.ignore = ignore
+        self.state = CLOSED
+        self.failures = 0
+        self._clock = clock
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if (self.state == OPEN
+                    and self._clock() - self._opened_at >= self.reset_timeout):
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return
+            raise CircuitOpenError(
+                f'API недоступно после {self.failures} сбоев подряд, '
+                'запрос пропущен')
+
+    def _on_success(self) -> None:
+        with self._lock:
+            recovered = self.state != CLOSED
+            self.state = CLOSED
+            self.failures = 0
+            self._trial = False
+        if recovered:
+            logger.info('Цепь замкнута: API снова отвечает')
+            if self.on_close is not None:
+                self.on_close()
+
+    def _on_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if (self.state == HALF_OPEN
+                    or self.failures >= self.failure_threshold):
+                if self.state != OPEN:
+                    logger.warning('Цепь разомкнута после %d сбоев',
+                                   self.failures)
+                self.state = OPEN
+                self._opened_at = self._clock()
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Вызывает func, если цепь не разомкнута."""
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except self.ignore:
+            with self._lock:
+                self._trial = False
+            raise
+        except Exception:
+            self._on_failure()
+            raise
+        self._on_success()
+        return result
+
+
+def fingerprint(error: Exception) -> str:
+    """Возвращает отпечаток ошибки без изменчивых чисел в тексте."""
+    text = f'{type(error).__name__}:{VOLATILE.sub("N", str(error))}'
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+class ErrorNotifier:
+    """Подавляет повторные уведомления об одной и той же ошибке.
+
+    Ошибка с тем же отпечатком отправляется не чаще раза в window секунд.
+    """
+
+    def __init__(self, window: float = ERROR_NOTIFY_WINDOW,
+                 clock=time.monotonic) -> None:
+        self.window = window
+        self.suppressed = 0
+        self._clock = clock
+        self._sent = {}
+        self._lock = threading.Lock()
+
+    def reset(self, key: str = '') -> None:
+        """Забывает отправленные уведомления, например после восстановления."""
+        with self._lock:
+            self._sent = {
+                mark: sent_at for mark, sent_at in self._sent.items()
+                if mark[0] != key
+            }
+
+    def keys(self) -> set:
+        """Возвращает ключи, по которым отправлялись уведомления."""
+        with self._lock:
+            return {mark[0] for mark in self._sent}
+
+    def should_notify(self, error: Exception, key: str = '') -> bool:
+        """Решает, отправлять ли уведомление об ошибке."""
+        now = self._clock()
+        mark = (key, fingerprint(error))
+        with self._lock:
+            sent_at = self._sent.get(mark)
+            if sent_at is not None and now - sent_at < self.window:
+                self.suppressed += 1
+                return False
+            self._sent[mark] = now
+            if len(self._sent) > 10000:
+                self._sent = {
+                    mark: sent_at for mark, sent_at in self._sent.items()
+                    if now - sent_at < self.window
+                }
+            return True
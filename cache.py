@@ -0,0 +1,150 @@
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+import metrics
+from recording import tenant_key
+from validator import loads
+
+if TYPE_CHECKING:
+    import requests
+
+CURRENT_DATE = re.compile(rb'(?<!\\)"current_date"\s*:\s*(\d+)')
+
+CACHE_RESPONSES = metrics.REGISTRY.counter(
+    'homework_cache_responses_total',
+    'Ответы API по результату кэша: not_modified, body_hits, misses',
+    ('tenant', 'result'))
+CACHE_BYTES_SAVED = metrics.REGISTRY.counter(
+    'homework_cache_bytes_saved_total',
+    'Байты ответов API, которые не пришлось передавать', ('tenant',))
+
+
+@dataclass
+class CacheStats:
+    """Счётчики кэша ответов одного студента."""
+
+    requests: int = 0
+    not_modified: int = 0
+    body_hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+
+
+@dataclass
+class CacheEntry:
+    """Последний ответ API для одного студента."""
+
+    digest: Optional[bytes] = None
+    payload: Optional[dict] = None
+    size: int = 0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    records: Optional[tuple] = None
+
+
+class CachedResponse(dict):
+    """Ответ API, связанный с записью кэша.
+
+    В entry.records сохраняются работы, проверенные при первом разборе
+    тела: пока тело не меняется, повторная проверка не нужна.
+    """
+
+    def __init__(self, payload: dict, entry: CacheEntry) -> None:
+        super().__init__(payload)
+        self.entry = entry
+
+
+class ResponseCache:
+    """Кэш ответов эндпоинта homework_statuses.
+
+    Отправляет If-None-Match и If-Modified-Since, если сервер вернул ETag
+    или Last-Modified. Если тело ответа без поля current_date совпадает
+    с предыдущим, ответ не разбирается заново: возвращаются уже разобранные
+    работы с новым current_date, а вместе с ними — проверенные записи
+    (CachedResponse). Студенты различаются по хешу токена
+    (recording.tenant_key), он же служит меткой tenant в метриках.
+    """
+
+    def __init__(self) -> None:
+        self._entries = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(headers: dict) -> str:
+        return tenant_key(headers)
+
+    def _count(self, key: str, result: str, saved: int = 0) -> CacheStats:
+        with self._lock:
+            if key not in self._stats:
+                self._stats[key] = CacheStats()
+            stats = self._stats[key]
+            stats.requests += 1
+            setattr(stats, result, getattr(stats, result) + 1)
+            stats.bytes_saved += saved
+        CACHE_RESPONSES.labels(key, result).inc()
+        if saved:
+            CACHE_BYTES_SAVED.labels(key).inc(saved)
+        return stats
+
+    def stats(self, headers: dict) -> CacheStats:
+        """Возвращает счётчики кэша для студента с такими заголовками."""
+        key = self._key(headers)
+        with self._lock:
+            if key not in self._stats:
+                self._stats[key] = CacheStats()
+            return self._stats[key]
+
+    def conditional_headers(self, headers: dict) -> dict:
+        """Добавляет к заголовкам условия по сохранённому ответу."""
+        entry = self._entries.get(self._key(headers))
+        if entry is None or entry.payload is None:
+            return headers
+        headers = dict(headers)
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def not_modified(self, headers: dict, current_date: int) -> dict:
+        """Возвращает сохранённый ответ на 304 Not Modified.
+
+        current_date — метка, с которой шёл запрос: сохранённая в ответе
+        устарела, и по ней опрос откатился бы назад.
+        """
+        key = self._key(headers)
+        entry = self._entries[key]
+        self._count(key, 'not_modified', entry.size)
+        return CachedResponse(dict(entry.payload, current_date=current_date),
+                              entry)
+
+    def load(self, headers: dict, response: 'requests.Response') -> dict:
+        """Разбирает ответ или берёт разобранный ранее, если он не менялся."""
+        key = self._key(headers)
+        body = response.content
+        dates = CURRENT_DATE.findall(body)
+        digest = None
+        if len(dates) == 1:
+            digest = hashlib.blake2b(CURRENT_DATE.sub(b'', body),
+                                     digest_size=16).digest()
+            entry = self._entries.get(key)
+            if entry is not None and entry.digest == digest:
+                self._count(key, 'body_hits')
+                return CachedResponse(
+                    dict(entry.payload, current_date=int(dates[0])), entry)
+        self._count(key, 'misses')
+        payload = loads(body)
+        if isinstance(payload, dict) and digest is not None:
+            entry = self._entries[key] = CacheEntry(
+                digest, payload, len(body),
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'))
+            return CachedResponse(payload, entry)
+        return payload
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,258 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+import metrics
+from exceptions import DontSendException, TelegramRateLimitError
+from homework import send_to_chat
+from policy import SEND_MAX_ATTEMPTS, policy_for
+
+if TYPE_CHECKING:
+    import telegram
+
+SEND_QUEUE_SIZE = int(os.getenv('SEND_QUEUE_SIZE', 10000))
+SEND_WORKERS = int(os.getenv('SEND_WORKERS', 4))
+SEND_GLOBAL_RATE = float(os.getenv('SEND_GLOBAL_RATE', 30))
+SEND_CHAT_RATE = float(os.getenv('SEND_CHAT_RATE', 1))
+SEND_DRAIN_TIMEOUT = float(os.getenv('SEND_DRAIN_TIMEOUT', 10))
+
+SEND_SECONDS = metrics.STAGE_SECONDS.labels('send_message')
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Ограничивает частоту событий: rate в секунду с запасом capacity."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock=time.monotonic) -> None:
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """Возвращает, сколько секунд ждать до появления токена."""
+        self._refill()
+        if self._tokens >= 1:
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def take(self) -> None:
+        """Забирает один токен."""
+        self._refill()
+        self._tokens -= 1
+
+
+@dataclass
+class OutgoingMessage:
+    """Сообщение в очереди отправки."""
+
+    bot: Any
+    chat_id: Any
+    text: str
+    on_delivered: Optional[Callable[[], None]] = None
+    on_failed: Optional[Callable[[], None]] = None
+    timeout: Optional[float] = None
+    attempt: int = 0
+
+
+class SendQueue:
+    """Ограниченная очередь сообщений в Телеграм с фоновыми отправителями.
+
+    Соблюдает общий лимит и лимит на чат. Повторять ли отправку и с какой
+    паузой, решает политика класса ошибки из policy.POLICIES: retry_after
+    из ответа Телеграма выполняется, сетевые ошибки повторяются с растущей
+    паузой, остальные отбрасывают сообщение. max_attempts ограничивает
+    число попыток, backoff заменяет паузу перед первым повтором из
+    политики. Сообщения одного чата отправляются строго по очереди.
+    """
+
+    def __init__(self, maxsize: int = SEND_QUEUE_SIZE,
+                 workers: int = SEND_WORKERS,
+                 global_rate: float = SEND_GLOBAL_RATE,
+                 chat_rate: float = SEND_CHAT_RATE,
+                 max_attempts: int = SEND_MAX_ATTEMPTS,
+                 backoff: Optional[float] = None,
+                 timeout: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.workers = workers
+        self.chat_rate = chat_rate
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._global = TokenBucket(global_rate)
+        self._buckets = {}
+        self._pending = {}
+        self._schedule = []
+        self._seq = itertools.count()
+        self._unfinished = 0
+        self._paused_until = 0
+        self._cond = threading.Condition()
+        self._stop = False
+        self._threads = []
+
+    def __len__(self) -> int:
+        """Число сообщений, ещё не доставленных или не отброшенных."""
+        return self._unfinished
+
+    def put(self, bot: 'telegram.Bot', chat_id, text: str,
+            on_delivered: Optional[Callable[[], None]] = None,
+            on_failed: Optional[Callable[[], None]] = None,
+            timeout: Optional[float] = None) -> None:
+        """Ставит сообщение в очередь, не дожидаясь отправки.
+
+        on_delivered вызывается в потоке отправителя после успешной отправки,
+        on_failed — когда сообщение отброшено: отклонено Телеграмом, не
+        ушло за max_attempts попыток или упало с неизвестной ошибкой.
+        timeout заменяет таймаут очереди для этого сообщения.
+        """
+        with self._cond:
+            if self._unfinished >= self.maxsize:
+                raise DontSendException(
+                    'Очередь отправки переполнена, сообщение отброшено')
+            self._unfinished += 1
+            pending = self._pending.get(chat_id)
+            if pending is None:
+                pending = self._pending[chat_id] = deque()
+                self._schedule_chat(chat_id, time.monotonic())
+            pending.append(OutgoingMessage(bot, chat_id, text, on_delivered,
+                                           on_failed, timeout))
+
+    def _schedule_chat(self, chat_id, ready_at: float) -> None:
+        heapq.heappush(self._schedule, (ready_at, next(self._seq), chat_id))
+        self._cond.notify_all()
+
+    def _reserve(self, chat_id) -> float:
+        """Забирает токены для чата или возвращает время ожидания."""
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.chat_rate)
+        delay = max(self._paused_until - time.monotonic(),
+                    self._global.wait_time(), bucket.wait_time())
+        if delay <= 0:
+            self._global.take()
+            bucket.take()
+        return delay
+
+    def _next(self) -> Optional[OutgoingMessage]:
+        with self._cond:
+            while not self._stop:
+                if not self._schedule:
+                    self._cond.wait()
+                    continue
+                delay = self._schedule[0][0] - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                _, _, chat_id = heapq.heappop(self._schedule)
+                delay = self._reserve(chat_id)
+                if delay <= 0:
+                    return self._pending[chat_id][0]
+                self._schedule_chat(chat_id, time.monotonic() + delay)
+        return None
+
+    def _done(self, message: OutgoingMessage) -> None:
+        with self._cond:
+            self._unfinished -= 1
+            pending = self._pending[message.chat_id]
+            pending.popleft()
+            if pending:
+                self._schedule_chat(message.chat_id, time.monotonic())
+            else:
+                del self._pending[message.chat_id]
+            self._cond.notify_all()
+
+    def _retry(self, message: OutgoingMessage, error: Exception) -> None:
+        policy = policy_for(error)
+        if self.backoff is not None:
+            policy = policy._replace(backoff=self.backoff)
+        if message.attempt >= min(policy.attempts, self.max_attempts - 1):
+            logger.error('Сообщение "%s" не отправлено после %d попыток: %s',
+                         message.text, message.attempt + 1, error)
+            self._failed(message)
+            self._done(message)
+            return
+        delay = policy.delay(message.attempt, error)
+        logger.warning('%s, повтор через %s с', error, delay)
+        message.attempt += 1
+        with self._cond:
+            if isinstance(error, TelegramRateLimitError):
+                self._paused_until = time.monotonic() + delay
+            self._schedule_chat(message.chat_id, time.monotonic() + delay)
+
+    def _delivered(self, message: OutgoingMessage) -> None:
+        if message.on_delivered is None:
+            return
+        try:
+            message.on_delivered()
+        except Exception:
+            logger.exception('Не удалось отметить доставку сообщения "%s"',
+                             message.text)
+
+    def _failed(self, message: OutgoingMessage) -> None:
+        if message.on_failed is None:
+            return
+        try:
+            message.on_failed()
+        except Exception:
+            logger.exception('Не удалось отметить сбой отправки "%s"',
+                             message.text)
+
+    def _deliver(self, message: OutgoingMessage) -> None:
+        timeout = (self.timeout if message.timeout is None
+                   else message.timeout)
+        kwargs = {} if timeout is None else {'timeout': timeout}
+        start = time.perf_counter()
+        try:
+            send_to_chat(message.bot, message.chat_id, message.text,
+                         **kwargs)
+        except Exception as error:
+            self._retry(message, error)
+        else:
+            self._delivered(message)
+            self._done(message)
+        finally:
+            SEND_SECONDS.observe(time.perf_counter() - start)
+
+    def _run(self) -> None:
+        while True:
+            message = self._next()
+            if message is None:
+                return
+            self._deliver(message)
+
+    def start(self) -> None:
+        """Запускает фоновые потоки отправки."""
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Ждёт, пока очередь опустеет. Возвращает False по таймауту."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._unfinished == 0,
+                                       timeout)
+
+    def stop(self) -> None:
+        """Останавливает потоки отправки."""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
@@ -0,0 +1,229 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from exceptions import DontSendException
+from sinks import Notification, TelegramSink
+
+DIGEST_WINDOW = float(os.getenv('DIGEST_WINDOW', 0))
+DIGEST_MAX_ITEMS = int(os.getenv('DIGEST_MAX_ITEMS', 20))
+DIGEST_URGENT = os.getenv('DIGEST_URGENT', '')
+MESSAGE_LIMIT = 4096
+SEPARATOR = '\n\n'
+
+logger = logging.getLogger(__name__)
+
+
+def urgent_suffixes(statuses: dict, urgent: str = DIGEST_URGENT) -> tuple:
+    """Возвращает окончания сообщений о срочных статусах из DIGEST_URGENT."""
+    return tuple(statuses[status.strip()]
+                 for status in urgent.split(',') if status.strip())
+
+
+def split_text(texts: list, limit: int = MESSAGE_LIMIT,
+               separator: str = SEPARATOR) -> list:
+    """Склеивает тексты в сообщения не длиннее limit символов.
+
+    Возвращает пары (текст сообщения, номера исходных текстов в нём).
+    Текст длиннее limit режется на части, и каждая часть идёт в своё
+    сообщение.
+    """
+    chunks = []
+    parts, owners, length = [], [], 0
+    for index, text in enumerate(texts):
+        for start in range(0, max(len(text), 1), limit):
+            part = text[start:start + limit]
+            size = len(part) + (len(separator) if parts else 0)
+            if parts and length + size > limit:
+                chunks.append((separator.join(parts), owners))
+                parts, owners, length, size = [], [], 0, len(part)
+            parts.append(part)
+            length += size
+            if not owners or owners[-1] != index:
+                owners.append(index)
+    if parts:
+        chunks.append((separator.join(parts), owners))
+    return chunks
+
+
+class Batch:
+    """Накопленные уведомления одного получателя для одного чата."""
+
+    def __init__(self, sink, deadline: float) -> None:
+        self.sink = sink
+        self.deadline = deadline
+        self.items = []
+        self._remaining = []
+        self._failed = set()
+        self._lock = threading.Lock()
+
+    def delivered(self, owners: list) -> None:
+        """Учитывает доставку сообщения с текстами owners."""
+        done = []
+        with self._lock:
+            for index in owners:
+                self._remaining[index] -= 1
+                if not self._remaining[index] and index not in self._failed:
+                    done.append(self.items[index][1])
+        for on_delivered in done:
+            if on_delivered is not None:
+                on_delivered()
+
+    def failed(self, owners: list) -> None:
+        """Учитывает отказ от сообщения с текстами owners.
+
+        Уведомление с текстом в этом сообщении считается недоставленным,
+        даже если другие его части дойдут.
+        """
+        done = []
+        with self._lock:
+            for index in owners:
+                if index not in self._failed:
+                    self._failed.add(index)
+                    done.append(self.items[index][2])
+        for on_failed in done:
+            if on_failed is not None:
+                on_failed()
+
+    def send(self, limit: int) -> None:
+        """Отправляет накопленное одним или несколькими сообщениями."""
+        tenant = self.items[0][0].tenant
+        chat_id = self.items[0][0].chat_id
+        chunks = split_text([notification.text
+                             for notification, _, _ in self.items], limit)
+        self._remaining = [0] * len(self.items)
+        for _, owners in chunks:
+            for index in owners:
+                self._remaining[index] += 1
+        for text, owners in chunks:
+            try:
+                self.sink.put(Notification(tenant, chat_id, text),
+                              lambda owners=owners: self.delivered(owners),
+                              lambda owners=owners: self.failed(owners))
+            except DontSendException as error:
+                logger.error('%s: сводка не отправлена: %s',
+                             self.sink.name, error)
+                self.failed(owners)
+
+
+class Digest:
+    """Копит уведомления по чатам и отправляет их сводками.
+
+    Сводка уходит через window секунд после первого уведомления в чат или
+    сразу, когда накопилось max_items уведомлений. Уведомление, текст
+    которого заканчивается одним из urgent, отправляется сразу вместе с
+    уже накопленными для того же чата. Сводки длиннее limit символов
+    делятся на несколько сообщений. Уведомление считается доставленным,
+    когда доставлены все сообщения с его текстом. При window = 0 сводки
+    выключены и wrap возвращает получателей без изменений.
+    """
+
+    def __init__(self, window: float = DIGEST_WINDOW,
+                 max_items: int = DIGEST_MAX_ITEMS, urgent: tuple = (),
+                 limit: int = MESSAGE_LIMIT, clock=time.monotonic) -> None:
+        self.window = window
+        self.max_items = max_items
+        self.urgent = tuple(urgent)
+        self.limit = limit
+        self._clock = clock
+        self._batches = {}
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+    def wrap(self, sinks: list) -> list:
+        """Подключает сводки к получателям в Телеграм."""
+        if self.window <= 0:
+            return sinks
+        return [DigestSink(self, sink) if isinstance(sink, TelegramSink)
+                else sink for sink in sinks]
+
+    def add(self, sink, notification: Notification,
+            on_delivered: Optional[Callable[[], None]] = None,
+            on_failed: Optional[Callable[[], None]] = None) -> None:
+        """Добавляет уведомление в сводку чата."""
+        key = (id(sink), notification.chat_id)
+        with self._cond:
+            batch = self._batches.get(key)
+            if batch is None:
+                batch = self._batches[key] = Batch(
+                    sink, self._clock() + self.window)
+                self._cond.notify()
+            batch.items.append((notification, on_delivered, on_failed))
+            ready = (len(batch.items) >= self.max_items
+                     or notification.text.endswith(self.urgent))
+            if ready:
+                del self._batches[key]
+        if ready:
+            batch.send(self.limit)
+
+    def _expired(self) -> Optional[list]:
+        with self._cond:
+            while not self._stop:
+                now = self._clock()
+                expired = [key for key, batch in self._batches.items()
+                           if batch.deadline <= now]
+                if expired:
+                    return [self._batches.pop(key) for key in expired]
+                deadline = min((batch.deadline
+                                for batch in self._batches.values()),
+                               default=None)
+                self._cond.wait(None if deadline is None else deadline - now)
+        return None
+
+    def _run(self) -> None:
+        while True:
+            batches = self._expired()
+            if batches is None:
+                return
+            for batch in batches:
+                batch.send(self.limit)
+
+    def flush(self) -> None:
+        """Отправляет все накопленные сводки."""
+        with self._cond:
+            batches, self._batches = list(self._batches.values()), {}
+        for batch in batches:
+            batch.send(self.limit)
+
+    def start(self) -> None:
+        """Запускает отправку сводок по времени, если сводки включены."""
+        if self.window <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Останавливает поток и отправляет накопленное."""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+class DigestSink:
+    """Получатель, отправляющий уведомления через сводки Digest."""
+
+    def __init__(self, digest: Digest, sink) -> None:
+        self.name = sink.name
+        self.digest = digest
+        self.sink = sink
+
+    def put(self, notification: Notification,
+            on_delivered: Optional[Callable[[], None]] = None,
+            on_failed: Optional[Callable[[], None]] = None) -> None:
+        """Добавляет уведомление в сводку, не дожидаясь отправки."""
+        self.digest.add(self.sink, notification, on_delivered, on_failed)
+
+    def start(self) -> None:
+        """Запускает исходного получателя."""
+        self.sink.start()
+
+    def stop(self) -> None:
+        """Останавливает исходного получателя."""
+        self.sink.stop()
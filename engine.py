@@ -0,0 +1,318 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlparse
+
+import homework
+import metrics
+import transport
+from breaker import RECOVERED_MESSAGE, CircuitBreaker, ErrorNotifier
+from delivery import SendQueue
+from digest import Digest, urgent_suffixes
+from exceptions import AuthError
+from history import HistoryStore
+from lease import LeaseKeeper, start_keeper
+from logs import setup_logging
+from outbox import Outbox
+from policy import report_error, retrying
+from profiling import Profiler
+from scheduler import PollScheduler
+from sinks import TelegramSink, start_extra_sinks
+from storage import StateStore
+from watchdog import WATCHDOG_GRACE, Watchdog
+
+if TYPE_CHECKING:
+    import telegram
+
+TENANTS_FILE = os.getenv('TENANTS_FILE', 'tenants.json')
+POLL_CONCURRENCY = int(os.getenv('POLL_CONCURRENCY', 64))
+POLL_PER_HOST_CONCURRENCY = int(os.getenv('POLL_PER_HOST_CONCURRENCY', 32))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """Настройки одного студента: токен Практикума и чат для уведомлений."""
+
+    name: str
+    practicum_token: str
+    chat_id: str
+    telegram_token: Optional[str] = None
+
+    @property
+    def headers(self) -> dict:
+        """Заголовки авторизации для запроса к API Практикума."""
+        return {'Authorization': f'OAuth {self.practicum_token}'}
+
+
+def load_tenants(path: str) -> list:
+    """Загружает список студентов из JSON-файла."""
+    with open(path, encoding='utf-8') as file:
+        items = json.load(file)
+    if not isinstance(items, list):
+        raise TypeError('Список студентов должен быть JSON-массивом')
+    tenants = []
+    for item in items:
+        chat_id = item['telegram_chat_id']
+        tenants.append(Tenant(
+            name=str(item.get('name', chat_id)),
+            practicum_token=item['practicum_token'],
+            chat_id=chat_id,
+            telegram_token=item.get('telegram_token'),
+        ))
+    return tenants
+
+
+class PollingEngine:
+    """Опрашивает API Практикума сразу для многих студентов.
+
+    Каждый студент обслуживается отдельной корутиной. Блокирующие запросы
+    выполняются в пуле потоков, число одновременных запросов ограничено
+    глобально и для каждого хоста.
+    """
+
+    def __init__(self, tenants: list, concurrency: int = POLL_CONCURRENCY,
+                 per_host: int = POLL_PER_HOST_CONCURRENCY,
+                 retry_time: int = homework.RETRY_TIME,
+                 store: Optional[StateStore] = None,
+                 outbound: Optional[SendQueue] = None,
+                 scheduler_options: Optional[dict] = None,
+                 leases: Optional[LeaseKeeper] = None,
+                 extra_sinks: Optional[list] = None,
+                 history: Optional[HistoryStore] = None) -> None:
+        self.tenants = tenants
+        self.leases = leases
+        self._by_name = {tenant.name: tenant for tenant in tenants}
+        self.scheduler_options = scheduler_options or {}
+        self.store = StateStore(':memory:') if store is None else store
+        self.outbound = SendQueue() if outbound is None else outbound
+        self.extra_sinks = list(extra_sinks or [])
+        self.history = history
+        self.digest = Digest(
+            urgent=urgent_suffixes(homework.HOMEWORK_STATUSES))
+        self.profiler = Profiler()
+        self.watchdog = Watchdog()
+        self.outbox = Outbox(self.store, self.sinks)
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.retry_time = retry_time
+        self._bots = {}
+        self._sinks = {}
+        self._schedulers = {}
+        self.stopped = set()
+        self._breakers = {}
+        self.notifier = ErrorNotifier()
+        self._executor = None
+        self._global_limit = None
+        self._host_limits = {}
+
+    def _bot(self, tenant: Tenant) -> 'telegram.Bot':
+        token = tenant.telegram_token or homework.TELEGRAM_TOKEN
+        if token not in self._bots:
+            self._bots[token] = transport.make_bot(token)
+        return self._bots[token]
+
+    def sinks(self, name: str) -> list:
+        """Возвращает получателей уведомлений студента."""
+        if name not in self._sinks:
+            bot = self._bot(self._by_name[name])
+            self._sinks[name] = self.digest.wrap(
+                [TelegramSink(bot, queue=self.outbound), *self.extra_sinks])
+        return self._sinks[name]
+
+    async def _call(self, host: str, func, *args, **kwargs):
+        """Выполняет блокирующий вызов с учётом лимитов конкурентности."""
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        loop = asyncio.get_running_loop()
+        async with self._global_limit, self._host_limits[host]:
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs))
+
+    def scheduler(self, tenant: Tenant) -> PollScheduler:
+        """Возвращает планировщик опросов студента."""
+        if tenant.name not in self._schedulers:
+            self._schedulers[tenant.name] = PollScheduler(
+                self.retry_time, **self.scheduler_options)
+        return self._schedulers[tenant.name]
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        """Возвращает предохранитель запросов к хосту API.
+
+        Предохранитель общий для всех студентов: когда API недоступно,
+        после BREAKER_FAILURES сбоев перестают ходить в сеть все опросы
+        сразу. Ошибки авторизации одного студента сбоями не считаются.
+        """
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(on_close=self._recovered,
+                                                  ignore=(AuthError,))
+        return self._breakers[host]
+
+    def _notify(self, tenant: Tenant, text: str) -> None:
+        self.outbound.put(self._bot(tenant), tenant.chat_id, text)
+
+    def _recovered(self) -> None:
+        """Сообщает о восстановлении студентам, получившим ошибку."""
+        for name in self.notifier.keys():
+            tenant = self._by_name.get(name)
+            if tenant is None or name in self.stopped:
+                continue
+            self.notifier.reset(name)
+            try:
+                self._notify(tenant, RECOVERED_MESSAGE)
+            except Exception:
+                logger.exception('%s: не удалось сообщить о восстановлении',
+                                 name)
+
+    async def poll(self, tenant: Tenant, current_timestamp: int) -> int:
+        """Выполняет один цикл опроса, возвращает новую временную метку."""
+        scheduler = self.scheduler(tenant)
+        try:
+            host = urlparse(homework.ENDPOINT).hostname
+            response = await self._call(
+                host, self.breaker(host).call, retrying, homework.hedger.call,
+                homework.request_api, tenant.headers, current_timestamp,
+                deadline=homework.hedger.deadline)
+            current_date, records = homework.validate_response(response)
+            changes = homework.detect_changes(
+                records, self.store.statuses(tenant.name))
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._commit, tenant, current_date, changes)
+            if not changes:
+                logger.debug('%s: нет новых статусов работы', tenant.name)
+            current_timestamp = current_date
+            scheduler.success(active=bool(changes))
+            metrics.LAST_SUCCESS.set(time.time())
+            return current_timestamp
+        except Exception as error:
+            scheduler.failure()
+            if report_error(error, self.notifier, functools.partial(
+                    self._notify, tenant), tenant.name).stop:
+                self.stopped.add(tenant.name)
+        return current_timestamp
+
+    def _commit(self, tenant: Tenant, current_date: int,
+                changes: list) -> None:
+        """Сохраняет итог опроса, рассылает сообщения и пишет историю."""
+        self.outbox.commit(tenant.name, tenant.chat_id, current_date,
+                           [(record, homework.record_message(record))
+                            for record in changes])
+        if self.history is not None and changes:
+            self.history.safe_record(tenant.name, changes, current_date)
+
+    async def _acquire(self, tenant: Tenant, current_timestamp: int) -> int:
+        """Ждёт аренды студента, возвращает метку для продолжения опроса."""
+        if self.leases is None or self.leases.held(tenant.name):
+            return current_timestamp
+        while not self.leases.held(tenant.name):
+            await asyncio.sleep(self.leases.interval)
+        self.store.load(tenant.name)
+        self.outbox.replay(tenant.name)
+        self.scheduler(tenant).deadline = time.monotonic()
+        return self.store.get_cursor(tenant.name, current_timestamp)
+
+    async def _tenant_loop(self, tenant: Tenant, delay: float) -> None:
+        """Опрашивает студента, пока опрос не остановлен.
+
+        Непредвиденная ошибка, например неверный токен бота в настройках,
+        останавливает опрос только этого студента.
+        """
+        try:
+            await self._poll_forever(tenant, delay)
+        except Exception as error:
+            metrics.ERRORS.labels(type(error).__name__).inc()
+            logger.exception('%s: опрос остановлен из-за непредвиденной '
+                             'ошибки', tenant.name)
+            self.stopped.add(tenant.name)
+            self.watchdog.forget(tenant.name)
+
+    async def _poll_forever(self, tenant: Tenant, delay: float) -> None:
+        self.watchdog.expect(tenant.name, delay + WATCHDOG_GRACE)
+        if self.leases is None:
+            self.outbox.replay(tenant.name)
+        await asyncio.sleep(delay)
+        current_timestamp = self.store.get_cursor(tenant.name,
+                                                  int(time.time()))
+        scheduler = self.scheduler(tenant)
+        scheduler.deadline = time.monotonic()
+        while True:
+            with self.watchdog.paused(tenant.name):
+                current_timestamp = await self._acquire(tenant,
+                                                        current_timestamp)
+            current_timestamp = await self.poll(tenant, current_timestamp)
+            self.profiler.tick()
+            if tenant.name in self.stopped:
+                self.watchdog.forget(tenant.name)
+                return
+            self.watchdog.beat(tenant.name,
+                               scheduler.delay() + WATCHDOG_GRACE)
+            await asyncio.sleep(scheduler.delay())
+
+    async def run(self) -> None:
+        """Запускает опрос всех студентов и работает до отмены."""
+        self._global_limit = asyncio.Semaphore(self.concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self.outbound.start()
+        self.digest.start()
+        self.outbox.prune()
+        step = self.retry_time / max(len(self.tenants), 1)
+        try:
+            await asyncio.gather(*(
+                self._tenant_loop(tenant, index * step)
+                for index, tenant in enumerate(self.tenants)
+            ))
+        finally:
+            self.digest.stop()
+            self.outbound.stop()
+            for sink in self.extra_sinks:
+                sink.stop()
+            self._executor.shutdown(wait=False)
+
+
+def tenant_extra_sinks(tenants: list, queue: SendQueue) -> list:
+    """Запускает получателей уведомлений, общих для всех студентов.
+
+    Используется бот из TELEGRAM_TOKEN или, если он не задан, бот первого
+    студента. Сообщения наставникам идут через очередь студентов queue.
+    """
+    if not tenants:
+        return []
+    return start_extra_sinks(transport.make_bot(
+        homework.TELEGRAM_TOKEN or tenants[0].telegram_token), queue)
+
+
+def main() -> None:
+    """Запускает опрос всех студентов из файла настроек."""
+    setup_logging()
+    tenants = load_tenants(TENANTS_FILE)
+    if not all(tenant.telegram_token or homework.TELEGRAM_TOKEN
+               for tenant in tenants):
+        no_tokens_message = 'Отсутствует нужный токен в переменных окружения'
+        logger.critical(no_tokens_message)
+        sys.exit(no_tokens_message)
+    logger.info('Запуск опроса для %d студентов', len(tenants))
+    store = StateStore()
+    store.start()
+    leases = start_keeper(tenant.name for tenant in tenants)
+    outbound = SendQueue()
+    polling = PollingEngine(tenants, store=store, leases=leases,
+                            outbound=outbound,
+                            extra_sinks=tenant_extra_sinks(tenants, outbound),
+                            history=HistoryStore())
+    metrics.SEND_QUEUE_DEPTH.set_function(lambda: len(polling.outbound))
+    polling.profiler.install()
+    polling.watchdog.start()
+    metrics.start_server()
+    asyncio.run(polling.run())
+
+
+if __name__ == '__main__':
+    main()
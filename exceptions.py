@@ -4,3 +4,59 @@ class DontSendException(Exception):
 
 class StatusNot200Exception(Exception):
     """Класс для ошибоки, если статус ответа сервера не 200."""
+
+
+class CircuitOpenError(DontSendException):
+    """Класс для отказа в запросе, пока API считается недоступным."""
+
+
+class BotError(Exception):
+    """Базовый класс классифицированных ошибок опроса и отправки."""
+
+
+class TransientError(BotError):
+    """Класс для временных ошибок, после которых запрос стоит повторить."""
+
+
+class PermanentError(BotError):
+    """Класс для ошибок, после которых опрос студента бессмысленен."""
+
+
+class APITimeoutError(TransientError, TimeoutError):
+    """Класс для ответа API, не полученного вовремя."""
+
+
+class APIConnectionError(TransientError, ConnectionError):
+    """Класс для сетевой ошибки при запросе к API."""
+
+
+class ServerError(TransientError, StatusNot200Exception):
+    """Класс для ответа 5xx, а также 408 и 429: сервер временно не готов."""
+
+
+class AuthError(PermanentError, StatusNot200Exception):
+    """Класс для ответа 401 или 403: токен Практикума не подходит."""
+
+
+class UnexpectedStatusError(BotError, StatusNot200Exception):
+    """Класс для прочих ответов API с кодом, отличным от 200."""
+
+
+class MalformedJSONError(TransientError, ValueError):
+    """Класс для ответа API, который не разбирается как JSON."""
+
+
+class SchemaError(BotError):
+    """Класс для ответа API, не соответствующего ожидаемой схеме."""
+
+
+class TelegramNetworkError(TransientError, DontSendException):
+    """Класс для сетевой ошибки или таймаута при отправке в Телеграм."""
+
+
+class TelegramRateLimitError(TransientError, DontSendException):
+    """Класс для отказа Телеграма из-за превышения лимита сообщений."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
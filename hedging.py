@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+
+import metrics
+from exceptions import APITimeoutError
+
+POLL_DEADLINE = float(os.getenv('POLL_DEADLINE', 30))
+HEDGE_QUANTILE = float(os.getenv('HEDGE_QUANTILE', 0.95))
+HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', 0.05))
+HEDGE_BUDGET = float(os.getenv('HEDGE_BUDGET', 0.1))
+HEDGE_BURST = float(os.getenv('HEDGE_BURST', 5))
+HEDGE_WINDOW = int(os.getenv('HEDGE_WINDOW', 200))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', 20))
+HEDGE_WORKERS = int(os.getenv('HEDGE_WORKERS', 64))
+
+HEDGES_SENT = metrics.API_HEDGES.labels('sent')
+HEDGES_WON = metrics.API_HEDGES.labels('won')
+
+
+class LatencyEstimator:
+    """Скользящая оценка задержки по последним window успешным ответам."""
+
+    def __init__(self, window: int = HEDGE_WINDOW,
+                 min_samples: int = HEDGE_MIN_SAMPLES) -> None:
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Добавляет длительность очередного ответа."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, share: float) -> Optional[float]:
+        """Возвращает перцентиль задержки или None, пока замеров мало."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            samples = sorted(self._samples)
+        return samples[min(int(len(samples) * share), len(samples) - 1)]
+
+
+class Hedger:
+    """Выполняет запрос со сроком и дублирует его, если ответ задерживается.
+
+    Если первый запрос не ответил за HEDGE_QUANTILE-перцентиль недавних
+    задержек, отправляется второй и используется ответ, пришедший первым.
+    Дублей не больше HEDGE_BUDGET от числа запросов (с запасом HEDGE_BURST),
+    поэтому при общей деградации API нагрузка на него не удваивается.
+    Весь вызов ограничен сроком deadline: по его истечении бросается
+    APITimeoutError, а запросам передаётся оставшееся время как таймаут.
+    """
+
+    def __init__(self, estimator: Optional[LatencyEstimator] = None,
+                 quantile: float = HEDGE_QUANTILE,
+                 min_delay: float = HEDGE_MIN_DELAY,
+                 budget: float = HEDGE_BUDGET, burst: float = HEDGE_BURST,
+                 deadline: float = POLL_DEADLINE,
+                 workers: int = HEDGE_WORKERS,
+                 clock=time.monotonic) -> None:
+        self.estimator = estimator or LatencyEstimator()
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.budget = budget
+        self.burst = burst
+        self.deadline = deadline
+        self.workers = workers
+        self._clock = clock
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def hedge_delay(self) -> Optional[float]:
+        """Возвращает, через сколько секунд дублировать запрос."""
+        estimate = self.estimator.quantile(self.quantile)
+        if estimate is None:
+            return None
+        return max(estimate, self.min_delay)
+
+    def _earn(self) -> None:
+        with self._lock:
+            self._tokens = min(self._tokens + self.budget, self.burst)
+
+    def _spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def _submit(self, func, args: tuple, end: float):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix='hedger')
+        return self._executor.submit(self._timed, func, args, end)
+
+    def _timed(self, func, args: tuple, end: float):
+        start = self._clock()
+        result = func(*args, timeout=max(end - start, 0.001))
+        self.estimator.observe(self._clock() - start)
+        return result
+
+    def call(self, func, *args, deadline: Optional[float] = None):
+        """Вызывает func(*args, timeout=...) с дублированием и сроком.
+
+        timeout — оставшееся до срока время в секундах.
+        """
+        end = self._clock() + (self.deadline if deadline is None
+                               else deadline)
+        self._earn()
+        first = self._submit(func, args, end)
+        pending = {first}
+        delay = self.hedge_delay()
+        if delay is not None:
+            done, _ = wait(pending, timeout=min(delay, end - self._clock()))
+            if not done and self._clock() < end and self._spend():
+                HEDGES_SENT.inc()
+                pending.add(self._submit(func, args, end))
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=end - self._clock(),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                raise APITimeoutError(
+                    'Ответ API не получен за отведённые '
+                    f'{self.deadline if deadline is None else deadline} с')
+            for future in done:
+                if future.exception() is None:
+                    if future is not first:
+                        HEDGES_WON.inc()
+                    return future.result()
+                error = error or future.exception()
+        raise error
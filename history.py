@@ -0,0 +1,242 @@
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Iterable, Optional
+
+from storage import STATE_DB, connect
+
+HISTORY_DB = os.getenv('HISTORY_DB', STATE_DB)
+STATUS_CODES = {'reviewing': 0, 'approved': 1, 'rejected': 2}
+REVIEWING = STATUS_CODES['reviewing']
+VERDICTS = (STATUS_CODES['approved'], STATUS_CODES['rejected'])
+QUANTILES = (0.5, 0.9, 0.99)
+HISTORY_SORT_LIMIT = int(os.getenv('HISTORY_SORT_LIMIT', 200000))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS history_tenants (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS history_events (
+    tenant INTEGER NOT NULL,
+    homework TEXT NOT NULL,
+    at INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    PRIMARY KEY (tenant, homework, at, status)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS history_events_homework
+    ON history_events (homework, at);
+CREATE INDEX IF NOT EXISTS history_events_status
+    ON history_events (status, at);
+CREATE INDEX IF NOT EXISTS history_events_at
+    ON history_events (at);
+CREATE TABLE IF NOT EXISTS history_reviews (
+    tenant INTEGER NOT NULL,
+    homework TEXT NOT NULL,
+    finished INTEGER NOT NULL,
+    verdict INTEGER NOT NULL,
+    seconds INTEGER NOT NULL,
+    PRIMARY KEY (tenant, homework, finished)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS history_reviews_seconds
+    ON history_reviews (seconds);
+CREATE INDEX IF NOT EXISTS history_reviews_verdict
+    ON history_reviews (verdict, seconds);
+CREATE INDEX IF NOT EXISTS history_reviews_tenant
+    ON history_reviews (tenant, seconds);
+CREATE INDEX IF NOT EXISTS history_reviews_homework
+    ON history_reviews (homework, seconds);
+CREATE INDEX IF NOT EXISTS history_reviews_finished
+    ON history_reviews (finished, seconds);
+'''
+
+logger = logging.getLogger(__name__)
+
+
+def parse_time(value: str, default: int) -> int:
+    """Переводит время обновления работы из ISO 8601 в секунды эпохи."""
+    try:
+        return int(datetime.fromisoformat(
+            value.replace('Z', '+00:00')).timestamp())
+    except ValueError:
+        return int(default)
+
+
+def where(filters: dict) -> tuple:
+    """Собирает условие WHERE из условий с заданными значениями."""
+    clauses = [clause for clause, value in filters.items()
+               if value is not None]
+    params = tuple(value for value in filters.values() if value is not None)
+    if not clauses:
+        return '', ()
+    return ' WHERE ' + ' AND '.join(clauses), params
+
+
+def rank(quantile: float, total: int) -> int:
+    """Возвращает номер элемента квантиля в отсортированной выборке."""
+    return min(total - 1, int(quantile * (total - 1) + 0.5))
+
+
+class HistoryStore:
+    """Хранит историю смен статусов работ для аналитики проверки.
+
+    События только дописываются и хранятся компактно: студент — номер из
+    справочника, статус — число, время — целые секунды. Когда приходит
+    вердикт, сразу записывается длительность проверки от последнего
+    reviewing, поэтому перцентили считаются по индексу без пересчёта
+    всей истории. Если под фильтр попадает не больше sort_limit проверок,
+    они выбираются по индексу фильтра и сортируются один раз: иначе
+    каждый перцентиль заново сортировал бы их в SQLite.
+    """
+
+    def __init__(self, path: str = HISTORY_DB,
+                 sort_limit: int = HISTORY_SORT_LIMIT) -> None:
+        self.sort_limit = sort_limit
+        self._conn = connect(path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._tenants = dict(self._conn.execute(
+            'SELECT name, id FROM history_tenants'))
+
+    def _tenant_id(self, tenant: str) -> int:
+        if tenant not in self._tenants:
+            self._tenants[tenant] = self._conn.execute(
+                'INSERT INTO history_tenants (name) VALUES (?)',
+                (tenant,)).lastrowid
+        return self._tenants[tenant]
+
+    def record(self, tenant: str, records: Iterable,
+               timestamp: int) -> int:
+        """Дописывает смены статусов одной транзакцией.
+
+        records — HomeworkRecord; если у работы нет date_updated, берётся
+        timestamp. Уже записанные события пропускаются. Возвращает число
+        новых событий.
+        """
+        added = 0
+        with self._lock, self._conn:
+            tenant_id = self._tenant_id(tenant)
+            for record in records:
+                at = parse_time(record.date_updated, timestamp)
+                status = STATUS_CODES[record.status]
+                if not self._conn.execute(
+                        'INSERT OR IGNORE INTO history_events '
+                        'VALUES (?, ?, ?, ?)',
+                        (tenant_id, record.key, at, status)).rowcount:
+                    continue
+                added += 1
+                if status in VERDICTS:
+                    self._review(tenant_id, record.key, at, status)
+        return added
+
+    def _review(self, tenant_id: int, homework: str, at: int,
+                verdict: int) -> None:
+        started = self._conn.execute(
+            'SELECT at FROM history_events WHERE tenant = ? '
+            'AND homework = ? AND at <= ? AND status = ? '
+            'ORDER BY at DESC LIMIT 1',
+            (tenant_id, homework, at, REVIEWING)).fetchone()
+        if started is not None:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO history_reviews VALUES (?, ?, ?, ?, ?)',
+                (tenant_id, homework, at, verdict, at - started[0]))
+
+    def safe_record(self, tenant: str, records: Iterable,
+                    timestamp: int) -> int:
+        """Как record, но ошибка базы только пишется в лог.
+
+        История нужна для аналитики и не должна прерывать опрос.
+        """
+        try:
+            return self.record(tenant, records, timestamp)
+        except sqlite3.Error:
+            logger.exception('Не удалось записать историю статусов')
+            return 0
+
+    def _tenant_filter(self, tenant: Optional[str]) -> Optional[int]:
+        if tenant is None:
+            return None
+        return self._tenants.get(tenant, -1)
+
+    def count(self, status: Optional[str] = None,
+              tenant: Optional[str] = None, homework: Optional[str] = None,
+              since: Optional[int] = None,
+              until: Optional[int] = None) -> int:
+        """Возвращает число смен статуса, подходящих под фильтры.
+
+        since и until — границы времени в секундах эпохи, until не входит.
+        """
+        condition, params = where({
+            'status = ?': None if status is None else STATUS_CODES[status],
+            'tenant = ?': self._tenant_filter(tenant),
+            'homework = ?': homework,
+            'at >= ?': since,
+            'at < ?': until,
+        })
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM history_events' + condition,
+                params).fetchone()[0]
+
+    def turnaround(self, quantiles: Iterable[float] = QUANTILES,
+                   verdict: Optional[str] = None,
+                   tenant: Optional[str] = None,
+                   homework: Optional[str] = None,
+                   since: Optional[int] = None,
+                   until: Optional[int] = None) -> dict:
+        """Возвращает перцентили времени проверки в секундах.
+
+        Время проверки — от последнего reviewing до approved или rejected.
+        Результат — словарь {квантиль: секунды}, пустой, если проверок нет.
+        Фильтр since/until применяется ко времени вердикта.
+        """
+        condition, params = where({
+            'verdict = ?': None if verdict is None else STATUS_CODES[verdict],
+            'tenant = ?': self._tenant_filter(tenant),
+            'homework = ?': homework,
+            'finished >= ?': since,
+            'finished < ?': until,
+        })
+        with self._lock:
+            total = self._conn.execute(
+                'SELECT COUNT(*) FROM history_reviews' + condition,
+                params).fetchone()[0]
+            if not total:
+                return {}
+            if total <= self.sort_limit:
+                values = sorted(seconds for seconds, in self._conn.execute(
+                    'SELECT seconds FROM history_reviews' + condition,
+                    params))
+                return {quantile: values[rank(quantile, total)]
+                        for quantile in quantiles}
+            query = ('SELECT seconds FROM history_reviews' + condition
+                     + ' ORDER BY seconds LIMIT 1 OFFSET ?')
+            return {quantile: self._conn.execute(
+                query, params + (rank(quantile, total),)).fetchone()[0]
+                for quantile in quantiles}
+
+    def close(self) -> None:
+        """Закрывает базу."""
+        with self._lock:
+            self._conn.close()
+
+
+def main() -> None:
+    """Печатает сводку по проверкам: python -m history [студент]."""
+    tenant = sys.argv[1] if len(sys.argv) > 1 else None
+    store = HistoryStore()
+    for status in STATUS_CODES:
+        print(f'{status:>10}: {store.count(status, tenant)}')
+    for verdict in (None, 'approved', 'rejected'):
+        percentiles = store.turnaround(verdict=verdict, tenant=tenant)
+        line = ', '.join(f'p{quantile * 100:g} {seconds / 3600:.1f} ч'
+                         for quantile, seconds in percentiles.items())
+        print(f'{verdict or "все":>10}: {line or "нет проверок"}')
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
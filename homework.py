@@ -1,22 +1,48 @@
+import functools
 import logging
 import os
 import sys
 import time
 from http import HTTPStatus
+from operator import attrgetter
+from typing import TYPE_CHECKING, Optional
 
-import requests
-import telegram
-from dotenv import load_dotenv
+import botapi
+import metrics
+import transport
+from exceptions import (APIConnectionError, APITimeoutError,
+                        DontSendException, MalformedJSONError, SchemaError,
+                        TelegramNetworkError, TelegramRateLimitError)
+from hedging import Hedger
+from policy import report_error, retrying, status_error
+from validator import HomeworkRecord, ResponseValidator
 
-from exceptions import DontSendException, StatusNot200Exception
+if TYPE_CHECKING:
+    import telegram
 
-load_dotenv()
+    from lease import LeaseKeeper
+    from outbox import Outbox
+    from scheduler import PollScheduler
+
+
+def load_env(path: str = os.path.join(os.path.dirname(__file__), '.env')):
+    """Загружает переменные окружения из .env, если такой файл есть.
+
+    python-dotenv импортируется, только когда файл существует: на сервере
+    переменные задаются окружением, и импорт лишь замедлял бы запуск.
+    """
+    if os.path.exists(path):
+        from dotenv import load_dotenv
+        load_dotenv(path)
+
+
+load_env()
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
-RETRY_TIME = 600
+RETRY_TIME = int(os.getenv('RETRY_TIME', 600))
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
@@ -27,103 +53,181 @@ HOMEWORK_STATUSES = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+response_validator = ResponseValidator(HOMEWORK_STATUSES)
+hedger = Hedger()
 
-class ColorFilter(logging.Filter):
-    """Кастомыный класс для выделения сообщений разным цветом."""
 
-    COLOR = {
-        "DEBUG": "GREEN",
-        "INFO": "BLUE",
-        "WARNING": "YELLOW",
-        "ERROR": "ORANGE",
-        "CRITICAL": "RED",
-    }
+logger = logging.getLogger(__name__)
 
-    def filter(self, record):
-        """Устанавливает цвет сообщения."""
-        record.color = ColorFilter.COLOR[record.levelname]
-        return True
 
+def send_message(bot: 'telegram.Bot', message: str) -> None:
+    """Отправляет сообщение с заданным текстом в чат Телеграм."""
+    send_to_chat(bot, TELEGRAM_CHAT_ID, message)
 
-logger = logging.getLogger(__name__)
-logging.basicConfig(
-    level=logging.DEBUG,
-    handlers=[
-        logging.FileHandler(filename='homework_bot.log',
-                            encoding='utf-8'),
-        logging.StreamHandler()],
-    format='%(asctime)s, %(levelname)s, %(message)s'
-)
 
+def send_to_chat(bot: 'telegram.Bot', chat_id: str, message: str,
+                 **kwargs) -> None:
+    """Отправляет сообщение в заданный чат Телеграм.
 
-def send_message(bot: telegram.Bot, message: str) -> None:
-    """Отправляет сообщение с заданным текстом в чат Телеграм."""
+    Ошибки Телеграма переводятся в классы из exceptions, по которым
+    policy.POLICIES решает, повторять ли отправку: SendQueue отправляет
+    сообщения через эту функцию.
+    """
+    errors = botapi.errors()
     try:
-        logging.info(f'Начата отправка сообщения "{message}"')
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
-    except telegram.error.TelegramError:
-        raise DontSendException('Произошла ошибка при отправке сообщения')
+        logging.info('Начата отправка сообщения "%s"', message)
+        bot.send_message(chat_id=chat_id, text=message, **kwargs)
+    except errors.RetryAfter as error:
+        raise TelegramRateLimitError(
+            'Телеграм ограничил отправку сообщений',
+            error.retry_after) from error
+    except errors.BadRequest as error:
+        raise DontSendException(
+            f'Телеграм отклонил сообщение: {error}') from error
+    except errors.NetworkError as error:
+        raise TelegramNetworkError(
+            f'Ошибка сети при отправке сообщения: {error}') from error
+    except errors.TelegramError as error:
+        raise DontSendException(
+            f'Произошла ошибка при отправке сообщения: {error}') from error
     else:
-        logging.info(f'Успешно отправлено сообщение {message}')
+        logging.info('Успешно отправлено сообщение %s', message)
 
 
 def get_api_answer(current_timestamp: int) -> dict:
     """Возвращает ответ от сервера в виде словаря."""
+    from cache import CachedResponse
+    response = hedger.call(request_api, HEADERS, current_timestamp)
+    if isinstance(response, CachedResponse):
+        return dict(response)
+    return response
+
+
+@metrics.timed('get_api_answer')
+def request_api(headers: dict, current_timestamp: int,
+                timeout: Optional[float] = None) -> dict:
+    """Запрашивает статусы работ с заданными заголовками авторизации.
+
+    timeout — сколько секунд осталось до срока опроса.
+    """
+    import requests
+
+    from cache import response_cache
     timestamp = current_timestamp or int(time.time())
     params = {'from_date': timestamp}
+    kwargs = {}
+    if timeout is not None:
+        kwargs['timeout'] = (min(transport.HTTP_CONNECT_TIMEOUT, timeout),
+                             min(transport.HTTP_READ_TIMEOUT, timeout))
     try:
         logging.info('Начало запроса к API')
-        response = requests.get(url=ENDPOINT, headers=HEADERS, params=params)
-        if response.status_code != HTTPStatus.OK:
-            raise StatusNot200Exception(
-                'Статус ответа сервера не 200.'
-                'Параметры запроса к API:'
-                f'url={ENDPOINT}, headers={HEADERS},'
-                f'params={params}')
-    except Exception:
-        raise Exception(
-            'Неизвесная ошибка при запросе к эндпоинту'
-            'Параметры запроса к API:'
-            f'response.status_code={response.status_code},'
-            f'response_reason={response.reason},'
-            f'response.text={response.text},'
-            f'url={ENDPOINT},'
-            f'headers={HEADERS},'
-            f'params={params}.')
-
-    else:
-        return response.json()
+        response = transport.get(
+            url=ENDPOINT, headers=response_cache.conditional_headers(headers),
+            params=params, **kwargs)
+    except requests.Timeout as error:
+        raise APITimeoutError(
+            f'API не ответило вовремя: {error}. Параметры запроса к API: '
+            f'url={ENDPOINT}, params={params}.') from error
+    except requests.RequestException as error:
+        raise APIConnectionError(
+            f'Сетевая ошибка при запросе к эндпоинту: {error}. '
+            f'Параметры запроса к API: url={ENDPOINT}, params={params}.'
+        ) from error
+    metrics.API_RESPONSES.labels(response.status_code).inc()
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        return response_cache.not_modified(headers, timestamp)
+    if response.status_code != HTTPStatus.OK:
+        raise status_error(response.status_code)(
+            f'Статус ответа сервера {response.status_code} '
+            f'{response.reason}. Параметры запроса к API: '
+            f'url={ENDPOINT}, params={params}.')
+    try:
+        return response_cache.load(headers, response)
+    except ValueError as error:
+        raise MalformedJSONError(
+            f'Ответ API не в формате JSON: {error}') from error
 
 
 def check_response(response: dict) -> list:
-    """Проверяет полученный ответ от сервера на корректность."""
-    logging.debug('Начало проверки ответа от сервера')
-    if not isinstance(response, dict):
-        raise TypeError('Ответ не в формате словаря')
-    homeworks_list = response.get('homeworks')
-    if homeworks_list is None:
-        raise Exception('отсутствует ключ homeworks')
-    if response.get('current_date') is None:
-        raise Exception('отсутствует ключ current_date')
-    if not isinstance(homeworks_list, list):
-        raise DontSendException('Работы приходят не в виде списка')
-    return homeworks_list
-
-
-def parse_status(homework: list) -> dict:
+    """Проверяет полученный ответ от сервера на корректность.
+
+    Цикл опроса проверяет ответ целиком через validate_response; функция
+    оставлена для поштучной проверки работ вместе с parse_status.
+    """
+    return response_validator.homeworks(response)
+
+
+def parse_status(homework: dict) -> str:
     """Определяет статус домашней работы, возвращает сообщение об этом."""
-    homework_name = homework.get('homework_name')
-    homework_status = homework.get('status')
-    if homework_name is None:
-        raise KeyError('В словаре отсутствует ключ homeworl_name')
-    elif homework_status is None:
-        raise KeyError('В словаре отсутствует ключ status')
-    elif homework_status not in HOMEWORK_STATUSES.keys():
-        raise ValueError('Недокументированный статус домашней работы')
+    return record_message(response_validator.record(homework))
+
+
+def status_message(homework_name: str, homework_status: str) -> str:
+    """Возвращает сообщение об изменении статуса работы."""
     verdict = HOMEWORK_STATUSES[homework_status]
     return f'Изменился статус проверки работы "{homework_name}". {verdict}'
 
 
+@metrics.timed('validate_response')
+def validate_response(response: dict) -> tuple:
+    """Проверяет ответ и все работы в нём за один проход.
+
+    Возвращает current_date и список записей HomeworkRecord. Для ответа
+    из кэша (cache.CachedResponse) записи проверяются только один раз,
+    пока тело ответа не изменится.
+    """
+    entry = getattr(response, 'entry', None)
+    if entry is not None and entry.records is not None:
+        return response['current_date'], list(entry.records)
+    try:
+        current_date, records = response_validator.validate(response)
+    except Exception as error:
+        raise SchemaError(
+            f'Ответ API не соответствует схеме: {error}') from error
+    if entry is not None:
+        entry.records = tuple(records)
+    return current_date, records
+
+
+def record_message(record: HomeworkRecord) -> str:
+    """Возвращает сообщение об изменении статуса проверенной работы."""
+    return status_message(record.name, record.status)
+
+
+def detect_changes(records: list, known: dict) -> list:
+    """Возвращает работы с изменившимся статусом в хронологическом порядке.
+
+    known — последние известные статусы работ по ключу HomeworkRecord.key.
+    API отдаёт работы от новых к старым, поэтому при отсутствии
+    date_updated сохраняется обратный порядок ответа.
+    """
+    ordered = sorted(reversed(records), key=attrgetter('date_updated'))
+    return [
+        record for record in ordered
+        if known.get(record.key) != record.status
+    ]
+
+
+def take_over(leases: Optional['LeaseKeeper'], outbox: 'Outbox',
+              scheduler: 'PollScheduler', tenant: str,
+              current_timestamp: int) -> int:
+    """Ждёт аренды студента и возвращает метку, с которой продолжить опрос.
+
+    Пока аренда у другого экземпляра бота, запросы к API не выполняются.
+    Получив аренду, бот перечитывает состояние, сохранённое прежним
+    владельцем, досылает недоставленные им сообщения и сразу выполняет
+    опрос.
+    """
+    if leases is None or leases.held(tenant):
+        return current_timestamp
+    logging.info('Опрос ведёт другой экземпляр, ожидание аренды')
+    leases.wait(tenant)
+    outbox.store.load(tenant)
+    outbox.replay(tenant)
+    scheduler.deadline = time.monotonic()
+    return outbox.store.get_cursor(tenant, current_timestamp)
+
+
 def check_tokens() -> bool:
     """Проверяет наличие необходимых токенов в переменных окружения."""
     tokens_list = (PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID,)
@@ -131,32 +235,89 @@ def check_tokens() -> bool:
 
 
 def main() -> None:
-    """Основная логика работы бота."""
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
+    """Основная логика работы бота.
+
+    Модули, нужные только циклу опроса, импортируются здесь, чтобы импорт
+    homework и check_tokens оставались быстрыми.
+    """
+    from breaker import RECOVERED_MESSAGE, CircuitBreaker, ErrorNotifier
+    from delivery import SEND_DRAIN_TIMEOUT, SendQueue
+    from digest import Digest, urgent_suffixes
+    from history import HistoryStore
+    from lease import start_keeper
+    from logs import setup_logging
+    from outbox import Outbox
+    from profiling import Profiler
+    from scheduler import PollScheduler
+    from sinks import TelegramSink, start_extra_sinks
+    from storage import StateStore
+    from watchdog import WATCHDOG_GRACE, Watchdog
+
+    setup_logging()
+    bot = transport.make_bot(TELEGRAM_TOKEN)
     if not check_tokens():
         no_tokens_message = 'Отсутствует нужный токен в переменных окружения'
         logging.critical(no_tokens_message)
         sys.exit(no_tokens_message)
+    tenant = str(TELEGRAM_CHAT_ID)
+    store = StateStore()
+    store.start()
+    history = HistoryStore()
+    outbound = SendQueue()
+    outbound.start()
+    digest = Digest(urgent=urgent_suffixes(HOMEWORK_STATUSES))
+    digest.start()
+    sinks = digest.wrap([TelegramSink(bot, queue=outbound),
+                         *start_extra_sinks(bot, outbound)])
+    outbox = Outbox(store, lambda tenant: sinks)
+    metrics.SEND_QUEUE_DEPTH.set_function(lambda: len(outbound))
+    metrics.start_server()
+    scheduler = PollScheduler(RETRY_TIME)
+    notifier = ErrorNotifier()
+    profiler = Profiler()
+    profiler.install()
+    watchdog = Watchdog()
+    watchdog.start()
+
+    def on_recover():
+        notifier.reset()
+        outbound.put(bot, TELEGRAM_CHAT_ID, RECOVERED_MESSAGE)
+
+    breaker = CircuitBreaker(on_close=on_recover)
+    outbox.prune()
+    leases = start_keeper([tenant])
+    if leases is None:
+        outbox.replay(tenant)
+    current_timestamp = store.get_cursor(tenant, int(time.time()))
     while True:
+        with watchdog.paused(tenant):
+            current_timestamp = take_over(leases, outbox, scheduler, tenant,
+                                          current_timestamp)
         try:
-            response = get_api_answer(current_timestamp)
-            homeworks = check_response(response)
-            if homeworks:
-                message = parse_status(homeworks[0])
-                send_message(bot, message)
-                logging.info(f'Успешно отправлено сообщение: "{message}"')
-                current_timestamp = response.get('current_date')
-            else:
+            response = breaker.call(
+                retrying, hedger.call, request_api, HEADERS,
+                current_timestamp, deadline=hedger.deadline)
+            current_date, records = validate_response(response)
+            changes = detect_changes(records, store.statuses(tenant))
+            outbox.commit(tenant, TELEGRAM_CHAT_ID, current_date, [
+                (record, record_message(record)) for record in changes])
+            history.safe_record(tenant, changes, current_date)
+            if not changes:
                 logging.debug('Нет новых статусов работы')
-        except DontSendException as error:
-            logging.exception(f'Сбой в работе программы: {error}')
+            current_timestamp = current_date
         except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logging.exception(f'Сбой в работе программы: {error}')
-            send_message(bot, message)
-        finally:
-            time.sleep(RETRY_TIME)
+            scheduler.failure()
+            if report_error(error, notifier, functools.partial(
+                    outbound.put, bot, TELEGRAM_CHAT_ID)).stop:
+                break
+        else:
+            scheduler.success(active=bool(changes))
+            metrics.LAST_SUCCESS.set(time.time())
+        profiler.tick()
+        watchdog.beat(tenant, scheduler.delay() + WATCHDOG_GRACE)
+        scheduler.wait()
+    watchdog.forget(tenant)
+    outbound.join(SEND_DRAIN_TIMEOUT)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,210 @@
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional
+from urllib.parse import quote
+
+from storage import STATE_DB, connect
+
+LEASE_BACKEND = os.getenv('LEASE_BACKEND', '')
+LEASE_PATH = os.getenv('LEASE_PATH')
+LEASE_TTL = float(os.getenv('LEASE_TTL', 30))
+LEASE_OWNER = os.getenv('LEASE_OWNER')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS leases (
+    resource TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+'''
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteLeaseBackend:
+    """Хранит аренды в таблице SQLite, общей для всех экземпляров."""
+
+    def __init__(self, path: str = STATE_DB) -> None:
+        self._conn = connect(path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def acquire(self, owner: str, resources: Iterable[str], ttl: float,
+                now: float) -> set:
+        """Берёт или продлевает аренды, возвращает удержанные ресурсы."""
+        held = set()
+        with self._lock, self._conn:
+            for resource in resources:
+                cursor = self._conn.execute(
+                    'INSERT INTO leases VALUES (?, ?, ?) '
+                    'ON CONFLICT(resource) DO UPDATE '
+                    'SET owner = excluded.owner, expires = excluded.expires '
+                    'WHERE leases.owner = excluded.owner '
+                    'OR leases.expires <= ?',
+                    (resource, owner, now + ttl, now))
+                if cursor.rowcount:
+                    held.add(resource)
+        return held
+
+    def release(self, owner: str, resources: Iterable[str]) -> None:
+        """Освобождает аренды владельца."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'DELETE FROM leases WHERE owner = ? AND resource = ?',
+                ((owner, resource) for resource in resources))
+
+
+class FileLeaseBackend:
+    """Хранит аренды в файлах каталога, доступ к файлу защищён flock."""
+
+    def __init__(self, path: str = 'leases') -> None:
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, resource: str) -> str:
+        return os.path.join(self.path, quote(resource, safe='') + '.lease')
+
+    def _update(self, resource: str, owner: str,
+                expires: Optional[float], now: float) -> bool:
+        with open(self._file(resource), 'a+', encoding='utf-8') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            file.seek(0)
+            try:
+                current = json.loads(file.read())
+            except ValueError:
+                current = {'owner': None, 'expires': 0}
+            if current['owner'] != owner and (
+                    expires is None or current['expires'] > now):
+                return False
+            file.seek(0)
+            file.truncate()
+            if expires is not None:
+                json.dump({'owner': owner, 'expires': expires}, file)
+            return True
+
+    def acquire(self, owner: str, resources: Iterable[str], ttl: float,
+                now: float) -> set:
+        """Берёт или продлевает аренды, возвращает удержанные ресурсы."""
+        return {
+            resource for resource in resources
+            if self._update(resource, owner, now + ttl, now)
+        }
+
+    def release(self, owner: str, resources: Iterable[str]) -> None:
+        """Освобождает аренды владельца."""
+        for resource in resources:
+            self._update(resource, owner, None, 0)
+
+
+BACKENDS = {
+    'sqlite': SQLiteLeaseBackend,
+    'file': FileLeaseBackend,
+}
+
+
+class LeaseKeeper:
+    """Удерживает аренды студентов, чтобы их опрашивал один экземпляр.
+
+    Фоновый поток раз в треть ttl продлевает аренды или пытается взять
+    свободные. Аренда считается удержанной до момента, отсчитанного от
+    начала последнего продления, поэтому при зависании продления экземпляр
+    перестаёт опрашивать раньше, чем аренду сможет взять другой.
+    """
+
+    def __init__(self, backend, owner: Optional[str] = LEASE_OWNER,
+                 ttl: float = LEASE_TTL, clock=time.time) -> None:
+        self.backend = backend
+        self.owner = owner or f'{os.uname().nodename}:{os.getpid()}'
+        self.ttl = ttl
+        self.interval = ttl / 3
+        self._clock = clock
+        self._wanted = set()
+        self._expires = {}
+        self._changed = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def want(self, *resources: str) -> None:
+        """Добавляет ресурсы, аренду которых нужно удерживать."""
+        with self._changed:
+            self._wanted.update(resources)
+
+    def held(self, resource: str) -> bool:
+        """Проверяет, удерживается ли аренда ресурса."""
+        return self._expires.get(resource, 0) > self._clock()
+
+    def renew(self) -> set:
+        """Продлевает аренды, возвращает только что полученные ресурсы."""
+        now = self._clock()
+        with self._changed:
+            wanted = list(self._wanted)
+        held = self.backend.acquire(self.owner, wanted, self.ttl, now)
+        with self._changed:
+            acquired = {
+                resource for resource in held
+                if self._expires.get(resource, 0) <= now
+            }
+            lost = {
+                resource for resource in self._expires
+                if resource not in held and self._expires[resource] > now
+            }
+            self._expires = dict.fromkeys(held, now + self.ttl)
+            self._changed.notify_all()
+        for resource in acquired:
+            logger.info('Получена аренда %s', resource)
+        for resource in lost:
+            logger.warning('Аренда %s перешла другому экземпляру', resource)
+        return acquired
+
+    def wait(self, resource: str, timeout: Optional[float] = None) -> bool:
+        """Ждёт, пока аренда ресурса не окажется у этого экземпляра."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.held(resource),
+                                          timeout)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.renew()
+            except Exception:
+                logger.exception('Не удалось продлить аренды')
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self) -> None:
+        """Запускает фоновое продление аренд."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        """Останавливает продление и освобождает аренды."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._changed:
+            held, self._expires = list(self._expires), {}
+        self.backend.release(self.owner, held)
+
+
+def start_keeper(resources: Iterable[str], backend: str = LEASE_BACKEND,
+                 path: Optional[str] = LEASE_PATH) -> Optional[LeaseKeeper]:
+    """Запускает удержание аренд ресурсов в выбранном хранилище.
+
+    Возвращает None, если хранилище не задано и аренды не используются.
+    """
+    if not backend:
+        return None
+    if backend not in BACKENDS:
+        raise ValueError(f'Неизвестное хранилище аренд: {backend}')
+    backend_class = BACKENDS[backend]
+    keeper = LeaseKeeper(backend_class(path) if path else backend_class())
+    keeper.want(*resources)
+    keeper.start()
+    return keeper
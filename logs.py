@@ -0,0 +1,125 @@
+import atexit
+import gzip
+import logging
+import os
+import queue
+import shutil
+import sys
+from logging.handlers import (QueueHandler, QueueListener,
+                              RotatingFileHandler, TimedRotatingFileHandler)
+from typing import Optional
+
+LOG_FILE = os.getenv('LOG_FILE', 'homework_bot.log')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN')
+
+LOG_FORMAT = '%(asctime)s, %(levelname)s, %(message)s'
+COLOR_FORMAT = f'%(color)s{LOG_FORMAT}\033[0m'
+
+
+class ColorFilter(logging.Filter):
+    """Кастомыный класс для выделения сообщений разным цветом."""
+
+    COLOR = {
+        "DEBUG": "GREEN",
+        "INFO": "BLUE",
+        "WARNING": "YELLOW",
+        "ERROR": "ORANGE",
+        "CRITICAL": "RED",
+    }
+    ESCAPE = {
+        "GREEN": "\033[32m",
+        "BLUE": "\033[34m",
+        "YELLOW": "\033[33m",
+        "ORANGE": "\033[38;5;208m",
+        "RED": "\033[31m",
+    }
+
+    def filter(self, record):
+        """Устанавливает цвет сообщения."""
+        record.color = ColorFilter.ESCAPE[ColorFilter.COLOR[record.levelname]]
+        return True
+
+
+class LocalQueueHandler(QueueHandler):
+    """Кладёт запись в очередь внутри процесса без форматирования.
+
+    Стандартный QueueHandler.prepare форматирует сообщение и traceback в
+    потоке вызова, чтобы запись можно было передать в другой процесс.
+    Очереди в памяти это не нужно, поэтому всё форматирование делают
+    обработчики в потоке слушателя.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Возвращает запись без изменений."""
+        return record
+
+
+def gzip_namer(name: str) -> str:
+    """Добавляет расширение архива к имени старого файла лога."""
+    return f'{name}.gz'
+
+
+def gzip_rotator(source: str, dest: str) -> None:
+    """Сжимает файл лога при ротации."""
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def file_handler(path: str) -> logging.Handler:
+    """Создаёт файловый обработчик с ротацией и сжатием старых логов."""
+    if LOG_ROTATE_WHEN:
+        handler = TimedRotatingFileHandler(
+            path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT,
+            encoding='utf-8')
+    else:
+        handler = RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+            encoding='utf-8')
+    handler.namer = gzip_namer
+    handler.rotator = gzip_rotator
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+def stream_handler(stream=None) -> logging.Handler:
+    """Создаёт вывод в консоль, раскрашенный только для терминала."""
+    handler = logging.StreamHandler(stream)
+    if handler.stream.isatty():
+        handler.addFilter(ColorFilter())
+        handler.setFormatter(logging.Formatter(COLOR_FORMAT))
+    else:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+def setup_logging(path: Optional[str] = LOG_FILE,
+                  level: str = LOG_LEVEL) -> QueueListener:
+    """Настраивает логирование через очередь и фоновый поток записи.
+
+    Хэндлер корневого логгера только кладёт запись в очередь, а
+    форматирование, запись на диск и ротация идут в потоке слушателя.
+    """
+    handlers = [stream_handler(sys.stderr)]
+    if path:
+        handlers.append(file_handler(path))
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers,
+                             respect_handler_level=True)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(LocalQueueHandler(log_queue))
+    root.setLevel(level)
+    listener.start()
+    atexit.register(stop_listener, listener)
+    return listener
+
+
+def stop_listener(listener: QueueListener) -> None:
+    """Дописывает оставшиеся записи и останавливает слушателя."""
+    if listener._thread is not None:
+        listener.stop()
@@ -0,0 +1,295 @@
+import abc
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1, 2.5, 5, 10, 30)
+
+
+def _escape(value) -> str:
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"'
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric(abc.ABC):
+    """Базовый класс метрики с набором меток.
+
+    Значения обновляются без блокировок, чтобы наблюдение стоило меньше
+    микросекунды. Под GIL параллельные инкременты теряются лишь при
+    переключении потока посреди операции, что для метрик допустимо.
+    """
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    @abc.abstractmethod
+    def _child(self):
+        """Создаёт метрику для одного набора значений меток."""
+
+    def labels(self, *values):
+        """Возвращает метрику для заданных значений меток."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    @abc.abstractmethod
+    def _samples(self, values: tuple, child) -> list:
+        """Возвращает строки текстового формата для одного набора меток."""
+
+    def render(self) -> str:
+        """Возвращает метрику в текстовом формате Prometheus."""
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} {self.kind}']
+        for values, child in list(self._children.items()):
+            lines.extend(self._samples(values, child))
+        return '\n'.join(lines)
+
+
+class _Value:
+    __slots__ = ('value', 'function')
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self.function = None
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is not None:
+            return self.function()
+        return self.value
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def _child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        """Увеличивает счётчик без меток."""
+        self._default.value += amount
+
+    def get(self) -> float:
+        """Возвращает значение метрики без меток."""
+        return self._default.get()
+
+    def _samples(self, values: tuple, child: _Value) -> list:
+        labels = _format_labels(self.labelnames, values)
+        return [f'{self.name}{labels} {child.get()}']
+
+
+class Gauge(Counter):
+    """Значение, которое может как расти, так и уменьшаться."""
+
+    kind = 'gauge'
+
+    def set(self, value: float) -> None:
+        """Устанавливает значение метрики без меток."""
+        self._default.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Вычисляет значение метрики без меток при каждом чтении."""
+        self._default.function = function
+
+
+class _Buckets:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: tuple) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _child(self) -> _Buckets:
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Добавляет наблюдение в гистограмму без меток."""
+        self._default.observe(value)
+
+    def _samples(self, values: tuple, child: _Buckets) -> list:
+        samples = []
+        total = 0
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        for bound, count in zip(bounds, child.counts):
+            total += count
+            labels = _format_labels(self.labelnames, values, f'le="{bound}"')
+            samples.append(f'{self.name}_bucket{labels} {total}')
+        labels = _format_labels(self.labelnames, values)
+        samples.append(f'{self.name}_sum{labels} {child.sum}')
+        samples.append(f'{self.name}_count{labels} {total}')
+        return samples
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self) -> None:
+        self._metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Добавляет метрику в реестр."""
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        """Создаёт и регистрирует счётчик."""
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        """Создаёт и регистрирует gauge."""
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        """Создаёт и регистрирует гистограмму."""
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        return '\n'.join(metric.render() for metric in self._metrics) + '\n'
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram(
+    'homework_stage_seconds', 'Длительность этапов обработки', ('stage',))
+API_RESPONSES = REGISTRY.counter(
+    'homework_api_responses_total', 'Ответы API Практикума по кодам',
+    ('code',))
+ERRORS = REGISTRY.counter(
+    'homework_errors_total', 'Сбои цикла опроса по типам ошибок', ('type',))
+API_HEDGES = REGISTRY.counter(
+    'homework_api_hedges_total',
+    'Дублирующие запросы к API: отправленные и ответившие первыми',
+    ('result',))
+SEND_QUEUE_DEPTH = REGISTRY.gauge(
+    'homework_send_queue_depth', 'Сообщения в очереди отправки')
+LAST_SUCCESS = REGISTRY.gauge(
+    'homework_last_success_timestamp_seconds',
+    'Время последнего успешного опроса')
+SINCE_LAST_SUCCESS = REGISTRY.gauge(
+    'homework_seconds_since_last_success',
+    'Секунд с последнего успешного опроса')
+SINCE_LAST_SUCCESS.set_function(
+    lambda: time.time() - LAST_SUCCESS.get())
+
+
+def timed(stage: str):
+    """Декоратор, замеряющий длительность этапа обработки."""
+    buckets = STAGE_SECONDS.labels(stage)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                buckets.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+ROUTES = {
+    '/metrics': lambda: (200, 'text/plain; version=0.0.4',
+                         REGISTRY.render()),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def handler_class() -> type:
+    """Возвращает класс обработчика запросов к HTTP-серверу метрик.
+
+    http.server импортируется только при запуске сервера: без METRICS_PORT
+    он не нужен, а его импорт заметно замедляет запуск бота.
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """Отвечает на запросы по таблице маршрутов ROUTES."""
+
+        def do_GET(self):
+            """Отвечает на запрос по таблице маршрутов."""
+            route = ROUTES.get(self.path.split('?', 1)[0])
+            if route is None:
+                status, content_type, body = 404, 'text/plain', 'not found\n'
+            else:
+                status, content_type, body = route()
+            data = body.encode()
+            self.send_response(status)
+            self.send_header('Content-Type',
+                             f'{content_type}; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            """Не пишет в лог каждый запрос к метрикам."""
+
+    return MetricsHandler
+
+
+def start_server(port: int = METRICS_PORT, host: str = METRICS_HOST
+                 ) -> Optional['ThreadingHTTPServer']:
+    """Запускает HTTP-сервер метрик, если задан порт."""
+    if not port:
+        return None
+    from http.server import ThreadingHTTPServer
+    server = ThreadingHTTPServer((host, port), handler_class())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
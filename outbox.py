@@ -0,0 +1,133 @@
+import functools
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from exceptions import DontSendException
+from sinks import Notification
+from storage import StateStore
+
+OUTBOX_RETENTION = float(os.getenv('OUTBOX_RETENTION', 7 * 24 * 3600))
+
+logger = logging.getLogger(__name__)
+
+
+def digest(chat_id, record, text: str) -> bytes:
+    """Возвращает отпечаток уведомления о смене статуса работы.
+
+    В отпечаток входят чат, работа, статус и время обновления, поэтому
+    повторно обнаруженная смена статуса даёт тот же отпечаток.
+    """
+    key = '\0'.join((str(chat_id), record.key, record.status,
+                     record.date_updated, text))
+    return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+
+class Outbox:
+    """Доставляет уведомления о смене статусов ровно один раз.
+
+    Сообщения записываются в таблицу outbox той же транзакцией, что и
+    новые статусы с временной меткой, и только затем раздаются всем
+    получателям студента из sinks_for. Каждый получатель отправляет
+    сообщение независимо от остальных; доставка каждому запоминается, а
+    строка отмечается доставленной, когда сообщение получили все. При
+    запуске replay раздаёт недоставленные сообщения только тем
+    получателям, которые их ещё не получили, поэтому повторная отправка не
+    требует повторного запроса к API. Получатель сообщает и о доставке,
+    и об отказе от сообщения; после отказа сообщение остаётся
+    недоставленным до следующего replay.
+    """
+
+    def __init__(self, store: StateStore, sinks_for: Callable,
+                 retention: float = OUTBOX_RETENTION,
+                 clock=time.time) -> None:
+        self.store = store
+        self.sinks_for = sinks_for
+        self.retention = retention
+        self._clock = clock
+        self._waiting = {}
+        self._dropped = set()
+        self._lock = threading.Lock()
+
+    def commit(self, tenant: str, chat_id, timestamp: int,
+               changes: list) -> int:
+        """Сохраняет итог опроса и раздаёт новые сообщения получателям.
+
+        changes — пары (HomeworkRecord, текст сообщения). Возвращает число
+        новых сообщений: уже известные по отпечатку не отправляются. Опрос
+        без изменений лишь сдвигает метку, которую хранилище сбросит на
+        диск пачкой, не задерживая цикл опроса.
+        """
+        if not changes:
+            self.store.set_cursor(tenant, timestamp)
+            return 0
+        statuses = {record.key: record.status for record, _ in changes}
+        messages = [(digest(chat_id, record, text), chat_id, text)
+                    for record, text in changes]
+        added = self.store.commit(tenant, timestamp, statuses, messages)
+        for message_id, key, chat, text in added:
+            self._enqueue(message_id, key, tenant, chat, text)
+        return len(added)
+
+    def replay(self, tenant: Optional[str] = None) -> int:
+        """Досылает недоставленные сообщения, например после сбоя.
+
+        Если задан tenant, повторяются только сообщения этого студента.
+        """
+        count = 0
+        for row in self.store.undelivered(tenant):
+            count += self._enqueue(*row, self.store.delivered_sinks(row[0]))
+        if count:
+            logger.info('Повторно поставлено в очередь сообщений: %d', count)
+        return count
+
+    def prune(self) -> int:
+        """Удаляет доставленные сообщения старше retention секунд."""
+        return self.store.prune_delivered(self._clock() - self.retention)
+
+    def _enqueue(self, message_id: int, key: bytes, tenant: str, chat_id,
+                 text: str, done: frozenset = frozenset()) -> bool:
+        sinks = [sink for sink in self.sinks_for(tenant)
+                 if sink.name not in done]
+        with self._lock:
+            if key in self._waiting:
+                return False
+            if not sinks:
+                self.store.mark_delivered(message_id, self._clock())
+                return False
+            self._waiting[key] = {sink.name for sink in sinks}
+        notification = Notification(tenant, chat_id, text)
+        queued = 0
+        for sink in sinks:
+            try:
+                sink.put(notification,
+                         functools.partial(self._settle, message_id, key,
+                                           sink.name, True),
+                         functools.partial(self._settle, message_id, key,
+                                           sink.name, False))
+            except DontSendException as error:
+                logger.error('%s: сообщение "%s" останется в outbox до '
+                             'повторной отправки', error, text)
+                self._settle(message_id, key, sink.name, False)
+            else:
+                queued += 1
+        return queued > 0
+
+    def _settle(self, message_id: int, key: bytes, sink: str,
+                delivered: bool) -> None:
+        """Учитывает итог отправки сообщения одному получателю."""
+        with self._lock:
+            waiting = self._waiting[key]
+            waiting.discard(sink)
+            if not delivered:
+                self._dropped.add(key)
+            if not waiting and key not in self._dropped:
+                self.store.mark_delivered(message_id, self._clock())
+            elif delivered:
+                self.store.mark_sink_delivered(message_id, sink)
+            if not waiting:
+                del self._waiting[key]
+                self._dropped.discard(key)
@@ -0,0 +1,143 @@
+import logging
+import os
+import time
+from http import HTTPStatus
+from typing import Callable, NamedTuple, Optional
+
+import metrics
+from exceptions import (APIConnectionError, APITimeoutError, AuthError,
+                        CircuitOpenError, DontSendException,
+                        MalformedJSONError, SchemaError, ServerError,
+                        TelegramNetworkError, TelegramRateLimitError,
+                        UnexpectedStatusError)
+
+RETRY_ATTEMPTS = int(os.getenv('RETRY_ATTEMPTS', 2))
+RETRY_BACKOFF = float(os.getenv('RETRY_BACKOFF', 1))
+RETRY_MAX_BACKOFF = float(os.getenv('RETRY_MAX_BACKOFF', 30))
+SEND_MAX_ATTEMPTS = int(os.getenv('SEND_MAX_ATTEMPTS', 5))
+SEND_BACKOFF = float(os.getenv('SEND_BACKOFF', 1))
+SEND_MAX_BACKOFF = float(os.getenv('SEND_MAX_BACKOFF', 60))
+
+RETRIES = metrics.REGISTRY.counter(
+    'homework_retries_total', 'Повторы запросов по типу ошибки', ('error',))
+
+logger = logging.getLogger(__name__)
+
+
+class Policy(NamedTuple):
+    """Как поступать с ошибкой одного класса.
+
+    attempts — сколько раз сразу повторить вызов, backoff — пауза перед
+    первым повтором (дальше она удваивается до max_backoff), notify —
+    сообщать ли об ошибке в Телеграм, stop — прекратить опрос студента.
+    """
+
+    attempts: int = 0
+    backoff: float = 0
+    notify: bool = True
+    stop: bool = False
+    max_backoff: float = RETRY_MAX_BACKOFF
+
+    def delay(self, attempt: int, error: Exception) -> float:
+        """Возвращает паузу перед повтором с номером attempt."""
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return retry_after
+        return min(self.backoff * 2 ** attempt, self.max_backoff)
+
+
+TRANSIENT = Policy(attempts=RETRY_ATTEMPTS, backoff=RETRY_BACKOFF)
+SILENT = Policy(notify=False)
+DEFAULT = Policy()
+
+POLICIES = {
+    APITimeoutError: TRANSIENT,
+    APIConnectionError: TRANSIENT,
+    ServerError: Policy(attempts=RETRY_ATTEMPTS, backoff=2 * RETRY_BACKOFF),
+    MalformedJSONError: Policy(attempts=1, backoff=RETRY_BACKOFF),
+    AuthError: Policy(stop=True),
+    UnexpectedStatusError: DEFAULT,
+    SchemaError: DEFAULT,
+    TelegramRateLimitError: Policy(attempts=SEND_MAX_ATTEMPTS - 1,
+                                   notify=False),
+    TelegramNetworkError: Policy(attempts=SEND_MAX_ATTEMPTS - 1,
+                                 backoff=SEND_BACKOFF, notify=False,
+                                 max_backoff=SEND_MAX_BACKOFF),
+    CircuitOpenError: SILENT,
+    DontSendException: SILENT,
+}
+
+STATUS_ERRORS = {
+    HTTPStatus.UNAUTHORIZED: AuthError,
+    HTTPStatus.FORBIDDEN: AuthError,
+    HTTPStatus.REQUEST_TIMEOUT: ServerError,
+    HTTPStatus.TOO_MANY_REQUESTS: ServerError,
+}
+
+
+def status_error(status: int) -> type:
+    """Возвращает класс ошибки для кода ответа API."""
+    if status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+        return ServerError
+    return STATUS_ERRORS.get(status, UnexpectedStatusError)
+
+
+def policy_for(error: Exception) -> Policy:
+    """Возвращает политику для ближайшего класса ошибки из POLICIES."""
+    for cls in type(error).__mro__:
+        policy = POLICIES.get(cls)
+        if policy is not None:
+            return policy
+    return DEFAULT
+
+
+def retrying(func: Callable, *args, sleep=time.sleep,
+             deadline: Optional[float] = None, clock=time.monotonic,
+             **kwargs):
+    """Вызывает func, сразу повторяя временные ошибки по их политике.
+
+    Если задан deadline, срок в секундах отсчитывается один раз на все
+    попытки: func получает оставшееся время аргументом deadline, а повтор,
+    который не успеет начаться до срока, не выполняется.
+    """
+    end = None if deadline is None else clock() + deadline
+    attempt = 0
+    while True:
+        if end is not None:
+            kwargs['deadline'] = end - clock()
+        try:
+            return func(*args, **kwargs)
+        except Exception as error:
+            policy = policy_for(error)
+            if attempt >= policy.attempts:
+                raise
+            delay = policy.delay(attempt, error)
+            if end is not None and clock() + delay >= end:
+                raise
+            RETRIES.labels(type(error).__name__).inc()
+            logger.warning('%s: %s, повтор через %s с',
+                           type(error).__name__, error, delay)
+            sleep(delay)
+            attempt += 1
+
+
+def report_error(error: Exception, notifier, notify: Callable[[str], None],
+                 tenant: str = '') -> Policy:
+    """Учитывает сбой опроса по политике его класса.
+
+    Пишет ошибку в лог и метрики и, если политика велит, отправляет
+    сообщение через notify с подавлением повторов. Возвращает политику.
+    """
+    policy = policy_for(error)
+    metrics.ERRORS.labels(type(error).__name__).inc()
+    message = f'Сбой в работе программы: {error}'
+    prefix = f'{tenant}: ' if tenant else ''
+    logger.error('%s%s', prefix, message, exc_info=error)
+    if policy.notify and notifier.should_notify(error, tenant):
+        try:
+            notify(message)
+        except DontSendException:
+            logger.exception('%sне удалось сообщить об ошибке', prefix)
+    if policy.stop:
+        logger.critical('%sопрос остановлен: %s', prefix, error)
+    return policy
@@ -0,0 +1,155 @@
+import logging
+import os
+import signal
+import time
+from typing import Optional
+
+import metrics
+
+PROFILE = os.getenv('PROFILE', '')
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_CPU_EVERY = int(os.getenv('PROFILE_CPU_EVERY', 10))
+PROFILE_MEMORY_EVERY = int(os.getenv('PROFILE_MEMORY_EVERY', 10))
+PROFILE_TOP = int(os.getenv('PROFILE_TOP', 15))
+PROFILE_SIGNAL = getattr(signal, 'SIGUSR2', None)
+MODES = ('cpu', 'memory')
+
+logger = logging.getLogger(__name__)
+
+
+def parse_modes(value: str) -> set:
+    """Разбирает режимы профилирования из строки вида "cpu,memory"."""
+    modes = {mode.strip() for mode in value.split(',') if mode.strip()}
+    unknown = modes - set(MODES)
+    if unknown:
+        raise ValueError(f'Неизвестный режим профилирования: {unknown}')
+    return modes
+
+
+class Profiler:
+    """Профилирует цикл опроса по сигналу или переменной PROFILE.
+
+    Режим cpu собирает cProfile и раз в cpu_every циклов пишет профиль в
+    directory, режим memory раз в memory_every циклов снимает снимок
+    tracemalloc и пишет разницу с предыдущим. Пока профилирование
+    выключено, tick только проверяет флаг, а cProfile и tracemalloc не
+    импортируются. Сигнал SIGUSR2 включает и выключает профилирование без
+    перезапуска; переключение выполняется в потоке цикла при следующем tick.
+
+    cProfile видит только поток, вызывающий tick. В PollingEngine это поток
+    цикла событий: запросы к API и разбор ответов в пуле потоков в профиль
+    не попадают, их длительность видна в homework_stage_seconds.
+    """
+
+    def __init__(self, modes: str = PROFILE, directory: str = PROFILE_DIR,
+                 cpu_every: int = PROFILE_CPU_EVERY,
+                 memory_every: int = PROFILE_MEMORY_EVERY,
+                 top: int = PROFILE_TOP) -> None:
+        selected = parse_modes(modes)
+        self.modes = selected or set(MODES)
+        self.enabled = bool(selected)
+        self.directory = directory
+        self.cpu_every = cpu_every
+        self.memory_every = memory_every
+        self.top = top
+        self._active = set()
+        self._cycles = 0
+        self._profile = None
+        self._snapshot = None
+
+    def toggle(self, *args) -> None:
+        """Включает или выключает профилирование. Годится для сигнала."""
+        self.enabled = not self.enabled
+
+    def install(self) -> None:
+        """Переключает профилирование по SIGUSR2 и публикует /profile."""
+        if PROFILE_SIGNAL is not None:
+            signal.signal(PROFILE_SIGNAL, self.toggle)
+        metrics.ROUTES['/profile'] = lambda: (200, 'text/plain',
+                                              self.describe())
+
+    def describe(self) -> str:
+        """Возвращает состояние профилирования одной строкой."""
+        state = ','.join(sorted(self._active)) or 'off'
+        return f'{state} {self._cycles}\n'
+
+    def tick(self) -> None:
+        """Отмечает конец цикла опроса. Без профилирования ничего не делает."""
+        if self.enabled != bool(self._active):
+            self._switch()
+        if not self._active:
+            return
+        self._cycles += 1
+        if 'cpu' in self._active and self._cycles % self.cpu_every == 0:
+            self.dump_cpu()
+        if ('memory' in self._active
+                and self._cycles % self.memory_every == 0):
+            self.dump_memory()
+
+    def _switch(self) -> None:
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            self._active = set(self.modes)
+            if 'cpu' in self._active:
+                self._start_cpu()
+            if 'memory' in self._active:
+                import tracemalloc
+                tracemalloc.start()
+            logger.info('Профилирование включено: %s',
+                        ', '.join(sorted(self._active)))
+            return
+        if self._profile is not None:
+            self.dump_cpu(restart=False)
+        if 'memory' in self._active:
+            import tracemalloc
+            tracemalloc.stop()
+            self._snapshot = None
+        self._active = set()
+        self._cycles = 0
+        logger.info('Профилирование выключено')
+
+    def _start_cpu(self) -> None:
+        import cProfile
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def _path(self, kind: str, suffix: str) -> str:
+        name = f'{kind}-{time.strftime("%Y%m%d-%H%M%S")}-{self._cycles}'
+        return os.path.join(self.directory, name + suffix)
+
+    def dump_cpu(self, restart: bool = True) -> Optional[str]:
+        """Пишет накопленный профиль cProfile и начинает новый."""
+        import io
+        import pstats
+        if self._profile is None:
+            return None
+        self._profile.disable()
+        path = self._path('cpu', '.prof')
+        self._profile.dump_stats(path)
+        text = io.StringIO()
+        pstats.Stats(self._profile, stream=text).sort_stats(
+            'cumulative').print_stats(self.top)
+        logger.info('Профиль CPU записан в %s\n%s', path, text.getvalue())
+        self._profile = None
+        if restart:
+            self._start_cpu()
+        return path
+
+    def dump_memory(self) -> Optional[str]:
+        """Снимает снимок памяти и пишет рост с предыдущего снимка."""
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),))
+        previous, self._snapshot = self._snapshot, snapshot
+        if previous is None:
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f'Память: {current / 1024:.0f} КиБ, '
+                 f'пик {peak / 1024:.0f} КиБ']
+        lines.extend(str(stat) for stat in
+                     snapshot.compare_to(previous, 'lineno')[:self.top])
+        path = self._path('memory', '.txt')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        logger.info('Рост памяти записан в %s\n%s', path, '\n'.join(lines))
+        return path
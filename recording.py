@@ -0,0 +1,243 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import requests
+    import telegram
+
+RECORD_FILE = os.getenv('RECORD_FILE')
+REPLAY_FILE = os.getenv('REPLAY_FILE')
+REPLAY_SPEED = float(os.getenv('REPLAY_SPEED', 1))
+RECORDED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+def tenant_key(headers: Optional[dict]) -> str:
+    """Возвращает обезличенный ключ студента по заголовку авторизации."""
+    token = (headers or {}).get('Authorization', '')
+    return hashlib.blake2b(token.encode(), digest_size=6).hexdigest()
+
+
+class Recorder:
+    """Дописывает запросы к API и Телеграм с таймингами в NDJSON-файл.
+
+    Каждая строка — одно событие: смещение от начала записи t, длительность
+    duration и ответ или ошибка. Токен авторизации не сохраняется, вместо
+    него пишется его хеш.
+    """
+
+    def __init__(self, path: str, clock=time.monotonic) -> None:
+        self._file = open(path, 'a', encoding='utf-8')
+        self._clock = clock
+        self._start = clock()
+        self._lock = threading.Lock()
+
+    def write(self, event: dict) -> None:
+        """Дописывает событие в файл."""
+        line = json.dumps(event, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def get(self, get, url: str, **kwargs) -> 'requests.Response':
+        """Выполняет GET-запрос через get и записывает его."""
+        import requests
+        start = self._clock()
+        event = {
+            'kind': 'http', 't': round(start - self._start, 6), 'url': url,
+            'tenant': tenant_key(kwargs.get('headers')),
+            'params': kwargs.get('params'),
+        }
+        try:
+            response = get(url, **kwargs)
+        except requests.RequestException as error:
+            event.update(duration=round(self._clock() - start, 6),
+                         error=type(error).__name__, message=str(error))
+            self.write(event)
+            raise
+        event.update(
+            duration=round(self._clock() - start, 6),
+            status=response.status_code, reason=response.reason,
+            headers={name: response.headers[name]
+                     for name in RECORDED_HEADERS if name in response.headers},
+            body=response.content.decode('utf-8', 'replace'))
+        self.write(event)
+        return response
+
+    def bot(self, bot: 'telegram.Bot') -> 'RecordingBot':
+        """Оборачивает бота, чтобы записывать отправку сообщений."""
+        return RecordingBot(bot, self)
+
+    def close(self) -> None:
+        """Закрывает файл записи."""
+        with self._lock:
+            self._file.close()
+
+
+class RecordingBot:
+    """Бот, записывающий каждый вызов send_message."""
+
+    def __init__(self, bot: 'telegram.Bot', recorder: Recorder) -> None:
+        self._bot = bot
+        self._recorder = recorder
+
+    def __getattr__(self, name: str):
+        """Передаёт остальные атрибуты настоящему боту."""
+        return getattr(self._bot, name)
+
+    def send_message(self, chat_id, text: str, **kwargs):
+        """Отправляет сообщение и записывает результат."""
+        import botapi
+        recorder = self._recorder
+        start = recorder._clock()
+        event = {'kind': 'telegram', 't': round(start - recorder._start, 6),
+                 'chat_id': str(chat_id), 'text': text}
+        try:
+            result = self._bot.send_message(chat_id=chat_id, text=text,
+                                            **kwargs)
+        except botapi.errors().TelegramError as error:
+            event.update(duration=round(recorder._clock() - start, 6),
+                         error=type(error).__name__, message=error.message,
+                         retry_after=getattr(error, 'retry_after', None))
+            recorder.write(event)
+            raise
+        event['duration'] = round(recorder._clock() - start, 6)
+        recorder.write(event)
+        return result
+
+
+def load(path: str) -> list:
+    """Читает события из файла записи."""
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+class Player:
+    """Отвечает на запросы бота записанными ответами.
+
+    Задержки ответов воспроизводятся с ускорением speed (0 — без задержек).
+    Ответы API выдаются по порядку для того же студента; если студента в
+    записи нет, выдаётся следующий по порядку ещё не выданный ответ.
+    Токены в записи не хранятся, поэтому запрос от имени записанного
+    студента подписывается заголовками из headers.
+    """
+
+    def __init__(self, events: list, speed: float = REPLAY_SPEED,
+                 sleep=time.sleep) -> None:
+        self.speed = speed
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.http = [event for event in events if event['kind'] == 'http']
+        self._served = [False] * len(self.http)
+        self._next = 0
+        self._by_tenant = defaultdict(deque)
+        self._aliases = {}
+        for index, event in enumerate(self.http):
+            self._by_tenant[event['tenant']].append(index)
+        self._telegram = defaultdict(deque)
+        for event in events:
+            if event['kind'] == 'telegram':
+                self._telegram[event['chat_id']].append(event)
+
+    def wait(self, event: dict) -> None:
+        """Выдерживает записанную длительность с учётом ускорения."""
+        if self.speed > 0:
+            self._sleep(event['duration'] / self.speed)
+
+    def headers(self, tenant: str) -> dict:
+        """Возвращает заголовки запроса от имени студента из записи.
+
+        tenant — ключ студента из поля tenant записанного события.
+        """
+        headers = {'Authorization': f'OAuth replay-{tenant}'}
+        with self._lock:
+            self._aliases[tenant_key(headers)] = tenant
+        return headers
+
+    def _take_http(self, tenant: str) -> dict:
+        with self._lock:
+            indexes = self._by_tenant.get(tenant)
+            while indexes and self._served[indexes[0]]:
+                indexes.popleft()
+            if indexes:
+                index = indexes.popleft()
+            else:
+                while (self._next < len(self.http)
+                       and self._served[self._next]):
+                    self._next += 1
+                if self._next == len(self.http):
+                    raise LookupError('Записанные ответы API закончились')
+                index = self._next
+            self._served[index] = True
+            return self.http[index]
+
+    def get(self, url: str, **kwargs) -> 'requests.Response':
+        """Возвращает записанный ответ на GET-запрос."""
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        key = tenant_key(kwargs.get('headers'))
+        event = self._take_http(self._aliases.get(key, key))
+        self.wait(event)
+        if 'error' in event:
+            error_class = getattr(requests.exceptions, event['error'],
+                                  requests.ConnectionError)
+            raise error_class(event['message'])
+        response = requests.Response()
+        response.url = url
+        response.status_code = event['status']
+        response.reason = event['reason']
+        response.headers = CaseInsensitiveDict(event['headers'])
+        response._content = event['body'].encode()
+        response.encoding = 'utf-8'
+        return response
+
+    def bot(self, token: str) -> 'ReplayBot':
+        """Возвращает бота, отвечающего записанными результатами."""
+        return ReplayBot(self)
+
+    def telegram_event(self, chat_id) -> Optional[dict]:
+        """Возвращает следующий записанный вызов для чата."""
+        with self._lock:
+            events = self._telegram.get(str(chat_id))
+            return events.popleft() if events else None
+
+
+class ReplayBot:
+    """Бот, воспроизводящий записанные задержки и ошибки Телеграма."""
+
+    def __init__(self, player: Player) -> None:
+        self._player = player
+
+    def send_message(self, chat_id, text: str, **kwargs) -> None:
+        """Воспроизводит отправку сообщения в чат."""
+        import botapi
+        errors = botapi.errors()
+        event = self._player.telegram_event(chat_id)
+        if event is None:
+            return
+        self._player.wait(event)
+        if 'error' not in event:
+            return
+        error_class = getattr(errors, event['error'], errors.NetworkError)
+        if issubclass(error_class, errors.RetryAfter):
+            raise error_class(event['retry_after'])
+        if issubclass(error_class, errors.TimedOut):
+            raise error_class()
+        raise error_class(event['message'])
+
+
+@functools.lru_cache(maxsize=None)
+def recorder() -> Optional[Recorder]:
+    """Возвращает запись трафика, если задан RECORD_FILE."""
+    return Recorder(RECORD_FILE) if RECORD_FILE else None
+
+
+@functools.lru_cache(maxsize=None)
+def player() -> Optional[Player]:
+    """Возвращает воспроизведение трафика, если задан REPLAY_FILE."""
+    return Player(load(REPLAY_FILE)) if REPLAY_FILE else None
@@ -0,0 +1,74 @@
+import os
+import random
+import time
+from typing import Optional
+
+POLL_MAX_INTERVAL = float(os.getenv('POLL_MAX_INTERVAL', 1800))
+POLL_IDLE_GROWTH = float(os.getenv('POLL_IDLE_GROWTH', 1.25))
+POLL_JITTER = float(os.getenv('POLL_JITTER', 0.1))
+POLL_ERROR_BACKOFF = float(os.getenv('POLL_ERROR_BACKOFF', 5))
+
+
+class PollScheduler:
+    """Планирует моменты опроса API.
+
+    Моменты опроса отсчитываются от предыдущего дедлайна, а не от конца
+    запроса, поэтому период не плывёт. Пока новых статусов нет, интервал
+    растёт от min_interval до max_interval, при изменениях сбрасывается.
+    После ошибки повтор идёт через error_backoff секунд с удвоением,
+    но не дольше max_error_backoff. Ко всем интервалам добавляется
+    случайный разброс ±jitter, чтобы боты не опрашивали API синхронно.
+    """
+
+    def __init__(self, min_interval: float,
+                 max_interval: float = POLL_MAX_INTERVAL,
+                 growth: float = POLL_IDLE_GROWTH,
+                 jitter: float = POLL_JITTER,
+                 error_backoff: float = POLL_ERROR_BACKOFF,
+                 max_error_backoff: Optional[float] = None,
+                 clock=time.monotonic, rng=random.uniform) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.growth = growth
+        self.jitter = jitter
+        self.error_backoff = error_backoff
+        self.max_error_backoff = (min_interval if max_error_backoff is None
+                                  else max_error_backoff)
+        self.interval = min_interval
+        self.errors = 0
+        self._clock = clock
+        self._rng = rng
+        self.deadline = clock()
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + self._rng(-self.jitter, self.jitter))
+
+    def _set_deadline(self, deadline: float) -> None:
+        self.deadline = max(deadline, self._clock())
+
+    def success(self, active: bool = False) -> None:
+        """Учитывает удачный опрос; active — были ли новые статусы."""
+        if self.errors:
+            self.errors = 0
+            self.deadline = self._clock()
+        if active:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.growth,
+                                self.max_interval)
+        self._set_deadline(self.deadline + self._jittered(self.interval))
+
+    def failure(self) -> None:
+        """Учитывает неудачный опрос и откладывает повтор с backoff."""
+        delay = min(self.error_backoff * 2 ** self.errors,
+                    self.max_error_backoff)
+        self.errors += 1
+        self._set_deadline(self._clock() + self._jittered(delay))
+
+    def delay(self) -> float:
+        """Возвращает число секунд до следующего опроса."""
+        return max(self.deadline - self._clock(), 0)
+
+    def wait(self) -> None:
+        """Ждёт наступления следующего опроса."""
+        time.sleep(self.delay())
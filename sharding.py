@@ -0,0 +1,185 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+import homework
+import metrics
+from delivery import SendQueue
+from engine import (TENANTS_FILE, PollingEngine, load_tenants,
+                    tenant_extra_sinks)
+from history import HistoryStore
+from lease import start_keeper
+from logs import LOG_FILE, setup_logging
+from storage import StateStore
+
+SHARD_WORKERS = int(os.getenv('SHARD_WORKERS', os.cpu_count() or 1))
+SHARD_VNODES = int(os.getenv('SHARD_VNODES', 128))
+HEALTH_INTERVAL = float(os.getenv('HEALTH_INTERVAL', 30))
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Кольцо консистентного хеширования.
+
+    Каждый узел занимает vnodes точек на кольце, ключ достаётся ближайшему
+    по часовой стрелке узлу. При добавлении или удалении одного из N узлов
+    переезжает лишь около 1/N ключей.
+    """
+
+    def __init__(self, nodes=(), vnodes: int = SHARD_VNODES) -> None:
+        self.vnodes = vnodes
+        self._points = []
+        self._owners = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        """Добавляет узел на кольцо."""
+        for replica in range(self.vnodes):
+            point = _hash(f'{node}#{replica}')
+            bisect.insort(self._points, point)
+            self._owners[point] = node
+
+    def remove(self, node: str) -> None:
+        """Убирает узел с кольца."""
+        for replica in range(self.vnodes):
+            point = _hash(f'{node}#{replica}')
+            self._points.remove(point)
+            del self._owners[point]
+
+    def node_for(self, key: str) -> str:
+        """Возвращает узел, которому принадлежит ключ."""
+        if not self._points:
+            raise LookupError('На кольце нет ни одного узла')
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+
+def worker_name(index: int) -> str:
+    """Возвращает имя обработчика с заданным номером."""
+    return f'worker-{index}'
+
+
+def assign(tenants: list, workers: int) -> dict:
+    """Распределяет студентов по обработчикам."""
+    ring = HashRing(worker_name(index) for index in range(workers))
+    shards = {worker_name(index): [] for index in range(workers)}
+    for tenant in tenants:
+        shards[ring.node_for(tenant.name)].append(tenant)
+    return shards
+
+
+async def report_health(name: str, polling: PollingEngine,
+                        health: multiprocessing.Queue) -> None:
+    """Периодически отправляет состояние обработчика родителю."""
+    while True:
+        health.put({
+            'worker': name,
+            'pid': os.getpid(),
+            'tenants': len(polling.tenants),
+            'last_success': metrics.LAST_SUCCESS.get(),
+            'send_queue': len(polling.outbound),
+            'time': time.time(),
+        })
+        await asyncio.sleep(HEALTH_INTERVAL)
+
+
+async def serve(name: str, polling: PollingEngine,
+                health: multiprocessing.Queue) -> None:
+    """Опрашивает студентов шарда и сообщает о своём состоянии."""
+    await asyncio.gather(polling.run(), report_health(name, polling, health))
+
+
+def run_worker(index: int, tenants: list,
+               health: multiprocessing.Queue) -> None:
+    """Точка входа процесса-обработчика."""
+    name = worker_name(index)
+    setup_logging(f'{LOG_FILE}.{name}' if LOG_FILE else None)
+    if metrics.METRICS_PORT:
+        metrics.start_server(metrics.METRICS_PORT + index + 1)
+    store = StateStore()
+    store.start()
+    leases = start_keeper(tenant.name for tenant in tenants)
+    outbound = SendQueue()
+    polling = PollingEngine(tenants, store=store, leases=leases,
+                            outbound=outbound,
+                            extra_sinks=tenant_extra_sinks(tenants, outbound),
+                            history=HistoryStore())
+    metrics.SEND_QUEUE_DEPTH.set_function(lambda: len(polling.outbound))
+    polling.profiler.directory = os.path.join(polling.profiler.directory,
+                                              name)
+    polling.profiler.install()
+    polling.watchdog.start()
+    logger.info('%s: опрос %d студентов', name, len(tenants))
+    asyncio.run(serve(name, polling, health))
+
+
+class Supervisor:
+    """Запускает обработчики, следит за их состоянием и перезапускает."""
+
+    def __init__(self, tenants: list, workers: int = SHARD_WORKERS) -> None:
+        self.shards = assign(tenants, workers)
+        self.health = multiprocessing.Queue()
+        self.processes = {}
+        self.last_report = {}
+
+    def start(self, index: int) -> None:
+        """Запускает обработчик с заданным номером."""
+        name = worker_name(index)
+        process = multiprocessing.Process(
+            target=run_worker, name=name, daemon=True,
+            args=(index, self.shards[name], self.health))
+        process.start()
+        self.processes[index] = process
+
+    def check(self) -> None:
+        """Перезапускает упавшие обработчики."""
+        for index, process in list(self.processes.items()):
+            if not process.is_alive():
+                logger.error('%s завершился с кодом %s, перезапуск',
+                             process.name, process.exitcode)
+                self.start(index)
+
+    def run(self) -> None:
+        """Запускает все обработчики и следит за ними."""
+        for index in range(len(self.shards)):
+            self.start(index)
+        while True:
+            try:
+                report = self.health.get(timeout=HEALTH_INTERVAL)
+            except queue.Empty:
+                pass
+            else:
+                self.last_report[report['worker']] = report
+                logger.debug('Состояние обработчика: %s', report)
+            self.check()
+
+
+def main() -> None:
+    """Запускает опрос студентов в нескольких процессах."""
+    setup_logging()
+    tenants = load_tenants(TENANTS_FILE)
+    if not all(tenant.telegram_token or homework.TELEGRAM_TOKEN
+               for tenant in tenants):
+        no_tokens_message = 'Отсутствует нужный токен в переменных окружения'
+        logger.critical(no_tokens_message)
+        sys.exit(no_tokens_message)
+    logger.info('Запуск %d обработчиков для %d студентов',
+                SHARD_WORKERS, len(tenants))
+    Supervisor(tenants).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+import logging
+import os
+import queue
+import threading
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+import metrics
+import transport
+from delivery import SendQueue
+from exceptions import DontSendException
+from policy import SEND_MAX_BACKOFF
+
+if TYPE_CHECKING:
+    import telegram
+
+MENTOR_CHAT_ID = os.getenv('MENTOR_CHAT_ID')
+MENTOR_SEND_TIMEOUT = float(os.getenv('MENTOR_SEND_TIMEOUT', 10))
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_TIMEOUT = float(os.getenv('WEBHOOK_TIMEOUT', 5))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', 5))
+WEBHOOK_BACKOFF = float(os.getenv('WEBHOOK_BACKOFF', 1))
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', 1000))
+WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', 2))
+
+SINK_MESSAGES = metrics.REGISTRY.counter(
+    'homework_sink_messages_total', 'Уведомления по получателям и итогу',
+    ('sink', 'result'))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Notification:
+    """Уведомление о смене статуса для рассылки получателям."""
+
+    tenant: str
+    chat_id: Any
+    text: str
+
+
+class TelegramSink:
+    """Отправляет уведомления в чат Телеграм через очередь SendQueue.
+
+    Без chat_id сообщение уходит в чат студента из уведомления. Если очередь
+    не передана, получатель создаёт собственную и управляет ею в start и
+    stop. Получатели с одним ботом должны делить очередь: общий лимит
+    Телеграма действует на бота, а не на очередь. timeout задаёт таймаут
+    отправки сообщений этого получателя.
+    """
+
+    def __init__(self, bot: 'telegram.Bot', chat_id=None,
+                 queue: Optional[SendQueue] = None, name: str = 'telegram',
+                 timeout: Optional[float] = None) -> None:
+        self.name = name
+        self.bot = bot
+        self.chat_id = chat_id
+        self.timeout = timeout
+        self._owns_queue = queue is None
+        self.queue = SendQueue() if queue is None else queue
+
+    def put(self, notification: Notification,
+            on_delivered: Optional[Callable[[], None]] = None,
+            on_failed: Optional[Callable[[], None]] = None) -> None:
+        """Ставит уведомление в очередь отправки, не дожидаясь её."""
+        def delivered():
+            SINK_MESSAGES.labels(self.name, 'delivered').inc()
+            if on_delivered is not None:
+                on_delivered()
+
+        def failed():
+            SINK_MESSAGES.labels(self.name, 'failed').inc()
+            if on_failed is not None:
+                on_failed()
+
+        try:
+            self.queue.put(self.bot, self.chat_id or notification.chat_id,
+                           notification.text, delivered, failed, self.timeout)
+        except DontSendException:
+            SINK_MESSAGES.labels(self.name, 'dropped').inc()
+            raise
+
+    def start(self) -> None:
+        """Запускает собственную очередь отправки."""
+        if self._owns_queue:
+            self.queue.start()
+
+    def stop(self) -> None:
+        """Останавливает собственную очередь отправки."""
+        if self._owns_queue:
+            self.queue.stop()
+
+
+class WebhookSink:
+    """Отправляет уведомления POST-запросом с JSON на заданный адрес.
+
+    У получателя своя ограниченная очередь и свои потоки: повторы с растущей
+    паузой и медленный сервер задерживают только его. Если очередь
+    заполнена, put бросает DontSendException.
+    """
+
+    def __init__(self, url: str, name: str = 'webhook',
+                 timeout: float = WEBHOOK_TIMEOUT,
+                 max_attempts: int = WEBHOOK_MAX_ATTEMPTS,
+                 backoff: float = WEBHOOK_BACKOFF,
+                 maxsize: int = WEBHOOK_QUEUE_SIZE,
+                 workers: int = WEBHOOK_WORKERS) -> None:
+        self.name = name
+        self.url = url
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.workers = workers
+        self._queue = queue.Queue(maxsize)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def __len__(self) -> int:
+        """Число уведомлений в очереди."""
+        return self._queue.qsize()
+
+    def put(self, notification: Notification,
+            on_delivered: Optional[Callable[[], None]] = None,
+            on_failed: Optional[Callable[[], None]] = None) -> None:
+        """Ставит уведомление в очередь, не дожидаясь отправки."""
+        try:
+            self._queue.put_nowait((notification, on_delivered, on_failed))
+        except queue.Full:
+            SINK_MESSAGES.labels(self.name, 'dropped').inc()
+            raise DontSendException(
+                f'Очередь получателя {self.name} переполнена')
+
+    def send(self, notification: Notification) -> None:
+        """Отправляет одно уведомление."""
+        response = transport.post(self.url, json=asdict(notification),
+                                  timeout=self.timeout)
+        response.raise_for_status()
+
+    def _deliver(self, notification: Notification) -> bool:
+        for attempt in range(self.max_attempts):
+            try:
+                self.send(notification)
+            except Exception as error:
+                delay = min(self.backoff * 2 ** attempt, SEND_MAX_BACKOFF)
+                logger.warning('%s: ошибка отправки: %s, повтор через %s с',
+                               self.name, error, delay)
+                if self._stop.wait(delay):
+                    return False
+            else:
+                return True
+        return False
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            notification, on_delivered, on_failed = item
+            if self._deliver(notification):
+                SINK_MESSAGES.labels(self.name, 'delivered').inc()
+                if on_delivered is not None:
+                    on_delivered()
+            else:
+                SINK_MESSAGES.labels(self.name, 'failed').inc()
+                logger.error('%s: уведомление "%s" не доставлено',
+                             self.name, notification.text)
+                if on_failed is not None:
+                    on_failed()
+
+    def start(self) -> None:
+        """Запускает фоновые потоки отправки."""
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Останавливает потоки отправки."""
+        self._stop.set()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+def start_extra_sinks(bot: 'telegram.Bot',
+                      queue: Optional[SendQueue] = None) -> list:
+    """Создаёт и запускает получателей, кроме чата студента.
+
+    Группа наставников добавляется, если задан MENTOR_CHAT_ID, webhook —
+    если задан WEBHOOK_URL. queue — очередь отправки студентам тем же
+    ботом: через неё идут и сообщения наставникам.
+    """
+    sinks = []
+    if MENTOR_CHAT_ID:
+        sinks.append(TelegramSink(bot, MENTOR_CHAT_ID, queue=queue,
+                                  name='mentors',
+                                  timeout=MENTOR_SEND_TIMEOUT))
+    if WEBHOOK_URL:
+        sinks.append(WebhookSink(WEBHOOK_URL))
+    for sink in sinks:
+        sink.start()
+    return sinks
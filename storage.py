@@ -0,0 +1,232 @@
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+STATE_DB = os.getenv('STATE_DB', 'homework_bot.db')
+STATE_FLUSH_INTERVAL = float(os.getenv('STATE_FLUSH_INTERVAL', 1))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cursors (
+    tenant TEXT PRIMARY KEY,
+    timestamp INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS statuses (
+    tenant TEXT NOT NULL,
+    homework TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (tenant, homework)
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    digest BLOB NOT NULL UNIQUE,
+    tenant TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    delivered_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (id)
+    WHERE delivered_at IS NULL;
+CREATE TABLE IF NOT EXISTS deliveries (
+    message_id INTEGER NOT NULL,
+    sink TEXT NOT NULL,
+    PRIMARY KEY (message_id, sink)
+);
+'''
+
+logger = logging.getLogger(__name__)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Открывает базу SQLite в режиме WAL."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+class StateStore:
+    """Хранит временную метку опроса и последние статусы работ на диске.
+
+    Чтение идёт из памяти, а записи копятся и сбрасываются в базу одной
+    транзакцией раз в flush_interval секунд, поэтому опрос не ждёт диска.
+    Итог опроса с новыми статусами записывается сразу методом commit
+    вместе с исходящими сообщениями.
+    """
+
+    def __init__(self, path: str = STATE_DB,
+                 flush_interval: float = STATE_FLUSH_INTERVAL) -> None:
+        self.flush_interval = flush_interval
+        self._conn = connect(path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._cursors = dict(
+            self._conn.execute('SELECT tenant, timestamp FROM cursors'))
+        self._statuses = {}
+        for tenant, homework, status in self._conn.execute(
+                'SELECT tenant, homework, status FROM statuses'):
+            self._statuses.setdefault(tenant, {})[homework] = status
+        self._dirty_cursors = {}
+        self._dirty_statuses = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get_cursor(self, tenant: str,
+                   default: Optional[int] = None) -> Optional[int]:
+        """Возвращает сохранённую временную метку опроса."""
+        return self._cursors.get(tenant, default)
+
+    def set_cursor(self, tenant: str, timestamp: int) -> None:
+        """Запоминает временную метку опроса."""
+        with self._lock:
+            self._cursors[tenant] = timestamp
+            self._dirty_cursors[tenant] = timestamp
+
+    def get_status(self, tenant: str, homework: str) -> Optional[str]:
+        """Возвращает последний известный статус работы."""
+        return self._statuses.get(tenant, {}).get(homework)
+
+    def statuses(self, tenant: str) -> dict:
+        """Возвращает последние известные статусы всех работ студента."""
+        return self._statuses.setdefault(tenant, {})
+
+    def set_status(self, tenant: str, homework: str, status: str) -> None:
+        """Запоминает последний статус работы."""
+        with self._lock:
+            self._statuses.setdefault(tenant, {})[homework] = status
+            self._dirty_statuses[(tenant, homework)] = status
+
+    def load(self, tenant: str) -> None:
+        """Перечитывает из базы состояние студента.
+
+        Нужно, когда опрос студента переходит от другого экземпляра бота.
+        """
+        self.flush()
+        with self._db_lock, self._lock:
+            for (timestamp,) in self._conn.execute(
+                    'SELECT timestamp FROM cursors WHERE tenant = ?',
+                    (tenant,)):
+                self._cursors[tenant] = timestamp
+            self._statuses[tenant] = dict(self._conn.execute(
+                'SELECT homework, status FROM statuses WHERE tenant = ?',
+                (tenant,)))
+
+    def commit(self, tenant: str, timestamp: int, statuses: dict,
+               messages: list) -> list:
+        """Сразу записывает итог опроса одной транзакцией.
+
+        Новые статусы работ, временная метка и сообщения о них (кортежи
+        digest, chat_id, text) попадают в базу вместе, поэтому после сбоя
+        не бывает ни сдвинутой метки без сообщений, ни сообщений без
+        сдвинутой метки. Сообщения с уже известным digest пропускаются.
+        Возвращает добавленные сообщения в виде (id, digest, chat_id, text).
+        """
+        added = []
+        with self._db_lock, self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO cursors VALUES (?, ?)',
+                               (tenant, timestamp))
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO statuses VALUES (?, ?, ?)',
+                ((tenant, homework, status)
+                 for homework, status in statuses.items()))
+            for digest, chat_id, text in messages:
+                cursor = self._conn.execute(
+                    'INSERT INTO outbox (digest, tenant, chat_id, text) '
+                    'VALUES (?, ?, ?, ?) ON CONFLICT (digest) DO NOTHING',
+                    (digest, tenant, str(chat_id), text))
+                if cursor.rowcount:
+                    added.append((cursor.lastrowid, digest, chat_id, text))
+            self._cursors[tenant] = timestamp
+            self._dirty_cursors.pop(tenant, None)
+            known = self._statuses.setdefault(tenant, {})
+            for homework, status in statuses.items():
+                known[homework] = status
+                self._dirty_statuses.pop((tenant, homework), None)
+        return added
+
+    def undelivered(self, tenant: Optional[str] = None) -> list:
+        """Возвращает недоставленные сообщения в порядке добавления.
+
+        Каждое сообщение — кортеж (id, digest, tenant, chat_id, text).
+        Если задан tenant, возвращаются только сообщения этого студента.
+        """
+        query = ('SELECT id, digest, tenant, chat_id, text FROM outbox '
+                 'WHERE delivered_at IS NULL')
+        params = ()
+        if tenant is not None:
+            query += ' AND tenant = ?'
+            params = (tenant,)
+        with self._db_lock:
+            return self._conn.execute(query + ' ORDER BY id',
+                                      params).fetchall()
+
+    def delivered_sinks(self, message_id: int) -> set:
+        """Возвращает получателей, уже получивших недоставленное сообщение."""
+        with self._db_lock:
+            return {sink for (sink,) in self._conn.execute(
+                'SELECT sink FROM deliveries WHERE message_id = ?',
+                (message_id,))}
+
+    def mark_sink_delivered(self, message_id: int, sink: str) -> None:
+        """Отмечает доставку сообщения одному из получателей."""
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO deliveries VALUES (?, ?)',
+                (message_id, sink))
+
+    def mark_delivered(self, message_id: int, when: float) -> None:
+        """Отмечает сообщение доставленным всем получателям."""
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                'UPDATE outbox SET delivered_at = ? WHERE id = ?',
+                (when, message_id))
+            self._conn.execute('DELETE FROM deliveries WHERE message_id = ?',
+                               (message_id,))
+
+    def prune_delivered(self, before: float) -> int:
+        """Удаляет сообщения, доставленные раньше before."""
+        with self._db_lock, self._conn:
+            return self._conn.execute(
+                'DELETE FROM outbox WHERE delivered_at < ?',
+                (before,)).rowcount
+
+    def flush(self) -> None:
+        """Записывает накопленные изменения в базу."""
+        with self._db_lock:
+            with self._lock:
+                cursors, self._dirty_cursors = self._dirty_cursors, {}
+                statuses, self._dirty_statuses = self._dirty_statuses, {}
+            if not cursors and not statuses:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO cursors VALUES (?, ?)',
+                    cursors.items())
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO statuses VALUES (?, ?, ?)',
+                    ((tenant, homework, status)
+                     for (tenant, homework), status in statuses.items()))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                logger.exception('Не удалось сохранить состояние')
+
+    def start(self) -> None:
+        """Запускает фоновый сброс изменений на диск."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        """Останавливает фоновый сброс и сохраняет оставшиеся изменения."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
@@ -1,12 +1,14 @@
+import json
 import os
 from http import HTTPStatus
 
-import requests
 import telegram
+import transport
 import utils
 
 
 class MockResponseGET:
+    headers = {}
 
     def __init__(self, url, params=None, random_timestamp=None,
                  current_timestamp=None, http_status=HTTPStatus.OK, **kwargs):
@@ -45,6 +47,10 @@ class MockResponseGET:
         self.random_timestamp = random_timestamp
         self.status_code = http_status
 
+    @property
+    def content(self):
+        return json.dumps(self.json()).encode()
+
     def json(self):
         data = {
             "homeworks": [],
@@ -186,7 +192,7 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(transport, 'get', mock_response_get)
 
         import homework
 
@@ -232,7 +238,7 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_500_response_get)
+        monkeypatch.setattr(transport, 'get', mock_500_response_get)
 
         import homework
 
@@ -315,7 +321,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(transport, 'get', mock_response_get)
 
         import homework
 
@@ -352,7 +358,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(transport, 'get', mock_response_get)
 
         import homework
 
@@ -400,7 +406,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(transport, 'get', mock_response_get)
 
         import homework
 
@@ -448,7 +454,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(transport, 'get', mock_response_get)
 
         import homework
 
@@ -484,7 +490,7 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_no_homeworks_response_get)
+        monkeypatch.setattr(transport, 'get', mock_no_homeworks_response_get)
 
         import homework
 
@@ -525,7 +531,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(transport, 'get', mock_response_get)
 
         import homework
 
@@ -565,7 +571,7 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(transport, 'get', mock_response_get)
 
         import homework
 
@@ -599,7 +605,7 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_empty_response_get)
+        monkeypatch.setattr(transport, 'get', mock_empty_response_get)
 
         import homework
 
@@ -626,7 +632,7 @@ class TestHomework:
             )
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(transport, 'get', mock_response_get)
 
         import homework
 
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+import botapi
+import homework
+import transport
+from delivery import SendQueue
+from exceptions import (DontSendException, TelegramNetworkError,
+                        TelegramRateLimitError)
+
+
+class FakeResponse:
+
+    def __init__(self, status, payload):
+        self.status = status
+        self.data = json.dumps(payload).encode()
+
+
+class FakeSession:
+
+    def __init__(self, replies=(), error=None):
+        self.replies = list(replies)
+        self.error = error
+        self.calls = []
+        self.lock = threading.Lock()
+
+    headers = {}
+
+    def merge_environment_settings(self, *args):
+        return {'proxies': {}}
+
+    def get_adapter(self, url):
+        return self
+
+    def get_connection(self, url, proxies):
+        return self
+
+    def urlopen(self, method, url, body=None, timeout=None, **kwargs):
+        payload = json.loads(body)
+        with self.lock:
+            self.calls.append((url, payload, timeout))
+            if self.error is not None:
+                raise self.error
+            if self.replies:
+                return FakeResponse(*self.replies.pop(0))
+        return FakeResponse(200, {'ok': True, 'result': {
+            'message_id': 1, 'text': payload['text']}})
+
+
+def error_reply(status, description, **parameters):
+    reply = {'ok': False, 'error_code': status, 'description': description}
+    if parameters:
+        reply['parameters'] = parameters
+    return status, reply
+
+
+class TestBotClient:
+
+    def test_send_message(self):
+        session = FakeSession()
+        client = botapi.BotClient('http://telegram/bot', session=session)
+        result = botapi.Bot('1:a', client).send_message(5, 'привет')
+        assert result == {'message_id': 1, 'text': 'привет'}
+        url, params, timeout = session.calls[0]
+        assert url == '/bot1:a/sendMessage'
+        assert params == {'chat_id': 5, 'text': 'привет'}
+        assert (timeout.connect_timeout, timeout.read_timeout) == (
+            transport.HTTP_CONNECT_TIMEOUT, transport.HTTP_READ_TIMEOUT), (
+            'Запрос без явного таймаута должен получать таймауты из настроек'
+        )
+
+    def test_tokens_share_session(self):
+        session = FakeSession()
+        client = botapi.BotClient('http://telegram/bot', session=session)
+        botapi.Bot('1:a', client).send_message(1, 'a')
+        botapi.Bot('2:b', client).send_message(2, 'b')
+        assert [call[0] for call in session.calls] == [
+            '/bot1:a/sendMessage', '/bot2:b/sendMessage',
+        ], 'Боты с разными токенами должны работать через одну сессию'
+
+    @pytest.mark.parametrize('reply, error_class', [
+        (error_reply(429, 'Too Many Requests', retry_after=3),
+         botapi.RetryAfter),
+        (error_reply(400, 'Bad Request: chat not found'), botapi.BadRequest),
+        (error_reply(403, 'Forbidden: bot was blocked'), botapi.Unauthorized),
+        (error_reply(404, 'Not Found'), botapi.InvalidToken),
+        (error_reply(400, 'Bad Request', migrate_to_chat_id=-100),
+         botapi.ChatMigrated),
+        (error_reply(500, 'Internal Server Error'), botapi.NetworkError),
+        ((502, {}), botapi.NetworkError),
+    ])
+    def test_errors_match_telegram(self, reply, error_class):
+        client = botapi.BotClient(session=FakeSession([reply]))
+        with pytest.raises(error_class) as info:
+            client.send_message('1:a', 1, 'текст')
+        assert type(info.value) is error_class, (
+            'Ответ Bot API должен превращаться в ту же ошибку, '
+            'что и в python-telegram-bot'
+        )
+
+    def test_error_details(self):
+        client = botapi.BotClient(session=FakeSession([
+            error_reply(429, 'Too Many Requests', retry_after=3),
+            error_reply(400, 'Bad Request: chat not found'),
+        ]))
+        with pytest.raises(botapi.RetryAfter) as info:
+            client.send_message('1:a', 1, 'текст')
+        assert info.value.retry_after == 3
+        with pytest.raises(botapi.BadRequest) as info:
+            client.send_message('1:a', 1, 'текст')
+        assert info.value.message == 'chat not found'
+        assert isinstance(info.value, botapi.NetworkError), (
+            'BadRequest, как и в python-telegram-bot, наследует NetworkError'
+        )
+
+    def test_network_errors(self):
+        client = botapi.BotClient(
+            session=FakeSession(error=ReadTimeoutError(None, '/', 'slow')))
+        with pytest.raises(botapi.TimedOut):
+            client.send_message('1:a', 1, 'текст')
+        client = botapi.BotClient(
+            session=FakeSession(error=ProtocolError('down')))
+        with pytest.raises(botapi.NetworkError):
+            client.send_message('1:a', 1, 'текст')
+
+    def test_concurrent_sends(self):
+        session = FakeSession()
+        client = botapi.BotClient(session=session, workers=4)
+        futures = [client.submit(f'{index}:a', index, f'сообщение {index}')
+                   for index in range(20)]
+        results = [future.result(timeout=5) for future in futures]
+        client.close()
+        assert [result['text'] for result in results] == [
+            f'сообщение {index}' for index in range(20)]
+        assert len(session.calls) == 20
+
+    def test_async_send(self):
+        client = botapi.BotClient(session=FakeSession([
+            error_reply(429, 'Too Many Requests', retry_after=1)]))
+        bot = botapi.Bot('1:a', client)
+
+        async def send():
+            return await asyncio.gather(
+                bot.send_message_async(1, 'первое'),
+                bot.send_message_async(1, 'второе'),
+                return_exceptions=True)
+
+        results = asyncio.run(send())
+        client.close()
+        assert sum(isinstance(result, botapi.RetryAfter)
+                   for result in results) == 1
+        assert {'первое', 'второе'} & {
+            result['text'] for result in results if isinstance(result, dict)}
+
+
+class TestLightClient:
+
+    @pytest.fixture(autouse=True)
+    def light(self, monkeypatch):
+        monkeypatch.setattr(botapi, 'TELEGRAM_CLIENT', 'light')
+
+    def test_make_bot(self):
+        first = transport.make_bot('1234:abcdefg')
+        second = transport.make_bot('5678:hijklmn')
+        assert isinstance(first, botapi.Bot)
+        assert first.client is second.client, (
+            'Легковесные боты должны использовать общий клиент'
+        )
+
+    def test_send_to_chat_errors(self):
+        client = botapi.BotClient(session=FakeSession([
+            error_reply(429, 'Too Many Requests', retry_after=3),
+            error_reply(400, 'Bad Request: chat not found'),
+            error_reply(500, 'Internal Server Error'),
+        ]))
+        bot = botapi.Bot('1:a', client)
+        with pytest.raises(TelegramRateLimitError):
+            homework.send_to_chat(bot, 1, 'текст')
+        with pytest.raises(DontSendException) as info:
+            homework.send_to_chat(bot, 1, 'текст')
+        assert not isinstance(info.value, TelegramNetworkError), (
+            'Отклонённое сообщение не должно повторяться'
+        )
+        with pytest.raises(TelegramNetworkError):
+            homework.send_to_chat(bot, 1, 'текст')
+
+    def test_send_queue_retries(self):
+        session = FakeSession([error_reply(500, 'Internal Server Error')])
+        bot = botapi.Bot('1:a', botapi.BotClient(session=session))
+        delivered = threading.Event()
+        queue = SendQueue(workers=1, chat_rate=1000, backoff=0.01)
+        queue.start()
+        queue.put(bot, 1, 'текст', delivered.set)
+        assert delivered.wait(5), (
+            'Очередь должна повторять отправку после NetworkError '
+            'легковесного клиента'
+        )
+        queue.stop()
+        assert len(session.calls) == 2
@@ -0,0 +1,100 @@
+import pytest
+
+from breaker import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ErrorNotifier,
+                     fingerprint)
+from exceptions import AuthError, CircuitOpenError, DontSendException
+from utils import FakeClock
+
+
+def fail():
+    raise ConnectionError('timeout for from_date=1660000000')
+
+
+class TestCircuitBreaker:
+
+    def test_opens_and_fails_fast(self):
+        calls = []
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10,
+                                 clock=FakeClock())
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                breaker.call(fail)
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.call(calls.append, 1)
+        assert not calls, 'Разомкнутая цепь не должна вызывать функцию'
+        assert issubclass(CircuitOpenError, DontSendException), (
+            'Об отказе разомкнутой цепи не нужно писать в Телеграм'
+        )
+
+    def test_half_open_recovery(self):
+        clock = FakeClock()
+        recovered = []
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10,
+                                 on_close=lambda: recovered.append(1),
+                                 clock=clock)
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+        clock.now = 10
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+        assert breaker.state == OPEN, (
+            'Сбой пробного вызова должен снова размыкать цепь'
+        )
+        clock.now = 20
+        assert breaker.call(lambda: 'ok') == 'ok'
+        assert breaker.state == CLOSED
+        assert recovered == [1], (
+            'При замыкании цепи должно уходить одно сообщение о восстановлении'
+        )
+        breaker.call(lambda: 'ok')
+        assert recovered == [1]
+
+    def test_single_trial_in_half_open(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=1,
+                                 clock=clock)
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+        clock.now = 1
+        breaker._before_call()
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: 'ok')
+
+    def test_ignored_errors_do_not_open(self):
+        breaker = CircuitBreaker(failure_threshold=1, ignore=(AuthError,))
+
+        def revoked():
+            raise AuthError('401')
+
+        for _ in range(3):
+            with pytest.raises(AuthError):
+                breaker.call(revoked)
+        assert breaker.state == CLOSED, (
+            'Ошибка авторизации одного студента не должна размыкать цепь'
+        )
+
+
+class TestErrorNotifier:
+
+    def test_fingerprint_ignores_numbers(self):
+        first = ConnectionError('from_date=1')
+        second = ConnectionError('from_date=2')
+        assert fingerprint(first) == fingerprint(second)
+        assert fingerprint(first) != fingerprint(ValueError('from_date=1'))
+
+    def test_window(self):
+        clock = FakeClock()
+        notifier = ErrorNotifier(window=60, clock=clock)
+        error = ConnectionError('API down')
+        assert notifier.should_notify(error)
+        assert not notifier.should_notify(error), (
+            'Повторная ошибка в пределах окна должна подавляться'
+        )
+        assert notifier.should_notify(error, 'other')
+        clock.now = 60
+        assert notifier.should_notify(error)
+        notifier.reset()
+        assert notifier.should_notify(error)
+        assert notifier.suppressed == 1
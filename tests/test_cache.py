@@ -0,0 +1,105 @@
+import json
+
+import cache as cache_module
+import homework
+from cache import ResponseCache
+from recording import tenant_key
+
+HEADERS = {'Authorization': 'OAuth token'}
+
+
+class MockResponse:
+
+    def __init__(self, data, headers=None):
+        self.content = json.dumps(data).encode()
+        self.headers = headers or {}
+
+
+class TestResponseCache:
+
+    def test_same_body_is_not_parsed_again(self):
+        cache = ResponseCache()
+        first = MockResponse({'homeworks': [], 'current_date': 1})
+        second = MockResponse({'homeworks': [], 'current_date': 2})
+        assert cache.load(HEADERS, first)['current_date'] == 1
+        result = cache.load(HEADERS, second)
+        assert cache.stats(HEADERS).body_hits == 1, (
+            'Тело, совпадающее с предыдущим, не должно разбираться заново'
+        )
+        assert result == {'homeworks': [], 'current_date': 2}, (
+            'Из кэша должен возвращаться новый current_date'
+        )
+        stats = cache.stats(HEADERS)
+        assert (stats.requests, stats.misses, stats.body_hits) == (2, 1, 1)
+
+    def test_changed_body_is_parsed(self):
+        cache = ResponseCache()
+        cache.load(HEADERS, MockResponse({'homeworks': [],
+                                          'current_date': 1}))
+        changed = MockResponse({
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': 2,
+        })
+        assert cache.load(HEADERS, changed)['homeworks']
+        assert cache.stats(HEADERS).misses == 2, (
+            'Изменившееся тело должно разбираться заново'
+        )
+
+    def test_conditional_get(self):
+        cache = ResponseCache()
+        assert cache.conditional_headers(HEADERS) == HEADERS
+        cache.load(HEADERS, MockResponse(
+            {'homeworks': [], 'current_date': 1},
+            {'ETag': '"abc"', 'Last-Modified': 'Mon, 01 Aug 2022 00:00:00'}))
+        headers = cache.conditional_headers(HEADERS)
+        assert headers['If-None-Match'] == '"abc"'
+        assert headers['If-Modified-Since'] == 'Mon, 01 Aug 2022 00:00:00'
+        assert 'If-None-Match' not in HEADERS
+        assert cache.not_modified(HEADERS, 5)['current_date'] == 5, (
+            'Ответ 304 не должен откатывать метку опроса к сохранённой'
+        )
+        assert cache.stats(HEADERS).bytes_saved > 0, (
+            'Ответ 304 должен учитываться как сэкономленный трафик'
+        )
+
+    def test_metrics_are_exported(self):
+        headers = {'Authorization': 'OAuth metrics-token'}
+        cache = ResponseCache()
+        cache.load(headers, MockResponse({'homeworks': [],
+                                          'current_date': 1}))
+        cache.load(headers, MockResponse({'homeworks': [],
+                                          'current_date': 2}))
+        cache.not_modified(headers, 2)
+        tenant = tenant_key(headers)
+        for result in ('misses', 'body_hits', 'not_modified'):
+            assert cache_module.CACHE_RESPONSES.labels(
+                tenant, result).get() == 1, f'Нет метрики кэша для {result}'
+        assert 'metrics-token' not in cache_module.CACHE_RESPONSES.render(), (
+            'Токен студента не должен попадать в метки метрик'
+        )
+        assert cache_module.CACHE_BYTES_SAVED.labels(tenant).get() > 0
+
+    def test_records_are_validated_once(self, monkeypatch):
+        cache = ResponseCache()
+        calls = []
+        validate = homework.response_validator.validate
+
+        def counting(response):
+            calls.append(response)
+            return validate(response)
+
+        monkeypatch.setattr(homework.response_validator, 'validate', counting)
+        data = {
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': 1,
+        }
+        first = homework.validate_response(
+            cache.load(HEADERS, MockResponse(data)))
+        second = homework.validate_response(
+            cache.load(HEADERS, MockResponse(dict(data, current_date=2))))
+        third = homework.validate_response(cache.not_modified(HEADERS, 3))
+        assert len(calls) == 1, (
+            'Неизменившийся ответ не должен проверяться повторно'
+        )
+        assert [second[0], third[0]] == [2, 3]
+        assert first[1] == second[1] == third[1]
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import telegram
+
+import policy
+from delivery import SendQueue, TokenBucket
+from exceptions import DontSendException, TelegramNetworkError
+
+
+class FlakyBot:
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+class TestTokenBucket:
+
+    def test_wait_time(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=2, capacity=1, clock=lambda: now[0])
+        assert bucket.wait_time() == 0
+        bucket.take()
+        assert bucket.wait_time() == 0.5, (
+            'После исчерпания токенов ждать нужно 1 / rate секунд'
+        )
+        now[0] = 0.5
+        assert bucket.wait_time() == 0
+
+
+class TestSendQueue:
+
+    def test_retry_after_is_honoured(self):
+        bot = FlakyBot([telegram.error.RetryAfter(0.2)])
+        queue = SendQueue(workers=2, chat_rate=1000, backoff=0.01)
+        queue.start()
+        start = time.monotonic()
+        queue.put(bot, 1, 'first')
+        queue.put(bot, 1, 'second')
+        assert queue.join(2)
+        queue.stop()
+        assert [text for _, text, _ in bot.sent] == ['first', 'second'], (
+            'Сообщения одного чата должны доставляться по порядку'
+        )
+        assert bot.sent[0][2] - start >= 0.2, (
+            'Повторная отправка должна ждать retry_after'
+        )
+
+    def test_network_errors_are_retried(self):
+        bot = FlakyBot([telegram.error.NetworkError('boom')] * 2)
+        queue = SendQueue(workers=1, chat_rate=1000, backoff=0.01)
+        queue.start()
+        queue.put(bot, 1, 'text')
+        assert queue.join(2)
+        queue.stop()
+        assert len(bot.sent) == 1
+
+    def test_permanent_error_drops_message(self):
+        bot = FlakyBot([telegram.error.BadRequest('chat not found')])
+        queue = SendQueue(workers=1)
+        queue.start()
+        failed = []
+        queue.put(bot, 1, 'text', lambda: failed.append('delivered'),
+                  lambda: failed.append('failed'))
+        assert queue.join(2)
+        queue.stop()
+        assert not bot.sent
+        assert failed == ['failed'], (
+            'Об отброшенном сообщении должен сообщать on_failed'
+        )
+
+    def test_exhausted_attempts_call_on_failed(self):
+        bot = FlakyBot([telegram.error.NetworkError('boom')] * 3)
+        queue = SendQueue(workers=1, chat_rate=1000, backoff=0.01,
+                          max_attempts=2)
+        queue.start()
+        failed = threading.Event()
+        queue.put(bot, 1, 'text', on_failed=failed.set)
+        assert failed.wait(2)
+        queue.stop()
+        assert not bot.sent
+
+    def test_retries_follow_policy(self, monkeypatch):
+        monkeypatch.setitem(policy.POLICIES, TelegramNetworkError,
+                            policy.Policy(notify=False))
+        bot = FlakyBot([telegram.error.NetworkError('boom')])
+        queue = SendQueue(workers=1, chat_rate=1000, backoff=0.01)
+        queue.start()
+        failed = threading.Event()
+        queue.put(bot, 1, 'text', on_failed=failed.set)
+        assert failed.wait(2), (
+            'Число повторов отправки должно браться из policy.POLICIES'
+        )
+        queue.stop()
+        assert not bot.sent
+
+    def test_chat_rate_limit(self):
+        bot = FlakyBot()
+        queue = SendQueue(workers=4, chat_rate=10)
+        queue.start()
+        for i in range(15):
+            queue.put(bot, 1, str(i))
+        queue.put(bot, 2, 'other')
+        assert queue.join(5)
+        queue.stop()
+        times = {text: sent_at for _, text, sent_at in bot.sent}
+        assert times['14'] - times['0'] >= 0.4, (
+            'Отправка в один чат должна ограничиваться лимитом'
+        )
+        assert times['other'] < times['14'], (
+            'Лимит одного чата не должен задерживать другие чаты'
+        )
+
+    def test_queue_is_bounded(self):
+        queue = SendQueue(maxsize=1)
+        queue.put(FlakyBot(), 1, 'text')
+        try:
+            queue.put(FlakyBot(), 1, 'text')
+        except DontSendException:
+            pass
+        else:
+            assert False, 'Переполненная очередь должна отклонять сообщения'
@@ -0,0 +1,129 @@
+import threading
+
+from digest import Digest, DigestSink, split_text, urgent_suffixes
+from sinks import Notification, TelegramSink
+
+
+class FakeSink(TelegramSink):
+
+    def __init__(self):
+        super().__init__(bot=None, queue=object())
+        self.sent = []
+        self.failures = []
+        self.ready = threading.Event()
+
+    def put(self, notification, on_delivered=None, on_failed=None):
+        self.sent.append((notification.text, on_delivered))
+        self.failures.append(on_failed)
+        self.ready.set()
+
+
+def notify(text, chat_id=7):
+    return Notification('t', chat_id, text)
+
+
+class TestSplitText:
+
+    def test_respects_limit(self):
+        texts = ['a' * 30, 'b' * 30, 'c' * 30]
+        chunks = split_text(texts, limit=64)
+        assert [len(text) for text, _ in chunks] == [62, 30]
+        assert [owners for _, owners in chunks] == [[0, 1], [2]]
+
+    def test_long_text_is_split(self):
+        chunks = split_text(['x' * 150, 'y'], limit=64)
+        assert all(len(text) <= 64 for text, _ in chunks), (
+            'Ни одно сообщение не должно превышать лимит Телеграма'
+        )
+        assert chunks[2][0] == 'x' * 22 + '\n\ny'
+        assert [owners for _, owners in chunks] == [[0], [0], [0, 1]]
+
+
+class TestDigest:
+
+    def test_disabled_keeps_sinks(self):
+        sink = FakeSink()
+        assert Digest(window=0).wrap([sink]) == [sink]
+        wrapped = Digest(window=60).wrap([sink])[0]
+        assert isinstance(wrapped, DigestSink)
+        assert wrapped.name == sink.name
+
+    def test_count_threshold(self):
+        sink = FakeSink()
+        digest = Digest(window=60, max_items=3)
+        wrapped = digest.wrap([sink])[0]
+        delivered = []
+        for index in range(3):
+            wrapped.put(notify(f'm{index}'),
+                        lambda index=index: delivered.append(index))
+        assert [text for text, _ in sink.sent] == ['m0\n\nm1\n\nm2'], (
+            'Накопленные изменения должны уходить одним сообщением'
+        )
+        sink.sent[0][1]()
+        assert delivered == [0, 1, 2]
+
+    def test_chats_are_separate(self):
+        sink = FakeSink()
+        digest = Digest(window=60, max_items=2)
+        wrapped = digest.wrap([sink])[0]
+        wrapped.put(notify('a', chat_id=1))
+        wrapped.put(notify('b', chat_id=2))
+        assert sink.sent == []
+        digest.flush()
+        assert sorted(text for text, _ in sink.sent) == ['a', 'b']
+
+    def test_urgent_bypasses_window(self):
+        suffixes = urgent_suffixes({'approved': 'Ура!', 'reviewing': 'Взята'},
+                                   'approved')
+        sink = FakeSink()
+        wrapped = Digest(window=60, urgent=suffixes).wrap([sink])[0]
+        wrapped.put(notify('Взята'))
+        assert sink.sent == []
+        wrapped.put(notify('Ура!'))
+        assert [text for text, _ in sink.sent] == ['Взята\n\nУра!'], (
+            'Срочный статус отправляется сразу вместе с накопленными'
+        )
+
+    def test_window_flush(self):
+        sink = FakeSink()
+        digest = Digest(window=0.05)
+        wrapped = digest.wrap([sink])[0]
+        digest.start()
+        wrapped.put(notify('a'))
+        wrapped.put(notify('b'))
+        assert sink.ready.wait(1), 'Сводка должна уходить по истечении окна'
+        digest.stop()
+        assert [text for text, _ in sink.sent] == ['a\n\nb']
+
+    def test_delivered_after_all_parts(self):
+        sink = FakeSink()
+        digest = Digest(window=60, limit=4)
+        delivered = []
+        digest.add(sink, notify('abcdefgh'), lambda: delivered.append(1))
+        digest.flush()
+        assert [text for text, _ in sink.sent] == ['abcd', 'efgh']
+        sink.sent[0][1]()
+        assert delivered == [], (
+            'Уведомление доставлено только вместе со всеми частями'
+        )
+        sink.sent[1][1]()
+        assert delivered == [1]
+
+    def test_failed_part_fails_notification(self):
+        sink = FakeSink()
+        digest = Digest(window=60, limit=4)
+        results = []
+        digest.add(sink, notify('abcdefgh'), lambda: results.append('ok'),
+                   lambda: results.append('failed'))
+        digest.add(sink, notify('xy'), lambda: results.append('xy'),
+                   lambda: results.append('xy failed'))
+        digest.flush()
+        assert [text for text, _ in sink.sent] == ['abcd', 'efgh', 'xy']
+        sink.failures[0]()
+        sink.sent[1][1]()
+        sink.failures[1]()
+        sink.sent[2][1]()
+        assert results == ['failed', 'xy'], (
+            'Отказ от части сводки должен один раз помечать уведомление '
+            'недоставленным и не задевать другие'
+        )
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import threading
+import time
+
+import telegram
+
+import engine
+import homework
+from breaker import BREAKER_FAILURES, OPEN
+from delivery import SendQueue
+from exceptions import UnexpectedStatusError
+
+
+class MockBot:
+
+    def __init__(self, token=None, **kwargs):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+class TestEngine:
+
+    def test_load_tenants(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'practicum_token': 'a', 'telegram_chat_id': 1},
+            {'name': 'bob', 'practicum_token': 'b', 'telegram_chat_id': 2,
+             'telegram_token': '1:x'},
+        ]))
+        tenants = engine.load_tenants(str(path))
+        assert [tenant.name for tenant in tenants] == ['1', 'bob'], (
+            'Имя студента по умолчанию должно совпадать с chat_id'
+        )
+        assert tenants[1].headers == {'Authorization': 'OAuth b'}
+        assert tenants[1].telegram_token == '1:x'
+
+    def test_poll_sends_status(self, monkeypatch):
+        def mock_request_api(headers, current_timestamp, timeout=None):
+            return {
+                'homeworks': [{'homework_name': headers['Authorization'],
+                               'status': 'approved'}],
+                'current_date': current_timestamp + 1,
+            }
+
+        monkeypatch.setattr(homework, 'request_api', mock_request_api)
+        monkeypatch.setattr(telegram, 'Bot', MockBot)
+        tenant = engine.Tenant('t', 'tok', 42, '1:x')
+        polling = engine.PollingEngine([tenant])
+
+        async def run():
+            polling._global_limit = asyncio.Semaphore(1)
+            return await polling.poll(tenant, 100)
+
+        assert asyncio.run(run()) == 101, (
+            'После отправки статуса временная метка должна сдвигаться'
+        )
+        polling.outbound.start()
+        assert polling.outbound.join(1)
+        chat_id, text = polling._bot(tenant).sent[0]
+        assert chat_id == 42
+        assert text.startswith('Изменился статус проверки работы "OAuth tok"')
+
+    def test_concurrency_limit(self, monkeypatch):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def mock_request_api(headers, current_timestamp, timeout=None):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.pop()
+            return {'homeworks': [], 'current_date': current_timestamp}
+
+        monkeypatch.setattr(homework, 'request_api', mock_request_api)
+        monkeypatch.setattr(telegram, 'Bot', MockBot)
+        tenants = [engine.Tenant(str(i), str(i), i, '1:x') for i in range(20)]
+        polling = engine.PollingEngine(tenants, concurrency=4, per_host=3,
+                                       retry_time=0.01)
+
+        async def run():
+            task = asyncio.ensure_future(polling.run())
+            await asyncio.sleep(0.3)
+            task.cancel()
+
+        asyncio.run(run())
+        assert len(peak) >= 20, 'Все студенты должны быть опрошены'
+        assert max(peak) <= 3, (
+            'Число одновременных запросов к хосту не должно превышать лимит'
+        )
+
+    def test_bad_bot_token_stops_only_its_tenant(self, monkeypatch):
+        polled = []
+
+        def mock_request_api(headers, current_timestamp, timeout=None):
+            polled.append(headers['Authorization'])
+            return {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': current_timestamp,
+            }
+
+        def mock_bot(token=None, **kwargs):
+            if token == 'bad':
+                raise telegram.error.InvalidToken()
+            return MockBot(token)
+
+        monkeypatch.setattr(homework, 'request_api', mock_request_api)
+        monkeypatch.setattr(telegram, 'Bot', mock_bot)
+        tenants = [engine.Tenant('bad', 'bad', 1, 'bad'),
+                   engine.Tenant('good', 'good', 2, '1:x')]
+        polling = engine.PollingEngine(
+            tenants, retry_time=0.02,
+            scheduler_options={'max_interval': 0.02})
+
+        async def run():
+            task = asyncio.ensure_future(polling.run())
+            await asyncio.sleep(0.3)
+            assert not task.done(), (
+                'Ошибка в настройках одного студента не должна '
+                'останавливать опрос остальных'
+            )
+            task.cancel()
+
+        asyncio.run(run())
+        assert polling.stopped == {'bad'}
+        assert polled.count('OAuth good') > 1
+
+    def test_breaker_is_shared_by_tenants(self, monkeypatch):
+        calls = []
+
+        def mock_request_api(headers, current_timestamp, timeout=None):
+            calls.append(headers['Authorization'])
+            raise UnexpectedStatusError('API недоступно')
+
+        monkeypatch.setattr(homework, 'request_api', mock_request_api)
+        monkeypatch.setattr(telegram, 'Bot', MockBot)
+        tenants = [engine.Tenant(str(i), str(i), i, '1:x') for i in range(20)]
+        polling = engine.PollingEngine(tenants, concurrency=1,
+                                       retry_time=0.1)
+
+        async def run():
+            task = asyncio.ensure_future(polling.run())
+            await asyncio.sleep(0.3)
+            task.cancel()
+
+        asyncio.run(run())
+        assert len(calls) == BREAKER_FAILURES, (
+            'После BREAKER_FAILURES сбоев API опросы всех студентов '
+            'должны завершаться без запросов'
+        )
+        assert polling.breaker('practicum.yandex.ru').state == OPEN
+
+    def test_recovery_notifies_affected_tenants(self, monkeypatch):
+        monkeypatch.setattr(telegram, 'Bot', MockBot)
+        tenants = [engine.Tenant('a', 'a', 1, '1:x'),
+                   engine.Tenant('b', 'b', 2, '1:x')]
+        polling = engine.PollingEngine(tenants)
+        polling.notifier.should_notify(UnexpectedStatusError('500'), 'a')
+        polling._recovered()
+        polling.outbound.start()
+        assert polling.outbound.join(1)
+        assert polling._bot(tenants[0]).sent == [
+            (1, engine.RECOVERED_MESSAGE)], (
+            'О восстановлении сообщают только студентам, получившим ошибку'
+        )
+
+    def test_poll_catches_up_in_one_pass(self, monkeypatch):
+        response = {
+            'homeworks': [
+                {'id': 3, 'homework_name': 'c', 'status': 'approved',
+                 'date_updated': '2022-03-01T00:00:00Z'},
+                {'id': 2, 'homework_name': 'b', 'status': 'rejected',
+                 'date_updated': '2022-02-01T00:00:00Z'},
+                {'id': 1, 'homework_name': 'a', 'status': 'reviewing',
+                 'date_updated': '2022-01-01T00:00:00Z'},
+            ],
+            'current_date': 200,
+        }
+        monkeypatch.setattr(
+            homework, 'request_api',
+            lambda headers, current_timestamp, timeout=None: response)
+        monkeypatch.setattr(telegram, 'Bot', MockBot)
+        tenant = engine.Tenant('t', 'tok', 42, '1:x')
+        polling = engine.PollingEngine(
+            [tenant], outbound=SendQueue(chat_rate=1000))
+        polling.outbound.start()
+
+        async def run():
+            polling._global_limit = asyncio.Semaphore(1)
+            await polling.poll(tenant, 100)
+            await polling.poll(tenant, 200)
+
+        asyncio.run(run())
+        assert polling.outbound.join(1)
+        sent = [text for _, text in polling._bot(tenant).sent]
+        assert [text.split('"')[1] for text in sent] == ['a', 'b', 'c'], (
+            'Все изменения из ответа должны отправляться за один опрос '
+            'в хронологическом порядке, без повторов'
+        )
+        assert polling.store.get_status('t', '1') == 'reviewing'
+
+    def test_detect_changes_skips_known(self):
+        _, records = homework.validate_response({
+            'homeworks': [
+                {'id': 2, 'homework_name': 'b', 'status': 'approved'},
+                {'id': 1, 'homework_name': 'a', 'status': 'approved'},
+            ],
+            'current_date': 1,
+        })
+        changes = homework.detect_changes(records, {'1': 'approved',
+                                                    '2': 'reviewing'})
+        assert changes == [records[0]], (
+            'Работы с неизменившимся статусом не должны попадать в изменения'
+        )
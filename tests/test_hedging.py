@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+import hedging
+
+
+def warm(hedger, seconds=0.01, count=20):
+    for _ in range(count):
+        hedger.estimator.observe(seconds)
+
+
+class SlowFirst:
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+        self.timeouts = []
+        self._lock = threading.Lock()
+
+    def __call__(self, value, timeout=None):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+            self.timeouts.append(timeout)
+        if call == 1:
+            time.sleep(self.delay)
+            return ('first', value)
+        return ('hedge', value)
+
+
+class TestLatencyEstimator:
+
+    def test_quantile(self):
+        estimator = hedging.LatencyEstimator(window=100, min_samples=10)
+        for value in range(5):
+            estimator.observe(value)
+        assert estimator.quantile(0.5) is None, (
+            'Пока замеров мало, оценки быть не должно'
+        )
+        for value in range(200):
+            estimator.observe(value / 100)
+        assert estimator.quantile(0.95) == pytest.approx(1.95), (
+            'Оценка должна строиться по последним window замерам'
+        )
+
+
+class TestHedger:
+
+    def test_slow_request_is_hedged(self):
+        hedger = hedging.Hedger(min_delay=0.01, budget=1, deadline=5)
+        warm(hedger)
+        won = hedging.HEDGES_WON.get()
+        func = SlowFirst(1)
+        start = time.monotonic()
+        assert hedger.call(func, 42) == ('hedge', 42)
+        assert time.monotonic() - start < 0.5, (
+            'Ответ на дублирующий запрос должен использоваться сразу'
+        )
+        assert func.calls == 2
+        assert hedging.HEDGES_WON.get() == won + 1
+
+    def test_no_hedge_without_estimate(self):
+        hedger = hedging.Hedger(min_delay=0.01, budget=1, deadline=5)
+        func = SlowFirst(0.1)
+        assert hedger.call(func, 1) == ('first', 1), (
+            'Без оценки задержки запрос не должен дублироваться'
+        )
+        assert func.calls == 1
+
+    def test_budget_limits_hedges(self):
+        hedger = hedging.Hedger(min_delay=0.01, budget=0.5, burst=1,
+                                deadline=5)
+        warm(hedger, 0.001, count=200)
+        hedges = hedging.HEDGES_SENT.get()
+        for _ in range(4):
+            hedger.call(SlowFirst(0.05), 1)
+        assert hedging.HEDGES_SENT.get() - hedges == 2, (
+            'Дублей должно быть не больше заданной доли запросов'
+        )
+
+    def test_deadline(self):
+        hedger = hedging.Hedger(budget=0, deadline=0.1)
+        func = SlowFirst(1)
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            hedger.call(func, 1)
+        assert time.monotonic() - start < 0.5, (
+            'Опрос не должен ждать дольше срока'
+        )
+        assert func.timeouts[0] <= 0.1, (
+            'Запрос должен получать оставшееся до срока время как таймаут'
+        )
+
+    def test_error_is_raised(self):
+        def fail(timeout=None):
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            hedging.Hedger(deadline=1).call(fail)
@@ -0,0 +1,73 @@
+from history import HistoryStore, parse_time
+from validator import HomeworkRecord
+
+
+def record(key, status, date):
+    return HomeworkRecord(key, f'hw{key}', status, date)
+
+
+class TestHistory:
+
+    def test_turnaround_percentiles(self, tmp_path):
+        store = HistoryStore(str(tmp_path / 'history.db'))
+        for hours in range(1, 11):
+            key = str(hours)
+            store.record('t', [record(key, 'reviewing',
+                                      '2022-01-01T00:00:00Z')], 0)
+            store.record('t', [record(key, 'approved',
+                                      f'2022-01-01T{hours:02}:00:00Z')], 0)
+        assert store.turnaround((0.5, 1)) == {0.5: 6 * 3600, 1: 10 * 3600}, (
+            'Время проверки считается от reviewing до вердикта'
+        )
+        assert store.turnaround(tenant='other') == {}
+        assert store.turnaround(verdict='rejected') == {}
+
+    def test_turnaround_strategies_agree(self, tmp_path):
+        store = HistoryStore(str(tmp_path / 'history.db'))
+        for hours in (5, 1, 9, 3, 7):
+            key = str(hours)
+            store.record('t', [record(key, 'reviewing',
+                                      '2022-01-01T00:00:00Z')], 0)
+            store.record('t', [record(key, 'approved',
+                                      f'2022-01-01T{hours:02}:00:00Z')], 0)
+        since = parse_time('2022-01-01T02:00:00Z', 0)
+        sorted_in_memory = store.turnaround((0, 0.5, 1), since=since)
+        store.sort_limit = 0
+        assert store.turnaround((0, 0.5, 1), since=since) == (
+            sorted_in_memory) == {0: 3 * 3600, 0.5: 7 * 3600, 1: 9 * 3600}, (
+            'Перцентили не должны зависеть от способа сортировки'
+        )
+
+    def test_counts_and_dedupe(self, tmp_path):
+        store = HistoryStore(str(tmp_path / 'history.db'))
+        changes = [record('1', 'reviewing', '2022-01-01T00:00:00Z'),
+                   record('2', 'reviewing', '2022-01-02T00:00:00Z')]
+        assert store.record('a', changes, 0) == 2
+        assert store.record('a', changes, 0) == 0, (
+            'Повторно записанные события должны пропускаться'
+        )
+        store.record('b', [record('1', 'rejected', '')], 1641081600)
+        assert store.count() == 3
+        assert store.count('reviewing') == 2
+        assert store.count(tenant='a', since=1641024000) == 1
+        assert store.count(homework='1') == 2
+        assert store.count(tenant='missing') == 0
+        assert store.turnaround(tenant='b') == {}, (
+            'Вердикт без reviewing не даёт времени проверки'
+        )
+
+    def test_restart_keeps_history(self, tmp_path):
+        path = str(tmp_path / 'history.db')
+        store = HistoryStore(path)
+        store.record('t', [record('1', 'reviewing', '2022-01-01T00:00:00Z')],
+                     0)
+        store.close()
+        restored = HistoryStore(path)
+        restored.record('t', [record('1', 'rejected',
+                                     '2022-01-01T01:00:00Z')], 0)
+        assert restored.turnaround((0.5,)) == {0.5: 3600}
+        assert restored.count(tenant='t') == 2
+
+    def test_parse_time(self):
+        assert parse_time('2022-01-01T00:00:00Z', 5) == 1640995200
+        assert parse_time('', 5) == 5
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+
+import pytest
+
+import engine
+import homework
+import lease
+from storage import StateStore
+from utils import FakeClock
+
+
+@pytest.fixture(params=['sqlite', 'file'])
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        return lease.SQLiteLeaseBackend(str(tmp_path / 'leases.db'))
+    return lease.FileLeaseBackend(str(tmp_path / 'leases'))
+
+
+class TestLeaseBackend:
+
+    def test_one_owner_per_resource(self, backend):
+        assert backend.acquire('a', ['t1', 't2'], 30, 0) == {'t1', 't2'}
+        assert backend.acquire('b', ['t1', 't2', 't3'], 30, 1) == {'t3'}, (
+            'Чужая действующая аренда не должна перехватываться'
+        )
+        assert backend.acquire('a', ['t1'], 30, 10) == {'t1'}, (
+            'Владелец должен продлевать свою аренду'
+        )
+
+    def test_failover_after_expiry(self, backend):
+        backend.acquire('a', ['t1'], 30, 0)
+        assert backend.acquire('b', ['t1'], 30, 29) == set()
+        assert backend.acquire('b', ['t1'], 30, 30) == {'t1'}, (
+            'Истёкшая аренда должна переходить другому экземпляру'
+        )
+        assert backend.acquire('a', ['t1'], 30, 31) == set()
+
+    def test_release(self, backend):
+        backend.acquire('a', ['t1'], 30, 0)
+        backend.release('b', ['t1'])
+        assert backend.acquire('b', ['t1'], 30, 1) == set(), (
+            'Освободить аренду может только её владелец'
+        )
+        backend.release('a', ['t1'])
+        assert backend.acquire('b', ['t1'], 30, 1) == {'t1'}
+
+
+class TestLeaseKeeper:
+
+    def test_held_until_expiry(self, backend):
+        clock = FakeClock(1000.0)
+        keeper = lease.LeaseKeeper(backend, 'a', ttl=30, clock=clock)
+        keeper.want('t1')
+        assert not keeper.held('t1')
+        assert keeper.renew() == {'t1'}
+        assert keeper.held('t1')
+        clock.now += 30
+        assert not keeper.held('t1'), (
+            'Без продления аренда должна считаться потерянной'
+        )
+
+    def test_standby_takes_over(self, backend):
+        clock = FakeClock(1000.0)
+        active = lease.LeaseKeeper(backend, 'a', ttl=30, clock=clock)
+        standby = lease.LeaseKeeper(backend, 'b', ttl=30, clock=clock)
+        active.want('t1')
+        standby.want('t1')
+        active.renew()
+        assert standby.renew() == set()
+        assert not standby.held('t1')
+        clock.now += 31
+        assert standby.renew() == {'t1'}, (
+            'Резервный экземпляр должен взять истёкшую аренду'
+        )
+        active.renew()
+        assert not active.held('t1')
+
+    def test_wait_returns_after_renew(self, backend):
+        keeper = lease.LeaseKeeper(backend, 'a', ttl=30)
+        keeper.want('t1')
+        thread = threading.Timer(0.05, keeper.renew)
+        thread.start()
+        assert keeper.wait('t1', timeout=5)
+        thread.join()
+
+    def test_close_releases(self, backend):
+        keeper = lease.LeaseKeeper(backend, 'a', ttl=30)
+        keeper.want('t1')
+        keeper.start()
+        assert keeper.wait('t1', timeout=5)
+        keeper.close()
+        assert backend.acquire('b', ['t1'], 30, 0) == {'t1'}, (
+            'После остановки аренды должны освобождаться'
+        )
+
+    def test_disabled_without_backend(self):
+        assert lease.start_keeper(['t1'], backend='') is None
+        with pytest.raises(ValueError):
+            lease.start_keeper(['t1'], backend='redis')
+
+
+class TestStandby:
+
+    def test_standby_makes_no_api_calls(self, monkeypatch, tmp_path):
+        calls = []
+
+        def mock_request_api(headers, current_timestamp, timeout=None):
+            calls.append(current_timestamp)
+            return {'homeworks': [], 'current_date': current_timestamp}
+
+        monkeypatch.setattr(homework, 'request_api', mock_request_api)
+        backend = lease.SQLiteLeaseBackend(str(tmp_path / 'leases.db'))
+        backend.acquire('other', ['t'], 60, lease.time.time())
+        keeper = lease.LeaseKeeper(backend, 'me', ttl=0.03)
+        keeper.want('t')
+        keeper.start()
+        tenant = engine.Tenant('t', 'tok', 1, '1:x')
+        polling = engine.PollingEngine([tenant], retry_time=0.01,
+                                       leases=keeper)
+
+        async def run():
+            task = asyncio.ensure_future(polling.run())
+            await asyncio.sleep(0.1)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(run())
+        keeper.close()
+        assert calls == [], 'Резервный экземпляр не должен обращаться к API'
+
+    def test_take_over_reloads_state(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        owner = StateStore(path)
+        standby = StateStore(path)
+        owner.set_cursor('t', 555)
+        owner.set_status('t', 'hw', 'approved')
+        owner.flush()
+        standby.load('t')
+        assert standby.get_cursor('t') == 555, (
+            'Получив аренду, экземпляр должен продолжить с чужой метки'
+        )
+        assert standby.get_status('t', 'hw') == 'approved'
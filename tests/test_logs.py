@@ -0,0 +1,75 @@
+import gzip
+import io
+import logging
+import queue
+import sys
+
+import logs
+
+
+class TtyStream(io.StringIO):
+
+    def isatty(self):
+        return True
+
+
+class TestLogs:
+
+    def test_color_only_for_tty(self):
+        plain = logs.stream_handler(io.StringIO())
+        colored = logs.stream_handler(TtyStream())
+        assert not plain.filters, (
+            'ColorFilter не нужен, если вывод идёт не в терминал'
+        )
+        assert isinstance(colored.filters[0], logs.ColorFilter)
+        record = logging.makeLogRecord({'levelname': 'ERROR', 'msg': 'x'})
+        colored.filters[0].filter(record)
+        assert colored.format(record).startswith('\033[')
+
+    def test_rotated_logs_are_compressed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(logs, 'LOG_MAX_BYTES', 100)
+        path = tmp_path / 'bot.log'
+        handler = logs.file_handler(str(path))
+        record = logging.makeLogRecord({'levelname': 'INFO', 'msg': 'x' * 80})
+        handler.emit(record)
+        handler.emit(record)
+        handler.close()
+        archive = tmp_path / 'bot.log.1.gz'
+        assert archive.exists(), 'Старый лог должен сжиматься при ротации'
+        assert 'x' * 80 in gzip.open(archive, 'rt').read()
+
+    def test_queue_pipeline(self, tmp_path):
+        root = logging.getLogger()
+        saved = root.handlers[:], root.level
+        path = tmp_path / 'bot.log'
+        listener = logs.setup_logging(str(path), 'INFO')
+        try:
+            logging.info('Статус %s', 'approved')
+            logging.debug('не попадёт в лог')
+        finally:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+            root.handlers[:], level = saved
+            root.setLevel(level)
+        text = path.read_text(encoding='utf-8')
+        assert 'Статус approved' in text
+        assert 'не попадёт' not in text
+
+    def test_records_are_formatted_by_listener(self):
+        log_queue = queue.SimpleQueue()
+        handler = logs.LocalQueueHandler(log_queue)
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.makeLogRecord({
+                'levelname': 'ERROR', 'msg': 'Статус %s',
+                'args': ('approved',), 'exc_info': sys.exc_info()})
+        handler.handle(record)
+        queued = log_queue.get_nowait()
+        assert queued is record, (
+            'Запись должна попадать в очередь без копирования'
+        )
+        assert queued.exc_text is None and queued.args == ('approved',), (
+            'Сообщение и traceback не должны форматироваться в потоке вызова'
+        )
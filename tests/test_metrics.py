@@ -0,0 +1,71 @@
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import metrics
+
+
+class TestMetrics:
+
+    def test_histogram_render(self):
+        histogram = metrics.Histogram('latency', 'Задержка', ('stage',),
+                                      buckets=(0.1, 1))
+        child = histogram.labels('fetch')
+        child.observe(0.05)
+        child.observe(0.5)
+        child.observe(5)
+        text = histogram.render()
+        assert '# TYPE latency histogram' in text
+        assert 'latency_bucket{stage="fetch",le="0.1"} 1' in text
+        assert 'latency_bucket{stage="fetch",le="1"} 2' in text, (
+            'Корзины гистограммы должны быть накопительными'
+        )
+        assert 'latency_bucket{stage="fetch",le="+Inf"} 3' in text
+        assert 'latency_count{stage="fetch"} 3' in text
+
+    def test_counter_and_gauge(self):
+        registry = metrics.Registry()
+        counter = registry.counter('errors_total', 'Ошибки', ('type',))
+        counter.labels('KeyError').inc()
+        counter.labels('KeyError').inc(2)
+        gauge = registry.gauge('depth', 'Глубина')
+        gauge.set_function(lambda: 7)
+        text = registry.render()
+        assert 'errors_total{type="KeyError"} 3' in text
+        assert 'depth 7' in text
+
+    def test_label_values_are_escaped(self):
+        counter = metrics.Counter('stalls_total', 'Зависания', ('tenant',))
+        counter.labels('a\\b "c"\nd').inc()
+        assert 'stalls_total{tenant="a\\\\b \\"c\\"\\nd"} 1.0' in (
+            counter.render()
+        ), 'Значения меток должны экранироваться по формату Prometheus'
+
+    def test_metric_is_abstract(self):
+        with pytest.raises(TypeError):
+            metrics.Metric('abstract', 'Без реализации')
+
+    def test_timed_keeps_signature(self):
+        @metrics.timed('test_stage')
+        def stage(first, second):
+            return first + second
+
+        assert stage(1, 2) == 3
+        assert stage.__wrapped__.__name__ == 'stage'
+        assert 'homework_stage_seconds_count{stage="test_stage"} 1' in (
+            metrics.REGISTRY.render()
+        )
+
+    def test_server(self):
+        assert metrics.start_server(port=0) is None, (
+            'Без порта сервер метрик не должен запускаться'
+        )
+        server = ThreadingHTTPServer(('127.0.0.1', 0), metrics.handler_class())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        with urllib.request.urlopen(f'http://{host}:{port}/metrics') as resp:
+            body = resp.read().decode()
+        server.shutdown()
+        assert 'homework_stage_seconds' in body
@@ -0,0 +1,185 @@
+import sqlite3
+
+import pytest
+import telegram
+
+from delivery import SendQueue
+from exceptions import DontSendException
+from outbox import Outbox
+from sinks import TelegramSink
+from storage import StateStore
+from validator import HomeworkRecord
+
+
+class FakeSink:
+
+    def __init__(self, full=False, name='telegram'):
+        self.name = name
+        self.full = full
+        self.sent = []
+        self.failures = []
+
+    def put(self, notification, on_delivered=None, on_failed=None):
+        if self.full:
+            raise DontSendException('full')
+        self.sent.append((notification.chat_id, notification.text,
+                          on_delivered))
+        self.failures.append(on_failed)
+
+
+def record(status, date='2022-01-01T00:00:00Z'):
+    return HomeworkRecord('1', 'hw', status, date)
+
+
+class TestOutbox:
+
+    def test_commit_is_atomic_and_durable(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        queue = FakeSink()
+        outbox = Outbox(StateStore(path), lambda tenant: [queue])
+        assert outbox.commit('t', 7, 100, [(record('approved'), 'ok')]) == 1
+        assert queue.sent[0][:2] == (7, 'ok')
+        restored = StateStore(path)
+        assert restored.get_cursor('t') == 100, (
+            'Метка должна попадать в базу вместе с сообщениями'
+        )
+        assert restored.get_status('t', '1') == 'approved'
+        assert [row[2:] for row in restored.undelivered()] == [
+            ('t', '7', 'ok')]
+
+    def test_failed_commit_keeps_cursor(self, tmp_path):
+        store = StateStore(str(tmp_path / 'state.db'))
+        outbox = Outbox(store, lambda tenant: [FakeSink()])
+        outbox.commit('t', 7, 100, [])
+        store.flush()
+        with pytest.raises(sqlite3.IntegrityError):
+            store.commit('t', 200, {'1': 'approved'}, [(b'x', 7, None)])
+        assert store.get_cursor('t') == 100
+        assert StateStore(str(tmp_path / 'state.db')).get_cursor('t') == 100, (
+            'При сбое записи сообщений метка не должна сдвигаться'
+        )
+        assert store.get_status('t', '1') is None
+
+    def test_replay_only_undelivered(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        queue = FakeSink()
+        outbox = Outbox(StateStore(path), lambda tenant: [queue])
+        outbox.commit('t', 7, 100, [(record('reviewing', 'a'), 'first'),
+                                    (record('approved', 'b'), 'second')])
+        queue.sent[0][2]()
+
+        queue = FakeSink()
+        restarted = Outbox(StateStore(path), lambda tenant: [queue])
+        assert restarted.replay() == 1
+        assert [text for _, text, _ in queue.sent] == ['second'], (
+            'После сбоя должны досылаться только недоставленные сообщения'
+        )
+        assert restarted.replay() == 0, (
+            'Сообщение в очереди не должно ставиться повторно'
+        )
+        assert restarted.replay('other') == 0
+
+    def test_empty_poll_defers_cursor_write(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        store = StateStore(path)
+        outbox = Outbox(store, lambda tenant: [FakeSink()])
+        assert outbox.commit('t', 7, 100, []) == 0
+        assert store.get_cursor('t') == 100
+        assert StateStore(path).get_cursor('t') is None, (
+            'Опрос без изменений не должен писать в базу синхронно'
+        )
+        store.flush()
+        assert StateStore(path).get_cursor('t') == 100
+
+    def test_dedupe_by_digest(self, tmp_path):
+        queue = FakeSink()
+        outbox = Outbox(StateStore(str(tmp_path / 'state.db')),
+                        lambda tenant: [queue])
+        outbox.commit('t', 7, 100, [(record('approved'), 'ok')])
+        assert outbox.commit('t', 7, 101, [(record('approved'), 'ok')]) == 0
+        assert len(queue.sent) == 1, (
+            'Одна и та же смена статуса не должна отправляться дважды'
+        )
+
+    def test_full_queue_keeps_message(self, tmp_path):
+        store = StateStore(str(tmp_path / 'state.db'))
+        outbox = Outbox(store, lambda tenant: [FakeSink(full=True)])
+        outbox.commit('t', 7, 100, [(record('approved'), 'ok')])
+        outbox.sinks_for = lambda tenant: [FakeSink()]
+        assert outbox.replay('t') == 1, (
+            'Не поставленное в очередь сообщение должно остаться в outbox'
+        )
+
+    def test_failed_send_is_replayed(self, tmp_path):
+        class Bot:
+            def send_message(self, chat_id, text):
+                raise telegram.error.BadRequest('chat not found')
+
+        store = StateStore(str(tmp_path / 'state.db'))
+        queue = SendQueue(workers=1, chat_rate=100, global_rate=100)
+        sinks = [TelegramSink(Bot(), queue=queue)]
+        outbox = Outbox(store, lambda tenant: sinks)
+        queue.start()
+        outbox.commit('t', 7, 100, [(record('approved'), 'ok')])
+        assert queue.join(1)
+        queue.stop()
+        assert outbox._waiting == {}, (
+            'Отброшенное сообщение не должно оставаться в ожидании'
+        )
+        assert len(store.undelivered('t')) == 1
+        replayed = FakeSink()
+        outbox.sinks_for = lambda tenant: [replayed]
+        assert outbox.replay('t') == 1, (
+            'Отброшенное сообщение должно досылаться при replay'
+        )
+
+    def test_marks_delivered_after_send(self, tmp_path):
+        class Bot:
+            def send_message(self, chat_id, text):
+                pass
+
+        store = StateStore(str(tmp_path / 'state.db'))
+        queue = SendQueue(workers=1, chat_rate=100, global_rate=100)
+        sinks = [TelegramSink(Bot(), queue=queue)]
+        outbox = Outbox(store, lambda tenant: sinks)
+        queue.start()
+        outbox.commit('t', 7, 100, [(record('approved'), 'ok')])
+        assert queue.join(1)
+        queue.stop()
+        assert store.undelivered() == []
+        assert outbox.prune() == 0
+        outbox.retention = -1
+        assert outbox.prune() == 1
+
+    def test_replay_skips_delivered_sinks(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        student, mentors = FakeSink(), FakeSink(name='mentors')
+        outbox = Outbox(StateStore(path), lambda tenant: [student, mentors])
+        outbox.commit('t', 7, 100, [(record('approved'), 'ok')])
+        student.sent[0][2]()
+
+        student, mentors = FakeSink(), FakeSink(name='mentors')
+        restarted = Outbox(StateStore(path),
+                           lambda tenant: [student, mentors])
+        assert restarted.replay() == 1
+        assert student.sent == [], (
+            'Получатель, уже получивший сообщение, не должен получать его '
+            'повторно'
+        )
+        mentors.sent[0][2]()
+        assert restarted.store.undelivered() == [], (
+            'Сообщение доставлено, когда его получили все получатели'
+        )
+
+    def test_dropped_sink_keeps_message(self, tmp_path):
+        store = StateStore(str(tmp_path / 'state.db'))
+        student = FakeSink()
+        outbox = Outbox(store, lambda tenant: [
+            student, FakeSink(full=True, name='webhook')])
+        outbox.commit('t', 7, 100, [(record('approved'), 'ok')])
+        student.sent[0][2]()
+        assert len(store.undelivered()) == 1
+        webhook = FakeSink(name='webhook')
+        outbox.sinks_for = lambda tenant: [student, webhook]
+        assert outbox.replay() == 1
+        assert len(student.sent) == 1 and len(webhook.sent) == 1
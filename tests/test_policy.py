@@ -0,0 +1,207 @@
+import asyncio
+
+import pytest
+import requests
+import telegram
+
+import engine
+import history
+import homework
+import logs
+import metrics
+import scheduler
+import storage
+import transport
+from breaker import ErrorNotifier
+from history import HistoryStore
+from storage import StateStore
+from exceptions import (APITimeoutError, AuthError, DontSendException,
+                        MalformedJSONError, SchemaError, ServerError,
+                        StatusNot200Exception, TelegramRateLimitError)
+from policy import policy_for, report_error, retrying
+from utils import FakeClock
+
+
+def make_response(status, body=b'{"homeworks": [], "current_date": 1}'):
+    response = requests.Response()
+    response.status_code = status
+    response.reason = 'reason'
+    response._content = body
+    return response
+
+
+class TestClassification:
+
+    @pytest.mark.parametrize('status, error', [
+        (401, AuthError),
+        (403, AuthError),
+        (500, ServerError),
+        (503, ServerError),
+        (408, ServerError),
+        (404, StatusNot200Exception),
+    ])
+    def test_status(self, monkeypatch, status, error):
+        monkeypatch.setattr(transport, 'get',
+                            lambda *args, **kwargs: make_response(status))
+        with pytest.raises(error):
+            homework.request_api({'Authorization': 'OAuth x'}, 1)
+
+    def test_malformed_json(self, monkeypatch):
+        monkeypatch.setattr(transport, 'get', lambda *args, **kwargs:
+                            make_response(200, b'<html>'))
+        with pytest.raises(MalformedJSONError):
+            homework.request_api({'Authorization': 'OAuth y'}, 1)
+
+    def test_timeout(self, monkeypatch):
+        def timeout(*args, **kwargs):
+            raise requests.ReadTimeout('slow')
+
+        monkeypatch.setattr(transport, 'get', timeout)
+        with pytest.raises(APITimeoutError):
+            homework.request_api({'Authorization': 'OAuth z'}, 1)
+
+    def test_schema(self):
+        with pytest.raises(SchemaError):
+            homework.validate_response({'homeworks': {}, 'current_date': 1})
+
+
+class TestPolicy:
+
+    def test_transient_retried_with_backoff(self):
+        delays = []
+        errors = [ServerError('503'), ServerError('503')]
+
+        def flaky():
+            if errors:
+                raise errors.pop()
+            return 'ok'
+
+        assert retrying(flaky, sleep=delays.append) == 'ok'
+        assert delays == [2, 4], 'Повторы идут с удваивающейся паузой'
+
+    def test_permanent_not_retried(self):
+        calls = []
+
+        def denied():
+            calls.append(1)
+            raise AuthError('401')
+
+        with pytest.raises(AuthError):
+            retrying(denied, sleep=lambda delay: None)
+        assert len(calls) == 1, 'Постоянные ошибки не должны повторяться'
+
+    def test_deadline_covers_all_attempts(self):
+        clock = FakeClock()
+        budgets = []
+
+        def slow(deadline):
+            budgets.append(deadline)
+            clock.now += 20
+            raise APITimeoutError('timeout')
+
+        def sleep(delay):
+            clock.now += delay
+
+        with pytest.raises(APITimeoutError):
+            retrying(slow, sleep=sleep, deadline=30, clock=clock)
+        assert budgets == [30, 9], (
+            'Каждый повтор должен получать остаток общего срока, '
+            'а повтор, не успевающий до срока, не выполняется'
+        )
+
+    def test_rate_limit_waits_retry_after(self):
+        error = TelegramRateLimitError('limit', 7)
+        assert policy_for(error).delay(0, error) == 7
+        assert not policy_for(error).notify
+
+    def test_policies(self):
+        assert policy_for(AuthError('401')).stop
+        assert not policy_for(DontSendException('x')).notify
+        assert policy_for(KeyError('x')).notify
+
+    def test_report_error(self):
+        sent = []
+        notifier = ErrorNotifier()
+        assert report_error(AuthError('401'), notifier, sent.append).stop
+        report_error(DontSendException('queue'), notifier, sent.append)
+        assert sent == ['Сбой в работе программы: 401']
+
+
+class TestStopPolling:
+
+    def test_auth_error_stops_tenant(self, monkeypatch):
+        calls = []
+
+        def mock_request_api(headers, current_timestamp, timeout=None):
+            calls.append(headers['Authorization'])
+            if headers['Authorization'] == 'OAuth bad':
+                raise AuthError('401')
+            return {'homeworks': [], 'current_date': current_timestamp}
+
+        class MockBot:
+            def __init__(self, token=None, **kwargs):
+                pass
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                pass
+
+        monkeypatch.setattr(homework, 'request_api', mock_request_api)
+        monkeypatch.setattr(telegram, 'Bot', MockBot)
+        tenants = [engine.Tenant('bad', 'bad', 1, '1:x'),
+                   engine.Tenant('good', 'good', 2, '1:x')]
+        polling = engine.PollingEngine(
+            tenants, retry_time=0.02,
+            scheduler_options={'max_interval': 0.02})
+
+        async def run():
+            task = asyncio.ensure_future(polling.run())
+            await asyncio.sleep(0.3)
+            task.cancel()
+
+        asyncio.run(run())
+        assert calls.count('OAuth bad') == 1, (
+            'После ошибки авторизации студента больше не опрашивают'
+        )
+        assert calls.count('OAuth good') > 1
+        assert polling.stopped == {'bad'}
+
+    def test_auth_error_stops_main(self, monkeypatch):
+        replies = [
+            {'homeworks': [{'homework_name': 'hw.zip', 'status': 'approved'}],
+             'current_date': 100},
+            AuthError('401'),
+        ]
+        stores = []
+        sent = []
+
+        def mock_request_api(headers, current_timestamp, timeout=None):
+            reply = replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+
+        class MockBot:
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                sent.append(text)
+
+        def state_store():
+            stores.append(StateStore(':memory:'))
+            return stores[-1]
+
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        monkeypatch.setattr(homework, 'request_api', mock_request_api)
+        monkeypatch.setattr(transport, 'make_bot', lambda token: MockBot())
+        monkeypatch.setattr(logs, 'setup_logging', lambda: None)
+        monkeypatch.setattr(storage, 'StateStore', state_store)
+        monkeypatch.setattr(history, 'HistoryStore',
+                            lambda: HistoryStore(':memory:'))
+        monkeypatch.setattr(metrics, 'ROUTES', dict(metrics.ROUTES))
+        monkeypatch.setattr(scheduler.PollScheduler, 'wait', lambda self: None)
+        homework.main()
+        assert not replies, 'После ошибки авторизации main должен завершиться'
+        assert stores[0].get_cursor(str(12345), 0) == 100, (
+            'Первый цикл опроса должен пройти целиком'
+        )
+        assert 'Сбой в работе программы: 401' in sent
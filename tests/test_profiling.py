@@ -0,0 +1,64 @@
+import os
+import signal
+
+import pytest
+
+import metrics
+from profiling import Profiler
+
+
+class TestProfiler:
+
+    def test_disabled_is_noop(self, tmp_path):
+        profiler = Profiler('', str(tmp_path / 'profiles'))
+        for _ in range(20):
+            profiler.tick()
+        assert profiler._profile is None
+        assert not os.path.exists(tmp_path / 'profiles'), (
+            'Выключенное профилирование не должно ничего писать'
+        )
+
+    def test_cpu_dumps(self, tmp_path):
+        profiler = Profiler('cpu', str(tmp_path), cpu_every=2)
+        for _ in range(4):
+            sum(range(1000))
+            profiler.tick()
+        dumps = [name for name in os.listdir(tmp_path)
+                 if name.endswith('.prof')]
+        assert len(dumps) == 2, 'Профиль должен писаться раз в cpu_every'
+        profiler.toggle()
+        profiler.tick()
+        assert profiler._profile is None
+
+    def test_memory_diff(self, tmp_path):
+        profiler = Profiler('memory', str(tmp_path), memory_every=1)
+        leak = []
+        for _ in range(3):
+            leak.append(bytearray(100000))
+            profiler.tick()
+        profiler.toggle()
+        profiler.tick()
+        diffs = sorted(name for name in os.listdir(tmp_path)
+                       if name.startswith('memory'))
+        assert len(diffs) == 2, 'Первый снимок служит базой для сравнения'
+        text = (tmp_path / diffs[-1]).read_text(encoding='utf-8')
+        assert 'test_profiling.py' in text, (
+            'Рост памяти должен указывать на строку с утечкой'
+        )
+
+    @pytest.mark.skipif(not hasattr(signal, 'SIGUSR2'),
+                        reason='нужен SIGUSR2')
+    def test_signal_toggles(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(metrics, 'ROUTES', dict(metrics.ROUTES))
+        previous = signal.getsignal(signal.SIGUSR2)
+        profiler = Profiler('', str(tmp_path), cpu_every=1)
+        profiler.install()
+        try:
+            os.kill(os.getpid(), signal.SIGUSR2)
+            profiler.tick()
+            assert metrics.ROUTES['/profile']()[2] == 'cpu,memory 1\n'
+            os.kill(os.getpid(), signal.SIGUSR2)
+            profiler.tick()
+            assert metrics.ROUTES['/profile']()[2] == 'off 0\n'
+        finally:
+            signal.signal(signal.SIGUSR2, previous)
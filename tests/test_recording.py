@@ -0,0 +1,123 @@
+import json
+
+import pytest
+import requests
+import telegram
+
+import recording
+import transport
+from utils import FakeClock
+
+
+def make_response(body, status=200, etag=None):
+    response = requests.Response()
+    response.status_code = status
+    response.reason = 'OK'
+    response._content = body
+    if etag:
+        response.headers['ETag'] = etag
+    return response
+
+
+class FakeBot:
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    path = str(tmp_path / 'traffic.ndjson')
+    recorder = recording.Recorder(path, clock=FakeClock(step=0.5))
+    body = json.dumps({'homeworks': [], 'current_date': 5}).encode()
+
+    def get(url, **kwargs):
+        if kwargs['params']['from_date'] == 2:
+            raise requests.ConnectionError('down')
+        return make_response(body, etag='"v1"')
+
+    headers = {'Authorization': 'OAuth secret'}
+    recorder.get(get, 'http://api/', headers=headers,
+                 params={'from_date': 1})
+    with pytest.raises(requests.ConnectionError):
+        recorder.get(get, 'http://api/', headers=headers,
+                     params={'from_date': 2})
+    bot = recorder.bot(FakeBot([telegram.error.RetryAfter(3)]))
+    with pytest.raises(telegram.error.RetryAfter):
+        bot.send_message(chat_id=7, text='hi')
+    bot.send_message(chat_id=7, text='hi')
+    recorder.close()
+    return path
+
+
+class TestRecording:
+
+    def test_record_format(self, recorded):
+        with open(recorded, encoding='utf-8') as file:
+            text = file.read()
+        assert 'secret' not in text, 'Токен не должен попадать в запись'
+        events = recording.load(recorded)
+        assert [event['kind'] for event in events] == [
+            'http', 'http', 'telegram', 'telegram']
+        assert events[0]['duration'] == 0.5
+        assert events[0]['headers'] == {'ETag': '"v1"'}
+        assert events[1]['error'] == 'ConnectionError'
+        assert events[2]['retry_after'] == 3
+
+    def test_replay(self, recorded):
+        sleeps = []
+        player = recording.Player(recording.load(recorded), speed=10,
+                                  sleep=sleeps.append)
+        headers = {'Authorization': 'OAuth secret'}
+        response = player.get('http://api/', headers=headers)
+        assert response.status_code == 200
+        assert response.json() == {'homeworks': [], 'current_date': 5}
+        assert response.headers['etag'] == '"v1"'
+        with pytest.raises(requests.ConnectionError):
+            player.get('http://api/', headers=headers)
+        with pytest.raises(LookupError):
+            player.get('http://api/', headers=headers)
+        bot = player.bot('token')
+        with pytest.raises(telegram.error.RetryAfter):
+            bot.send_message(chat_id=7, text='hi')
+        bot.send_message(chat_id=7, text='hi')
+        assert sleeps == [0.05] * 4, (
+            'Задержки должны воспроизводиться с заданным ускорением'
+        )
+
+    def test_replay_unknown_tenant_in_order(self, recorded):
+        player = recording.Player(recording.load(recorded), speed=0)
+        response = player.get('http://api/',
+                              headers={'Authorization': 'OAuth other'})
+        assert response.status_code == 200, (
+            'Для незнакомого студента выдаётся следующий записанный ответ'
+        )
+
+    def test_replay_headers_select_tenant(self, recorded):
+        events = recording.load(recorded)
+        other = dict(events[0], tenant='other', body=json.dumps(
+            {'homeworks': [], 'current_date': 9}))
+        player = recording.Player([other, *events], speed=0)
+        response = player.get(
+            'http://api/', headers=player.headers(events[0]['tenant']))
+        assert response.json()['current_date'] == 5, (
+            'Запрос по заголовкам из headers должен получать ответ, '
+            'записанный для того же студента'
+        )
+        response = player.get('http://api/',
+                              headers=player.headers('other'))
+        assert response.json()['current_date'] == 9
+
+    def test_transport_uses_player(self, recorded, monkeypatch):
+        player = recording.Player(recording.load(recorded), speed=0)
+        monkeypatch.setattr(recording, 'player', lambda: player)
+        response = transport.get('http://api/', params={})
+        assert response.json()['current_date'] == 5
+        assert isinstance(transport.make_bot('1234:abcdefg'),
+                          recording.ReplayBot)
@@ -0,0 +1,56 @@
+from scheduler import PollScheduler
+from utils import FakeClock
+
+
+def make_scheduler(clock, **kwargs):
+    kwargs.setdefault('jitter', 0)
+    return PollScheduler(600, max_interval=1200, growth=2, clock=clock,
+                         rng=lambda low, high: 0, **kwargs)
+
+
+class TestPollScheduler:
+
+    def test_no_drift(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        clock.now = 7
+        scheduler.success(active=True)
+        assert scheduler.delay() == 593, (
+            'Следующий опрос должен отсчитываться от дедлайна, '
+            'а не от окончания запроса'
+        )
+
+    def test_quiet_period_grows_interval(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        scheduler.success()
+        assert scheduler.deadline == 1200
+        scheduler.success()
+        assert scheduler.deadline == 2400, (
+            'Интервал не должен превышать max_interval'
+        )
+        scheduler.success(active=True)
+        assert scheduler.deadline == 3000
+
+    def test_error_backoff(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, error_backoff=5)
+        delays = []
+        for _ in range(10):
+            scheduler.failure()
+            delays.append(scheduler.delay())
+        assert delays[:4] == [5, 10, 20, 40], (
+            'После ошибки повтор должен идти с экспоненциальной паузой'
+        )
+        assert max(delays) == 600
+        clock.now = 100
+        scheduler.success(active=True)
+        assert scheduler.deadline == 700, (
+            'После восстановления интервал отсчитывается заново'
+        )
+
+    def test_jitter(self):
+        scheduler = PollScheduler(100, jitter=0.1, clock=lambda: 0,
+                                  rng=lambda low, high: high)
+        scheduler.success(active=True)
+        assert round(scheduler.deadline, 6) == 110
@@ -0,0 +1,124 @@
+import pytest
+
+import engine
+import homework
+import sharding
+import sinks
+from history import HistoryStore
+from storage import StateStore
+
+
+def make_tenants(count):
+    return [engine.Tenant(str(i), f'token-{i}', i) for i in range(count)]
+
+
+class TestHashRing:
+
+    def test_node_for_is_stable(self):
+        first = sharding.HashRing(['a', 'b', 'c'])
+        second = sharding.HashRing(['c', 'a', 'b'])
+        keys = [str(i) for i in range(1000)]
+        assert ([first.node_for(key) for key in keys]
+                == [second.node_for(key) for key in keys]), (
+            'Распределение ключей не должно зависеть от порядка узлов'
+        )
+
+    def test_keys_are_balanced(self):
+        shards = sharding.assign(make_tenants(10000), 4)
+        sizes = [len(tenants) for tenants in shards.values()]
+        assert sum(sizes) == 10000, 'Каждый студент должен попасть в шард'
+        assert min(sizes) > 10000 / 4 * 0.7, (
+            f'Шарды должны быть примерно одного размера: {sizes}'
+        )
+
+    def test_adding_worker_moves_about_one_nth(self):
+        keys = [str(i) for i in range(10000)]
+        ring = sharding.HashRing(sharding.worker_name(i) for i in range(4))
+        before = {key: ring.node_for(key) for key in keys}
+        ring.add(sharding.worker_name(4))
+        moved = [key for key in keys if ring.node_for(key) != before[key]]
+        assert all(ring.node_for(key) == sharding.worker_name(4)
+                   for key in moved), (
+            'Ключи должны переезжать только на новый узел'
+        )
+        assert len(moved) < len(keys) / 5 * 1.5, (
+            f'Переехать должно около 1/5 ключей, переехало {len(moved)}'
+        )
+
+    def test_removing_worker_moves_only_its_keys(self):
+        keys = [str(i) for i in range(5000)]
+        ring = sharding.HashRing(['a', 'b', 'c'])
+        before = {key: ring.node_for(key) for key in keys}
+        ring.remove('b')
+        for key in keys:
+            if before[key] != 'b':
+                assert ring.node_for(key) == before[key], (
+                    'Ключи оставшихся узлов не должны переезжать'
+                )
+            else:
+                assert ring.node_for(key) in ('a', 'c')
+
+    def test_empty_ring(self):
+        try:
+            sharding.HashRing().node_for('key')
+        except LookupError:
+            return
+        assert False, 'Пустое кольцо должно бросать LookupError'
+
+
+class TestSupervisor:
+
+    def test_restarts_dead_worker(self, monkeypatch):
+        started = []
+
+        class DeadProcess:
+            name = 'worker-0'
+            exitcode = 1
+
+            def is_alive(self):
+                return False
+
+        supervisor = sharding.Supervisor(make_tenants(10), workers=2)
+        monkeypatch.setattr(supervisor, 'start', started.append)
+        supervisor.processes = {0: DeadProcess()}
+        supervisor.check()
+        assert started == [0], 'Упавший обработчик должен перезапускаться'
+
+
+class TestRunWorker:
+
+    @pytest.fixture
+    def worker(self, monkeypatch):
+        engines = []
+
+        def polling_engine(*args, **kwargs):
+            polling = engine.PollingEngine(*args, **kwargs)
+            engines.append(polling)
+            return polling
+
+        monkeypatch.setattr(sharding, 'PollingEngine', polling_engine)
+        monkeypatch.setattr(sharding, 'setup_logging', lambda path: None)
+        monkeypatch.setattr(sharding, 'StateStore',
+                            lambda: StateStore(':memory:'))
+        monkeypatch.setattr(sharding, 'HistoryStore',
+                            lambda: HistoryStore(':memory:'))
+        monkeypatch.setattr(sharding, 'start_keeper', lambda names: None)
+        monkeypatch.setattr(sharding.asyncio, 'run', lambda coro: coro.close())
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '123456:token')
+        monkeypatch.setattr(sinks, 'MENTOR_CHAT_ID', '42')
+        sharding.run_worker(0, make_tenants(2), None)
+        polling = engines[0]
+        yield polling
+        polling.watchdog.stop()
+        for sink in polling.extra_sinks:
+            sink.stop()
+
+    def test_extra_sinks_are_started(self, worker):
+        assert [sink.name for sink in worker.extra_sinks] == ['mentors'], (
+            'Обработчик шарда должен рассылать уведомления и наставникам'
+        )
+
+    def test_history_is_recorded(self, worker):
+        assert isinstance(worker.history, HistoryStore), (
+            'Обработчик шарда должен записывать историю статусов'
+        )
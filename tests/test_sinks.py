@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+
+import sinks
+import transport
+from delivery import SendQueue
+from exceptions import DontSendException
+from sinks import Notification, WebhookSink
+
+
+class MockResponse:
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f'status {self.status_code}')
+
+
+def notification(text='ok'):
+    return Notification('t', 7, text)
+
+
+class TestWebhookSink:
+
+    def test_posts_json(self, monkeypatch):
+        posted = []
+
+        def mock_post(url, **kwargs):
+            posted.append((url, kwargs))
+            return MockResponse()
+
+        monkeypatch.setattr(transport, 'post', mock_post)
+        delivered = threading.Event()
+        sink = WebhookSink('http://hook', timeout=3, workers=1)
+        sink.start()
+        sink.put(notification(), delivered.set)
+        assert delivered.wait(1)
+        sink.stop()
+        url, kwargs = posted[0]
+        assert url == 'http://hook'
+        assert kwargs == {'json': {'tenant': 't', 'chat_id': 7,
+                                   'text': 'ok'}, 'timeout': 3}
+
+    def test_retries_failed_post(self, monkeypatch):
+        statuses = [500, 502, 200]
+        monkeypatch.setattr(transport, 'post',
+                            lambda url, **kwargs: MockResponse(
+                                statuses.pop(0)))
+        delivered = threading.Event()
+        sink = WebhookSink('http://hook', backoff=0.01, workers=1)
+        sink.start()
+        sink.put(notification(), delivered.set)
+        assert delivered.wait(1), 'Webhook должен повторять неудачные запросы'
+        sink.stop()
+        assert statuses == []
+
+    def test_gives_up_after_attempts(self, monkeypatch):
+        monkeypatch.setattr(transport, 'post',
+                            lambda url, **kwargs: MockResponse(500))
+        failed = threading.Event()
+        sink = WebhookSink('http://hook', backoff=0.01, max_attempts=2,
+                           workers=1)
+        sink.start()
+        sink.put(notification(), on_failed=failed.set)
+        assert failed.wait(1), (
+            'Webhook должен сообщать об уведомлении, от которого отказался'
+        )
+        sink.stop()
+
+    def test_full_queue_drops(self):
+        sink = WebhookSink('http://hook', maxsize=1)
+        sink.put(notification())
+        with pytest.raises(DontSendException):
+            sink.put(notification())
+
+
+class TestFanOut:
+
+    def test_slow_sink_does_not_delay_others(self, monkeypatch):
+        release = threading.Event()
+
+        def slow_post(url, **kwargs):
+            release.wait(5)
+            return MockResponse()
+
+        class Bot:
+            def __init__(self):
+                self.sent = threading.Event()
+
+            def send_message(self, chat_id, text, **kwargs):
+                self.sent.set()
+
+        monkeypatch.setattr(transport, 'post', slow_post)
+        bot = Bot()
+        fast = sinks.TelegramSink(bot)
+        slow = WebhookSink('http://hook', workers=1)
+        fast.start()
+        slow.start()
+        start = time.monotonic()
+        for sink in (slow, fast):
+            sink.put(notification())
+        assert time.monotonic() - start < 0.5, (
+            'Постановка в очередь не должна ждать отправки'
+        )
+        assert bot.sent.wait(1), (
+            'Медленный получатель не должен задерживать остальных'
+        )
+        release.set()
+        slow.stop()
+        fast.stop()
+
+    def test_extra_sinks_from_settings(self, monkeypatch):
+        monkeypatch.setattr(sinks, 'MENTOR_CHAT_ID', '-100')
+        monkeypatch.setattr(sinks, 'WEBHOOK_URL', None)
+        extra = sinks.start_extra_sinks('bot')
+        assert [sink.name for sink in extra] == ['mentors']
+        assert extra[0].timeout == sinks.MENTOR_SEND_TIMEOUT
+        for sink in extra:
+            sink.stop()
+
+    def test_mentors_share_queue(self, monkeypatch):
+        monkeypatch.setattr(sinks, 'MENTOR_CHAT_ID', '-100')
+        monkeypatch.setattr(sinks, 'WEBHOOK_URL', None)
+        queue = SendQueue()
+        extra = sinks.start_extra_sinks('bot', queue)
+        assert extra[0].queue is queue, (
+            'Сообщения наставникам должны идти через общую очередь бота'
+        )
+        extra[0].put(notification())
+        message = queue._pending['-100'][0]
+        assert message.timeout == sinks.MENTOR_SEND_TIMEOUT, (
+            'Таймаут отправки наставникам должен задаваться для сообщения'
+        )
+        for sink in extra:
+            sink.stop()
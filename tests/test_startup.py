@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+
+class TestStartup:
+
+    def test_import_is_lazy(self):
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, homework; homework.check_tokens(); '
+             'print(" ".join(sys.modules))'],
+            cwd=ROOT, capture_output=True, text=True, check=True)
+        modules = result.stdout.split()
+        for name in ('telegram', 'requests', 'dotenv', 'http.server',
+                     'sqlite3'):
+            assert name not in modules, (
+                f'Импорт homework не должен подгружать {name}'
+            )
+
+    def test_light_client_skips_telegram(self):
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, engine, sharding; print(" ".join(sys.modules))'],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+            env=dict(os.environ, TELEGRAM_CLIENT='light'))
+        assert 'telegram' not in result.stdout.split(), (
+            'С легковесным клиентом engine и sharding не должны '
+            'подгружать python-telegram-bot'
+        )
@@ -0,0 +1,30 @@
+from storage import StateStore
+
+
+class TestStateStore:
+
+    def test_resume_after_restart(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        store = StateStore(path)
+        store.set_cursor('chat', 1000)
+        store.set_status('chat', 'hw1', 'reviewing')
+        assert store.get_cursor('chat') == 1000, (
+            'Сохранённая метка должна сразу читаться из памяти'
+        )
+        store.close()
+
+        restored = StateStore(path)
+        assert restored.get_cursor('chat') == 1000, (
+            'После перезапуска опрос должен продолжаться с сохранённой метки'
+        )
+        assert restored.get_status('chat', 'hw1') == 'reviewing'
+        assert restored.get_cursor('other', 5) == 5
+        assert restored.get_status('chat', 'hw2') is None
+
+    def test_background_flush(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        store = StateStore(path, flush_interval=0.01)
+        store.start()
+        store.set_cursor('chat', 42)
+        store.close()
+        assert StateStore(path).get_cursor('chat') == 42
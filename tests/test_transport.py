@@ -0,0 +1,31 @@
+import transport
+
+
+class TestTransport:
+
+    def test_session_is_shared(self):
+        assert transport.get_session() is transport.get_session(), (
+            'Все запросы должны использовать одну сессию'
+        )
+
+    def test_get_sets_timeout(self, monkeypatch):
+        calls = []
+
+        def mock_get(url, **kwargs):
+            calls.append(kwargs)
+
+        monkeypatch.setattr(transport.get_session(), 'get', mock_get)
+        transport.get('http://localhost/', params={})
+        transport.get('http://localhost/', timeout=1)
+        assert calls[0]['timeout'] == (transport.HTTP_CONNECT_TIMEOUT,
+                                       transport.HTTP_READ_TIMEOUT), (
+            'Запрос без явного таймаута должен получать таймауты из настроек'
+        )
+        assert calls[1]['timeout'] == 1
+
+    def test_bots_share_request(self):
+        first = transport.make_bot('1234:abcdefg')
+        second = transport.make_bot('5678:hijklmn')
+        assert first.request is second.request, (
+            'Боты должны использовать общий пул соединений с Телеграм'
+        )
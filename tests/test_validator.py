@@ -0,0 +1,47 @@
+import pytest
+
+from exceptions import DontSendException
+from validator import HomeworkRecord, ResponseValidator, loads
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+class TestResponseValidator:
+
+    validator = ResponseValidator(STATUSES)
+
+    def test_records(self):
+        current_date, records = self.validator.validate({
+            'homeworks': [
+                {'id': 7, 'homework_name': 'hw', 'status': 'approved',
+                 'date_updated': '2022-01-01T00:00:00Z'},
+                {'homework_name': 'other', 'status': 'reviewing'},
+            ],
+            'current_date': 123,
+        })
+        assert current_date == 123
+        assert records == [
+            HomeworkRecord('7', 'hw', 'approved', '2022-01-01T00:00:00Z'),
+            HomeworkRecord('other', 'other', 'reviewing', ''),
+        ]
+
+    @pytest.mark.parametrize('response, error', [
+        ([], TypeError),
+        ({}, Exception),
+        ({'homeworks': []}, Exception),
+        ({'homeworks': {}, 'current_date': 1}, DontSendException),
+        ({'homeworks': [{'status': 'approved'}], 'current_date': 1},
+         KeyError),
+        ({'homeworks': [{'homework_name': 'hw'}], 'current_date': 1},
+         KeyError),
+        ({'homeworks': [{'homework_name': 'hw', 'status': 'unknown'}],
+          'current_date': 1}, ValueError),
+        ({'homeworks': ['hw'], 'current_date': 1}, TypeError),
+    ])
+    def test_invalid(self, response, error):
+        with pytest.raises(error):
+            self.validator.validate(response)
+
+    def test_loads(self):
+        assert loads(b'{"homeworks": [], "current_date": 1}') == {
+            'homeworks': [], 'current_date': 1}
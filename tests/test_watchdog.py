@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import metrics
+from utils import FakeClock
+from watchdog import RESTART_EXIT_CODE, Watchdog
+
+
+class TestWatchdog:
+
+    def test_stall_and_recovery(self):
+        clock = FakeClock()
+        watchdog = Watchdog(clock=clock)
+        watchdog.expect('t', 10)
+        assert watchdog.readyz()[0] == 503, (
+            'Пока цикл не прошёл ни разу, бот не готов'
+        )
+        watchdog.beat('t', 10)
+        assert watchdog.healthz()[0] == 200
+        assert watchdog.readyz()[0] == 200
+        clock.now = 11
+        assert watchdog.check() == ['t']
+        assert watchdog.check() == [], 'Зависание сообщается один раз'
+        assert watchdog.healthz() == (503, 'text/plain', 'stalled: t\n')
+        watchdog.beat('t', 10)
+        assert watchdog.healthz()[0] == 200
+
+    def test_paused_loop_is_not_stalled(self):
+        clock = FakeClock()
+        watchdog = Watchdog(clock=clock)
+        with watchdog.paused('t', 5):
+            clock.now = 1000
+            assert watchdog.check() == [], (
+                'Ожидание аренды не должно считаться зависанием'
+            )
+        clock.now = 1006
+        assert watchdog.check() == ['t']
+
+    def test_dumps_stack_of_stuck_thread(self):
+        watchdog = Watchdog(interval=0.01)
+        release = threading.Event()
+
+        def stuck_loop():
+            watchdog.expect('stuck', 0)
+            release.wait(5)
+
+        thread = threading.Thread(target=stuck_loop)
+        thread.start()
+        time.sleep(0.05)
+        stack = watchdog.stack(watchdog._loops['stuck'])
+        release.set()
+        thread.join()
+        assert 'stuck_loop' in stack, (
+            'В лог должен попадать стек зависшего потока'
+        )
+
+    def test_dumps_task_stack(self):
+        watchdog = Watchdog()
+
+        async def tenant_loop():
+            watchdog.expect('t', 0)
+            await asyncio.sleep(0.05)
+
+        async def run():
+            task = asyncio.ensure_future(tenant_loop())
+            await asyncio.sleep(0.01)
+            stack = watchdog.stack(watchdog._loops['t'])
+            await task
+            return stack
+
+        assert 'tenant_loop' in asyncio.run(run())
+
+    def test_restart_exits(self):
+        clock = FakeClock()
+        codes = []
+        watchdog = Watchdog(restart=True, clock=clock, exit=codes.append)
+        watchdog.expect('t', 1)
+        clock.now = 2
+        watchdog.check()
+        assert codes == [RESTART_EXIT_CODE]
+
+    def test_routes(self, monkeypatch):
+        monkeypatch.setattr(metrics, 'ROUTES', dict(metrics.ROUTES))
+        watchdog = Watchdog(interval=60)
+        watchdog.start()
+        watchdog.beat('t', 60)
+        assert metrics.ROUTES['/healthz']()[0] == 200
+        assert metrics.ROUTES['/readyz']()[0] == 200
+        watchdog.stop()
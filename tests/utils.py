@@ -37,3 +37,15 @@ def check_default_var_exists(scope: ModuleType, var_name: str) -> None:
         f'{var_name} должна быть переменной, а не функцией.'
     )
 
+
+
+class FakeClock:
+    """Ручные часы для тестов: время двигают через now или step."""
+
+    def __init__(self, now: float = 0.0, step: float = 0.0):
+        self.now = now
+        self.step = step
+
+    def __call__(self) -> float:
+        self.now += self.step
+        return self.now
@@ -0,0 +1,130 @@
+import os
+import threading
+from typing import TYPE_CHECKING
+
+import recording
+
+if TYPE_CHECKING:
+    import requests
+    from botapi import BotClient
+    import telegram
+    from telegram.utils.request import Request
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+TELEGRAM_BASE_URL = os.getenv('TELEGRAM_BASE_URL')
+
+_lock = threading.Lock()
+_session = None
+_telegram_request = None
+_telegram_client = None
+
+
+def get_session() -> 'requests.Session':
+    """Возвращает общую сессию с пулом постоянных соединений.
+
+    requests импортируется при первом обращении, а не при запуске.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE,
+                                      pool_maxsize=HTTP_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def get(url: str, **kwargs) -> 'requests.Response':
+    """Выполняет GET-запрос через общую сессию с таймаутами.
+
+    Если задан RECORD_FILE или REPLAY_FILE, запрос записывается или
+    обслуживается записью (см. recording).
+    """
+    kwargs.setdefault('timeout', (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    player = recording.player()
+    if player is not None:
+        return player.get(url, **kwargs)
+    recorder = recording.recorder()
+    if recorder is not None:
+        return recorder.get(get_session().get, url, **kwargs)
+    return get_session().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> 'requests.Response':
+    """Выполняет POST-запрос через общую сессию с таймаутами."""
+    kwargs.setdefault('timeout', (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    return get_session().post(url, **kwargs)
+
+
+def telegram_request() -> 'Request':
+    """Возвращает общий для всех ботов пул соединений с Телеграм."""
+    global _telegram_request
+    if _telegram_request is None:
+        with _lock:
+            if _telegram_request is None:
+                from telegram.utils.request import Request
+
+                _telegram_request = Request(
+                    con_pool_size=HTTP_POOL_SIZE,
+                    connect_timeout=HTTP_CONNECT_TIMEOUT,
+                    read_timeout=HTTP_READ_TIMEOUT)
+    return _telegram_request
+
+
+def telegram_client() -> 'BotClient':
+    """Возвращает общий для всех ботов легковесный клиент Bot API."""
+    global _telegram_client
+    if _telegram_client is None:
+        with _lock:
+            if _telegram_client is None:
+                from botapi import BotClient
+
+                _telegram_client = BotClient()
+    return _telegram_client
+
+
+def make_bot(token: str) -> 'telegram.Bot':
+    """Создаёт бота, использующего общий пул соединений.
+
+    При TELEGRAM_CLIENT=light это легковесный botapi.Bot поверх общей
+    сессии requests, иначе telegram.Bot. python-telegram-bot импортируется
+    только здесь: его дерево зависимостей велико, а для проверки токенов и
+    опроса API он не нужен.
+    """
+    import botapi
+    player = recording.player()
+    if player is not None:
+        return player.bot(token)
+    if botapi.TELEGRAM_CLIENT == 'light':
+        bot = botapi.Bot(token, telegram_client())
+    else:
+        import telegram
+        bot = telegram.Bot(token=token, base_url=TELEGRAM_BASE_URL,
+                           request=telegram_request())
+    recorder = recording.recorder()
+    if recorder is not None:
+        return recorder.bot(bot)
+    return bot
+
+
+def close() -> None:
+    """Закрывает все открытые соединения."""
+    global _session, _telegram_request, _telegram_client
+    with _lock:
+        if _telegram_client is not None:
+            _telegram_client.close()
+        if _session is not None:
+            _session.close()
+        if _telegram_request is not None:
+            _telegram_request.stop()
+        _session = None
+        _telegram_request = None
+        _telegram_client = None
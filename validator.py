@@ -0,0 +1,95 @@
+import functools
+import json
+from typing import Callable, NamedTuple
+
+from exceptions import DontSendException
+
+
+@functools.lru_cache(maxsize=None)
+def decoder() -> Callable:
+    """Возвращает самый быстрый из установленных декодеров JSON.
+
+    orjson тянет за собой uuid и zoneinfo, поэтому импортируется при первом
+    разборе ответа, а не при запуске бота.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+def loads(body: bytes):
+    """Разбирает JSON самым быстрым из установленных декодеров."""
+    return decoder()(body)
+
+
+class HomeworkRecord(NamedTuple):
+    """Проверенная запись о домашней работе."""
+
+    key: str
+    name: str
+    status: str
+    date_updated: str
+
+
+class ResponseValidator:
+    """Проверяет ответ API и все работы в нём за один проход.
+
+    Схема (обязательные ключи и допустимые статусы) разбирается один раз
+    при создании, а проверка возвращает компактные записи HomeworkRecord.
+    check_response и parse_status из homework — обёртки над homeworks и
+    record.
+    """
+
+    def __init__(self, statuses, envelope=('homeworks', 'current_date'),
+                 required=('homework_name', 'status')) -> None:
+        self.statuses = frozenset(statuses)
+        self.envelope = tuple(envelope)
+        self.required = tuple(required)
+
+    def homeworks(self, response) -> list:
+        """Проверяет ответ без разбора работ и возвращает их список."""
+        if not isinstance(response, dict):
+            raise TypeError('Ответ не в формате словаря')
+        for key in self.envelope:
+            if response.get(key) is None:
+                raise Exception(f'отсутствует ключ {key}')
+        homeworks = response['homeworks']
+        if not isinstance(homeworks, list):
+            raise DontSendException('Работы приходят не в виде списка')
+        return homeworks
+
+    def validate(self, response) -> tuple:
+        """Возвращает current_date и список записей о работах."""
+        homeworks = self.homeworks(response)
+        return response['current_date'], self._records(homeworks)
+
+    def record(self, homework) -> HomeworkRecord:
+        """Проверяет одну работу и возвращает запись о ней."""
+        return self._records([homework])[0]
+
+    def _records(self, homeworks: list) -> list:
+        statuses = self.statuses
+        name_key, status_key = self.required
+        make = HomeworkRecord._make
+        records = []
+        append = records.append
+        for homework in homeworks:
+            try:
+                name = homework[name_key]
+                status = homework[status_key]
+            except KeyError as error:
+                raise KeyError(
+                    f'В словаре отсутствует ключ {error.args[0]}') from None
+            except TypeError:
+                raise TypeError('Работа не в формате словаря') from None
+            if name is None:
+                raise KeyError(f'В словаре отсутствует ключ {name_key}')
+            if status not in statuses:
+                if status is None:
+                    raise KeyError(f'В словаре отсутствует ключ {status_key}')
+                raise ValueError('Недокументированный статус домашней работы')
+            append(make((str(homework.get('id') or name), name, status,
+                         homework.get('date_updated') or '')))
+        return records
@@ -0,0 +1,170 @@
+import asyncio
+import contextlib
+import io
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Any
+
+import metrics
+
+WATCHDOG_INTERVAL = float(os.getenv('WATCHDOG_INTERVAL', 10))
+WATCHDOG_GRACE = float(os.getenv('WATCHDOG_GRACE', 120))
+WATCHDOG_RESTART = os.getenv('WATCHDOG_RESTART', '') not in ('', '0')
+RESTART_EXIT_CODE = 70
+
+LOOP_STALLS = metrics.REGISTRY.counter(
+    'homework_loop_stalls_total', 'Циклы опроса, пропустившие срок',
+    ('loop',))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Heartbeat:
+    """Последний пульс цикла опроса."""
+
+    deadline: float
+    thread: int
+    task: Any = None
+    beats: int = 0
+
+
+def current_task() -> Any:
+    """Возвращает текущую задачу asyncio или None вне цикла событий."""
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+class Watchdog:
+    """Следит, чтобы циклы опроса не зависали.
+
+    Каждый цикл вызывает beat с временем, за которое он обязан прийти
+    снова. Фоновый поток раз в interval секунд ищет пропустившие срок
+    циклы, пишет в лог стек их потока и задачи asyncio и, если задан
+    restart, завершает процесс, чтобы платформа или Supervisor запустили
+    его заново. /healthz и /readyz отвечают из памяти.
+    """
+
+    def __init__(self, interval: float = WATCHDOG_INTERVAL,
+                 restart: bool = WATCHDOG_RESTART, clock=time.monotonic,
+                 exit=os._exit) -> None:
+        self.interval = interval
+        self.restart = restart
+        self._clock = clock
+        self._exit = exit
+        self._loops = {}
+        self._starting = set()
+        self._stalled = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def expect(self, name: str, timeout: float) -> None:
+        """Ждёт пульса цикла name не позже чем через timeout секунд."""
+        heartbeat = self._loops.get(name)
+        deadline = self._clock() + timeout
+        if heartbeat is None:
+            self._loops[name] = Heartbeat(deadline, threading.get_ident(),
+                                          current_task())
+            self._starting.add(name)
+        else:
+            heartbeat.deadline = deadline
+
+    def beat(self, name: str, timeout: float) -> None:
+        """Отмечает завершённый цикл и срок следующего."""
+        self.expect(name, timeout)
+        heartbeat = self._loops[name]
+        heartbeat.beats += 1
+        heartbeat.thread = threading.get_ident()
+        heartbeat.task = current_task()
+        self._starting.discard(name)
+        if name in self._stalled:
+            self._stalled.discard(name)
+            logger.warning('Цикл %s снова работает', name)
+
+    def forget(self, name: str) -> None:
+        """Перестаёт следить за остановленным циклом."""
+        self._loops.pop(name, None)
+        self._starting.discard(name)
+        self._stalled.discard(name)
+
+    @contextlib.contextmanager
+    def paused(self, name: str, timeout: float = WATCHDOG_GRACE):
+        """Не ждёт пульса внутри блока, например пока нет аренды."""
+        self.expect(name, math.inf)
+        try:
+            yield
+        finally:
+            self.expect(name, timeout)
+
+    def stack(self, heartbeat: Heartbeat) -> str:
+        """Возвращает стек потока и задачи asyncio зависшего цикла."""
+        text = io.StringIO()
+        frame = sys._current_frames().get(heartbeat.thread)
+        if frame is not None:
+            text.write(''.join(traceback.format_stack(frame)))
+        task = heartbeat.task
+        if task is not None and not task.done():
+            task.print_stack(file=text)
+        return text.getvalue()
+
+    def check(self) -> list:
+        """Возвращает циклы, только что пропустившие срок."""
+        now = self._clock()
+        stalled = []
+        for name, heartbeat in list(self._loops.items()):
+            if name in self._stalled or now <= heartbeat.deadline:
+                continue
+            self._stalled.add(name)
+            stalled.append(name)
+            LOOP_STALLS.labels(name).inc()
+            logger.error('Цикл %s завис на %.0f с\n%s', name,
+                         now - heartbeat.deadline, self.stack(heartbeat))
+        if stalled and self.restart:
+            logger.critical('Перезапуск из-за зависших циклов: %s',
+                            ', '.join(stalled))
+            logging.shutdown()
+            self._exit(RESTART_EXIT_CODE)
+        return stalled
+
+    def stalled(self) -> list:
+        """Возвращает имена зависших циклов."""
+        return sorted(self._stalled)
+
+    def healthz(self) -> tuple:
+        """Ответ /healthz: 503, если какой-то цикл завис."""
+        if self._stalled:
+            return (503, 'text/plain',
+                    f'stalled: {", ".join(self.stalled())}\n')
+        return 200, 'text/plain', 'ok\n'
+
+    def readyz(self) -> tuple:
+        """Ответ /readyz: 200, когда все циклы прошли хотя бы раз."""
+        if not self._stalled and (not self._loops or self._starting):
+            return 503, 'text/plain', 'starting\n'
+        return self.healthz()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self) -> None:
+        """Публикует /healthz и /readyz и запускает фоновую проверку."""
+        metrics.ROUTES['/healthz'] = self.healthz
+        metrics.ROUTES['/readyz'] = self.readyz
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Останавливает фоновую проверку."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None